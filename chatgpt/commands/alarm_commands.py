@@ -4,24 +4,41 @@ Alarm Commands – etkileşimli + tek satır
 - /alarm, /alarmlist, /alarmstop, /alarmcancel
 - PRICE_TOLERANCE (config.py)
 - Eski alarm şemasından otomatik migrasyon (coin/coin_id → symbol)
+- Tetikleme services/alarm_engine üzerinden: sembol başına sıralı eşik defterleri
+- Olay güdümlü: services/market her fiyat güncellemesinde haber verir; son
+  değerlendirmeden beri görülen en yüksek/en düşük fiyat kullanılır
+- Kalıcılık services/alarm_store üzerinden (journal ya da SQLite, değişiklik başına O(1))
 """
 
 from __future__ import annotations
 import threading
 import time
-import json
+from collections import deque
 from typing import Dict, List, Any, Optional
 
-from config import PRICE_TOLERANCE, ALARM_CHECK_INTERVAL, MAX_ALARMS_PER_USER
-from services.market import start as market_start, get_price, to_binance_symbol
+from config import PRICE_TOLERANCE, ALARM_CHECK_INTERVAL, MAX_ALARMS_PER_USER, ALARM_STORE
+from services.market import start as market_start, get_price, to_binance_symbol, subscribe
+from services.alarm_engine import AlarmEngine
+from services.alarm_store import AlarmStore, open_store, ensure_ids, new_alarm_id
 
 price_alarms: Dict[int, List[Dict[str, Any]]] = {}
+engine = AlarmEngine(PRICE_TOLERANCE)
 user_states: Dict[int, Dict[str, Any]] = {}
 ALARM_FILE = "alarms.json"
+_store: AlarmStore = open_store(ALARM_STORE, ALARM_FILE)
+_alarms_lock = threading.RLock()   # price_alarms: handler thread'leri + izleme döngüsü
 
 _monitor_thread: Optional[threading.Thread] = None
 _monitor_running = False
 
+# Fiyat tick'leri: sembol -> [en düşük, en yüksek, ilk tick zamanı] (son değerlendirmeden beri)
+_pending_lock = threading.Lock()
+_pending: Dict[str, List[float]] = {}
+_wakeup = threading.Event()
+
+# Tetikleme gecikmesi: tick zamanı -> send_message dönüşü (saniye)
+_latencies: deque = deque(maxlen=1000)
+
 
 # ---------------- yardımcılar ----------------
 def _pretty(v: float) -> str:
@@ -33,23 +50,15 @@ def _pretty(v: float) -> str:
         return f"${v:.6f}"
     return f"${v:.8f}"
 
-def _save_alarms():
-    try:
-        with open(ALARM_FILE, "w", encoding="utf-8") as f:
-            json.dump(price_alarms, f, indent=2, ensure_ascii=False)
-    except Exception as e:
-        print(f"❌ Alarm kaydetme hatası: {e}")
-
 def _load_alarms():
     global price_alarms
     try:
-        with open(ALARM_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        price_alarms = {int(k): v for k, v in data.items()}
-        _migrate_alarms()  # <<< eski kayıtları dönüştür
+        data = _store.load()
+        with _alarms_lock:
+            price_alarms = data
+            _migrate_alarms()  # <<< eski kayıtları dönüştür
+            engine.rebuild(price_alarms)
         print(f"⏰ Kaydedilmiş alarmlar: {sum(len(v) for v in price_alarms.values())}")
-    except FileNotFoundError:
-        price_alarms = {}
     except Exception as e:
         print(f"⚠️ Alarm yükleme hatası: {e}")
         price_alarms = {}
@@ -75,58 +84,174 @@ def _migrate_alarms():
                 # temizlik
                 a.pop("coin_id", None)
                 a.pop("coin", None)
+    if ensure_ids(price_alarms):
+        changed = True
     if changed:
-        _save_alarms()
+        _store.rewrite(price_alarms)   # tek seferlik tam yazım
 
 def _add_alarm(user_id: int, symbol: str, target: float, direction: str):
-    price_alarms.setdefault(user_id, []).append({
+    alarm = {
+        "id": new_alarm_id(),
         "symbol": symbol,
         "target": float(target),
         "direction": direction
-    })
-    _save_alarms()
+    }
+    # Önce journal: alarm motora girdiği an tetiklenebilir; "del" kaydı "add"den önce yazılırsa
+    # yeniden oynatmada tetiklenmiş alarm geri gelir
+    _store.add(user_id, alarm)
+    with _alarms_lock:
+        price_alarms.setdefault(user_id, []).append(alarm)
+        engine.add(user_id, alarm)
 
 
 # --------------- izleme döngüsü ---------------
+def _notify(bot, user_id: int, alarm: Dict[str, Any], price: float):
+    symbol = alarm.get("symbol") or str(alarm.get("coin", "???")).upper()
+    target = float(alarm["target"])
+    txt = (
+        f"🔔📈 <b>ALARM!</b>\n\n"
+        f"<b>{symbol}</b> hedefine ulaştı.\n"
+        f"🎯 Hedef: {_pretty(target)}\n"
+        f"💰 Fiyat: {_pretty(price)}\n\n"
+        f"ℹ️ Alarm tek seferliktir. Yeni alarm: /alarm {symbol}"
+    )
+    try:
+        bot.send_message(user_id, txt, parse_mode="HTML")
+    except Exception as e:
+        print(f"Mesaj gönderilemedi (uid={user_id}): {e}")
+
+def _fire(bot, symbol: str, low: float, high: float, tick_ts: Optional[float] = None) -> int:
+    """[low, high] aralığıyla geçilen alarmları tetikle; tetiklenen alarm sayısını döndür."""
+    fired = engine.check_range(symbol, low, high)
+    for user_id, alarm in fired:
+        price = high if alarm.get("direction", "up") == "up" else low
+        _notify(bot, user_id, alarm, price)
+        if tick_ts is not None:
+            _latencies.append(time.time() - tick_ts)
+    if fired:
+        with _alarms_lock:
+            for user_id, alarm in fired:
+                alarms = price_alarms.get(user_id)
+                if alarms is None:
+                    continue
+                try:
+                    alarms.remove(alarm)
+                except ValueError:
+                    pass
+                if not alarms:
+                    price_alarms.pop(user_id, None)
+        _store.remove_many((uid, a.get("id")) for uid, a in fired)
+    return len(fired)
+
+def _on_prices(prices: Dict[str, float], ts: float):
+    """services/market aboneliği: sadece alarmı olan sembolleri biriktir, döngüyü uyandır."""
+    touched = False
+    with _pending_lock:
+        for sym, price in prices.items():
+            if not engine.has_symbol(sym):
+                continue
+            ent = _pending.get(sym)
+            if ent is None:
+                _pending[sym] = [price, price, ts]
+            else:
+                if price < ent[0]: ent[0] = price
+                if price > ent[1]: ent[1] = price
+            touched = True
+    if touched:
+        _wakeup.set()
+
+def _drain_pending(bot) -> int:
+    with _pending_lock:
+        batch = dict(_pending)
+        _pending.clear()
+    fired = 0
+    for sym, (low, high, ts) in batch.items():
+        fired += _fire(bot, sym, low, high, ts)
+    return fired
+
+def _poll_prices(bot) -> int:
+    # Yedek yol: ALARM_CHECK_INTERVAL boyunca hiç tick gelmediyse fiyatı kendimiz sor
+    fired = 0
+    for symbol in engine.symbols():
+        price = get_price(symbol)
+        if price is None:
+            continue
+        fired += _fire(bot, symbol, price, price)
+    return fired
+
 def _monitor_loop(bot):
     global _monitor_running
-    print(f"🔔 Alarm izleme ({ALARM_CHECK_INTERVAL}s) başladı.")
+    print(f"🔔 Alarm izleme (tick tabanlı, yedek yoklama {ALARM_CHECK_INTERVAL}s) başladı.")
     while _monitor_running:
         try:
-            for user_id, alarms in list(price_alarms.items()):
-                for alarm in alarms[:]:
-                    # symbol yoksa (tam göçmemiş veri) coin fallback
-                    symbol = alarm.get("symbol") or to_binance_symbol(alarm.get("coin", "")) or str(alarm.get("coin", "???")).upper()
-                    target = float(alarm["target"])
-                    direction = alarm.get("direction", "up")
-
-                    price = get_price(symbol)
-                    if price is None:
-                        continue
-
-                    if direction == "up":
-                        hit = price >= target * (1 - float(PRICE_TOLERANCE))
-                    else:
-                        hit = price <= target * (1 + float(PRICE_TOLERANCE))
-
-                    if hit:
-                        txt = (
-                            f"🔔📈 <b>ALARM!</b>\n\n"
-                            f"<b>{symbol}</b> hedefine ulaştı.\n"
-                            f"🎯 Hedef: {_pretty(target)}\n"
-                            f"💰 Fiyat: {_pretty(price)}\n\n"
-                            f"ℹ️ Alarm tek seferliktir. Yeni alarm: /alarm {symbol}"
-                        )
-                        try:
-                            bot.send_message(user_id, txt, parse_mode="HTML")
-                        except Exception as e:
-                            print(f"Mesaj gönderilemedi (uid={user_id}): {e}")
-                        alarms.remove(alarm)
-                        _save_alarms()
-            time.sleep(ALARM_CHECK_INTERVAL)
+            woke = _wakeup.wait(ALARM_CHECK_INTERVAL)
+            _wakeup.clear()
+            if woke:
+                _drain_pending(bot)
+            else:
+                _poll_prices(bot)
         except Exception as e:
             print(f"🔁 Alarm döngü hatası: {e}")
-            time.sleep(ALARM_CHECK_INTERVAL)
+            time.sleep(1)
+
+def get_alarm_stats() -> Dict[str, Any]:
+    """Alarm sayıları ve tick → send_message gecikmesi (ms)."""
+    lat = sorted(_latencies)
+    def pct(p):
+        return lat[min(len(lat) - 1, int(len(lat) * p))] * 1000 if lat else None
+    return {
+        "alarms": len(engine),
+        "symbols": len(engine.symbols()),
+        "triggered": len(lat),
+        "latency_p50_ms": pct(0.50),
+        "latency_p95_ms": pct(0.95),
+        "latency_max_ms": lat[-1] * 1000 if lat else None,
+    }
+
+def benchmark_trigger_latency(n_alarms: int = 100_000, n_symbols: int = 200, send_delay: float = 0.0):
+    """
+    Sahte bot ile tick → send_message gecikmesini ölç.
+    n_alarms alarm kurulur, her sembol için hepsini geçen tek bir tick yayınlanır.
+    """
+    import random
+    from services import market
+
+    class _FakeBot:
+        sent = 0
+        def send_message(self, *a, **k):
+            if send_delay:
+                time.sleep(send_delay)
+            _FakeBot.sent += 1
+
+    global price_alarms, _store
+    saved = price_alarms, _store
+    price_alarms = {}
+    _store = AlarmStore()   # diske yazma yok
+    try:
+        syms = [f"B{i}USDT" for i in range(n_symbols)]
+        for k in range(n_alarms):
+            price_alarms.setdefault(k % 5000, []).append(
+                {"id": new_alarm_id(), "symbol": random.choice(syms), "target": random.uniform(90, 110), "direction": random.choice(["up", "down"])}
+            )
+        engine.rebuild(price_alarms)
+        _latencies.clear()
+        bot = _FakeBot()
+        _ensure_monitor_started(bot)
+        subscribe(_on_prices)
+
+        t0 = time.time()
+        market._publish({s: 200.0 for s in syms}, time.time())   # tüm up alarmları
+        market._publish({s: 1.0 for s in syms}, time.time())     # tüm down alarmları
+        while _FakeBot.sent < n_alarms and time.time() - t0 < 120:
+            time.sleep(0.01)
+        stats = get_alarm_stats()
+        print(f"⏱️ {n_alarms} alarm / {n_symbols} sembol: {_FakeBot.sent} gönderim, "
+              f"{time.time() - t0:.2f}s toplam, p50={stats['latency_p50_ms']:.1f}ms "
+              f"p95={stats['latency_p95_ms']:.1f}ms max={stats['latency_max_ms']:.1f}ms")
+        return stats
+    finally:
+        price_alarms, _store = saved
+        engine.rebuild(price_alarms)
 
 def _ensure_monitor_started(bot):
     global _monitor_thread, _monitor_running
@@ -142,6 +267,7 @@ def register_alarm_commands(bot):
     market_start()           # market servisi ayakta
     _load_alarms()           # alarmları yükle + migrate
     _ensure_monitor_started(bot)
+    subscribe(_on_prices)    # her fiyat güncellemesinde değerlendir
 
     # — Öncelik: list/stop/cancel (bekleme modunda da çalışsın)
     @bot.message_handler(commands=["alarmlist"])
@@ -169,8 +295,9 @@ def register_alarm_commands(bot):
     @bot.message_handler(commands=["alarmstop"])
     def cmd_alarmstop(message):
         uid = message.chat.id
-        price_alarms.pop(uid, None)
-        _save_alarms()
+        with _alarms_lock:
+            engine.remove_user(uid, price_alarms.pop(uid, []))
+        _store.remove_user(uid)
         bot.send_message(uid, "🗑️ Tüm alarmların silindi.")
 
     @bot.message_handler(commands=["alarmcancel"])
@@ -287,3 +414,6 @@ def _ensure_monitor_started(bot):
     _monitor_running = True
     _monitor_thread = threading.Thread(target=_monitor_loop, args=(bot,), daemon=True)
     _monitor_thread.start()
+
+if __name__ == "__main__":
+    benchmark_trigger_latency()
@@ -7,6 +7,7 @@ from telebot import types
 import pandas as pd
 import numpy as np
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import requests
 
 try:
@@ -15,11 +16,20 @@ except Exception:
     SIMPLE_TEXT_LEVEL_OFFSET = 0.003
     OPENAI_API_KEY = None
 
+try:
+    from config import ANALYSIS_FETCH_WORKERS
+except Exception:
+    ANALYSIS_FETCH_WORKERS = 8
+
 from utils.binance_api import find_binance_symbol, get_binance_ohlc, get_24h_stats
-from utils.modern_charts import create_ultra_modern_chart  # Modern chart kullan
+from services.render_service import render as render_chart  # Grafikler render süreçlerinde
+from services.chart_cache import make_key as chart_key, send_cached_photo
+from services.universe_scanner import scan as scan_universe
+from services.watchlist import get as watchlist_get, start as watchlist_start
 from utils.technical_analysis import (
     calculate_rsi, calculate_macd, calculate_bollinger_bands,
-    calculate_sma, calculate_ema, calculate_volume_analysis, generate_trading_signals
+    calculate_sma, calculate_ema, calculate_volume_analysis, generate_trading_signals,
+    get_indicator_frame,
 )
 
 # ---------- Yardımcı Fonksiyonlar ----------
@@ -116,51 +126,104 @@ def calculate_analysis_score(rsi: float, macd_data, bb_data, volume_data, curren
     
     return score, signals
 
-def get_multi_timeframe_analysis(symbol: str) -> dict:
-    """Çoklu timeframe analizi"""
-    timeframes = {
-        '1h': {'limit': 100, 'weight': 0.3},
-        '4h': {'limit': 100, 'weight': 0.3},
-        '1d': {'limit': 100, 'weight': 0.25},
-        '1w': {'limit': 52, 'weight': 0.15}
-    }
-    
+MULTI_TIMEFRAMES = {
+    '1h': {'limit': 100, 'weight': 0.3},
+    '4h': {'limit': 100, 'weight': 0.3},
+    '1d': {'limit': 100, 'weight': 0.25},
+    '1w': {'limit': 52, 'weight': 0.15}
+}
+
+# Detaylı analizin veri istekleri (kline'lar, F&G, 24h) bu havuzda paralel çalışır
+_fetch_pool = ThreadPoolExecutor(max_workers=ANALYSIS_FETCH_WORKERS, thread_name_prefix="analysis-fetch")
+
+
+def _fetch_timeframe(symbol: str, tf: str):
+    """Tek timeframe: veriyi çek + analiz et -> (df, sonuç) (veri yoksa (None, None))"""
+    try:
+        df = get_binance_ohlc(symbol, interval=tf, limit=MULTI_TIMEFRAMES[tf]['limit'])
+        if df is None or df.empty:
+            return None, None
+        return df, _analyze_timeframe(symbol, tf, df)
+    except Exception as e:
+        print(f"Timeframe {tf} analiz hatası: {e}")
+        return None, None
+
+
+def get_multi_timeframe_analysis(symbol: str, frames: dict = None) -> dict:
+    """
+    Çoklu timeframe analizi. Timeframe'ler paralel çekilir; frames verilirse
+    çekilen DataFrame'ler {tf: df} olarak oraya da yazılır (tekrar indirmemek için).
+    """
+    futures = {tf: _fetch_pool.submit(_fetch_timeframe, symbol, tf) for tf in MULTI_TIMEFRAMES}
     results = {}
-    
-    for tf, config in timeframes.items():
-        try:
-            df = get_binance_ohlc(symbol, interval=tf, limit=config['limit'])
-            if df is None or df.empty:
-                continue
-            
-            # Temel hesaplamalar
-            current_price = float(df['close'].iloc[-1])
-            rsi = float(calculate_rsi(df['close']).iloc[-1])
-            macd = calculate_macd(df['close'])
-            bb = calculate_bollinger_bands(df['close'])
-            sma20 = float(calculate_sma(df['close'], 20).iloc[-1])
-            volume_data = calculate_volume_analysis(df)
-            
-            # Skor hesapla
-            score, signals = calculate_analysis_score(rsi, macd, bb, volume_data, current_price, sma20)
-            
-            # MACD durumu
-            macd_status = "↑" if macd['macd'].iloc[-1] > macd['signal'].iloc[-1] else "↓"
-            
-            results[tf] = {
-                'score': score,
-                'rsi': rsi,
-                'macd_status': macd_status,
-                'signals': signals[:2],  # İlk 2 sinyal
-                'price': current_price,
-                'volume_ratio': volume_data.get('volume_ratio', 1)
-            }
-        except Exception as e:
-            print(f"Timeframe {tf} analiz hatası: {e}")
+    for tf, fut in futures.items():
+        df, result = fut.result()
+        if result is None:
             continue
-    
+        results[tf] = result
+        if frames is not None:
+            frames[tf] = df
     return results
 
+
+def _analyze_timeframe(symbol: str, tf: str, df: pd.DataFrame) -> dict:
+    """Tek timeframe'in skor/RSI/MACD özeti (indikatörler ortak IndicatorFrame'den)"""
+    # Temel hesaplamalar
+    ind = get_indicator_frame(symbol, tf, df)
+    current_price = float(df['close'].iloc[-1])
+    rsi = float(ind.rsi().iloc[-1])
+    macd = ind.macd()
+    bb = ind.bollinger()
+    sma20 = float(ind.sma(20).iloc[-1])
+    volume_data = ind.volume()
+    
+    # Skor hesapla
+    score, signals = calculate_analysis_score(rsi, macd, bb, volume_data, current_price, sma20)
+    
+    # MACD durumu
+    macd_status = "↑" if macd['macd'].iloc[-1] > macd['signal'].iloc[-1] else "↓"
+    
+    return {
+        'score': score,
+        'rsi': rsi,
+        'macd_status': macd_status,
+        'signals': signals[:2],  # İlk 2 sinyal
+        'price': current_price,
+        'volume_ratio': volume_data.get('volume_ratio', 1)
+    }
+
+TF_NAMES = {"1h": "1 Saat", "4h": "4 Saat", "1d": "1 Gün", "1w": "1 Hafta"}
+
+# ---------- Piyasa Taraması ----------
+SCAN_INTERVALS = ("1h", "4h", "1d")
+SCAN_SECTIONS = (
+    ("oversold", "🟢 <b>Aşırı satım (RSI &lt; 30)</b>"),
+    ("overbought", "🔴 <b>Aşırı alım (RSI &gt; 70)</b>"),
+    ("volume_spike", "📊 <b>Hacim patlaması</b>"),
+    ("macd_cross", "🎯 <b>MACD pozitif kesişim</b>"),
+    ("top_score", "🏆 <b>En yüksek skor</b>"),
+)
+
+
+def format_scan_result(result: dict) -> str:
+    lines = [
+        f"🔭 <b>Piyasa Taraması ({result['interval'].upper()})</b>",
+        f"📋 {result['symbols']} parite · {datetime.fromtimestamp(result['at']).strftime('%H:%M')}",
+    ]
+    for key, title in SCAN_SECTIONS:
+        rows = result["rankings"].get(key) or []
+        lines.append("")
+        lines.append(title)
+        if not rows:
+            lines.append("• —")
+        for r in rows:
+            extra = f"hacim x{r['volume_ratio']:.1f}" if key == "volume_spike" else f"RSI {r['rsi']:.0f}"
+            lines.append(f"• <b>{r['symbol'].replace('USDT', '')}</b> {_fmt_price(r['price'])} · "
+                         f"{extra} · skor {r['score']:.1f}/10")
+    lines.append("")
+    lines.append("💡 Detay için: /analiz COIN")
+    return "\n".join(lines)
+
 def calculate_risk_metrics(df: pd.DataFrame, current_price: float) -> dict:
     """Risk metriklerini hesapla"""
     try:
@@ -428,6 +491,8 @@ def get_market_sentiment() -> dict:
 
 # ---------- Ana Komut Handler ----------
 def register_analysis_commands(bot):
+    # Popüler coinlerin analizleri arka planda hazır tutulur
+    watchlist_start(build_analysis)
 
     @bot.message_handler(commands=['analiz'])
     def analiz_cmd(message):
@@ -507,14 +572,13 @@ def register_analysis_commands(bot):
                 "📊 Çoklu timeframe analizi...\n"
                 "🤖 AI yorumu hazırlanıyor...\n"
                 "⚠️ Risk metrikleri hesaplanıyor...\n\n"
-                "⚡ Bu işlem 10-15 saniye sürebilir.",
+                "⚡ Bu işlem birkaç saniye sürebilir.",
                 parse_mode="HTML"
             )
             _perform_full_analysis(bot, call.message.chat.id, symbol, coin_input)
         else:
             # TEKLİ ZAMAN ANALİZİ
-            names = {"1h":"1 Saat","4h":"4 Saat","1d":"1 Gün","1w":"1 Hafta"}
-            tf_name = names.get(tf, tf)
+            tf_name = TF_NAMES.get(tf, tf)
             bot.answer_callback_query(call.id, f"🎯 {tf_name} analiz başlıyor...")
             bot.send_message(
                 call.message.chat.id,
@@ -525,162 +589,233 @@ def register_analysis_commands(bot):
             )
             _perform_single_analysis(bot, call.message.chat.id, symbol, coin_input, tf, tf_name)
 
+    @bot.message_handler(commands=['tara', 'scan'])
+    def tara_cmd(message):
+        parts = _split_command(message.text)
+        interval = parts[1].lower() if len(parts) > 1 else "4h"
+        if interval not in SCAN_INTERVALS:
+            bot.send_message(
+                message.chat.id,
+                "🔭 <b>Piyasa Taraması</b>\n\n"
+                "🔹 <b>Kullanım:</b> /tara [1h|4h|1d]\n\n"
+                "Tüm USDT paritelerinde aşırı satım/alım, hacim patlaması ve MACD kesişimleri.",
+                parse_mode="HTML"
+            )
+            return
+
+        wait = bot.send_message(message.chat.id, f"⏳ <b>{interval.upper()} taraması</b> - tüm USDT pariteleri...",
+                                parse_mode="HTML")
+        result = scan_universe(interval)
+        try:
+            bot.delete_message(message.chat.id, wait.message_id)
+        except:
+            pass
+        if not result.get("rankings"):
+            bot.send_message(message.chat.id, "❌ Tarama verisi alınamadı, biraz sonra tekrar dene.")
+            return
+        bot.send_message(message.chat.id, format_scan_result(result), parse_mode="HTML")
+
+# ---------- Gönderim ----------
+def _send_analysis(bot, chat_id: int, result: dict):
+    """Hazır analiz sonucu: önce grafik (cache'ten ya da render), sonra metin"""
+    key, render_fn = result['chart']
+    if render_fn is not None:
+        try:
+            send_cached_photo(bot, chat_id, key, render_fn)
+        except Exception as e:
+            print(f"Grafik hatası: {e}")
+    bot.send_message(chat_id, result['text'], parse_mode="HTML")
+
+
+def build_analysis(symbol: str, kind: str, coin_input: str):
+    """services/watchlist ön-hesaplaması: kind = timeframe ya da 'full'"""
+    if kind == 'full':
+        return build_full_analysis(symbol, coin_input)
+    return build_single_analysis(symbol, coin_input, kind, TF_NAMES.get(kind, kind))
+
 # ---------- Detaylı Analiz ----------
 def _perform_full_analysis(bot, chat_id: int, symbol: str, coin_input: str):
     try:
-        # 1. Çoklu timeframe analizi
-        multi_tf_results = get_multi_timeframe_analysis(symbol)
-        
-        if not multi_tf_results:
+        # Popüler coinler için hazır sonuç (services/watchlist), yoksa şimdi hesapla
+        result = watchlist_get(symbol, 'full', coin_input) or build_full_analysis(symbol, coin_input)
+        if result is None:
             bot.send_message(chat_id, f"❌ {symbol} veri alınamadı!")
             return
+        _send_analysis(bot, chat_id, result)
+    except Exception as e:
+        print(f"Detaylı analiz hatası: {e}")
+        bot.send_message(chat_id, f"❌ Analiz tamamlanamadı: {str(e)}")
+
+
+def build_full_analysis(symbol: str, coin_input: str):
+    """Detaylı analiz: {'text', 'chart': (anahtar, render), 'valid_until'}; veri yoksa None"""
+    # 1-4. Tüm veri istekleri paralel: 4 timeframe + Fear & Greed + 24h.
+    # 1d serisi risk/grafik için de kullanılır, ikinci kez indirilmez.
+    sentiment_fut = _fetch_pool.submit(get_market_sentiment)
+    stats_fut = _fetch_pool.submit(get_24h_stats, symbol)
+    frames = {}
+    multi_tf_results = get_multi_timeframe_analysis(symbol, frames)
+    
+    if not multi_tf_results:
+        return None
+    
+    # 2. Risk metrikleri (1d verisi üzerinden)
+    df_daily = frames.get('1d')
+    if df_daily is not None and not df_daily.empty:
+        current_price = float(df_daily['close'].iloc[-1])
+        risk_metrics = calculate_risk_metrics(df_daily, current_price)
+        sr_levels = calculate_support_resistance(df_daily, current_price)
+    else:
+        current_price = list(multi_tf_results.values())[0]['price']
+        risk_metrics = {'volatility_pct': 0, 'risk_score': 5, 'risk_level': 'Orta', 'position_size': 'Max %5'}
+        sr_levels = {'strong_support': current_price * 0.95, 'strong_resistance': current_price * 1.05, 'pivot': current_price}
+    
+    # 3. Market sentiment
+    sentiment = sentiment_fut.result()
+    
+    # 4. 24h istatistikler
+    stats_24h = stats_fut.result()
+    
+    # 5. AI yorumu oluştur
+    ai_comment = generate_ai_comment(symbol, multi_tf_results, risk_metrics, sr_levels)
+    
+    # 6. Grafik (opsiyonel - 1d grafiği); gönderimde cache'ten ya da render edilir
+    chart = (None, None)
+    try:
+        analysis_data = {
+            'price': current_price,
+            'rsi': multi_tf_results.get('1d', {}).get('rsi', 50),
+            'overall_score': sum(d['score'] for d in multi_tf_results.values()) / len(multi_tf_results) if multi_tf_results else 5,
+            'signals': []
+        }
         
-        # 2. Risk metrikleri (1d verisi üzerinden)
-        df_daily = get_binance_ohlc(symbol, interval='1d', limit=100)
         if df_daily is not None and not df_daily.empty:
-            current_price = float(df_daily['close'].iloc[-1])
-            risk_metrics = calculate_risk_metrics(df_daily, current_price)
-            sr_levels = calculate_support_resistance(df_daily, current_price)
-        else:
-            current_price = list(multi_tf_results.values())[0]['price']
-            risk_metrics = {'volatility_pct': 0, 'risk_score': 5, 'risk_level': 'Orta', 'position_size': 'Max %5'}
-            sr_levels = {'strong_support': current_price * 0.95, 'strong_resistance': current_price * 1.05, 'pivot': current_price}
-        
-        # 3. Market sentiment
-        sentiment = get_market_sentiment()
-        
-        # 4. 24h istatistikler
-        stats_24h = get_24h_stats(symbol)
-        
-        # 5. AI yorumu oluştur
-        ai_comment = generate_ai_comment(symbol, multi_tf_results, risk_metrics, sr_levels)
-        
-        # 6. Grafik oluştur (opsiyonel - 1d grafiği)
-        try:
-            analysis_data = {
-                'price': current_price,
-                'rsi': multi_tf_results.get('1d', {}).get('rsi', 50),
-                'overall_score': sum(d['score'] for d in multi_tf_results.values()) / len(multi_tf_results) if multi_tf_results else 5,
-                'signals': []
-            }
+            # Grafik için ek hesaplamalar
+            # 1d çoklu-timeframe adımında hesaplandı; aynı frame grafiğe de gider
+            ind = get_indicator_frame(symbol, '1d', df_daily)
+            analysis_data['indicators'] = ind
+            analysis_data['macd_data'] = ind.macd()
+            analysis_data['bb_data'] = ind.bollinger()
+            analysis_data['fib_levels'] = sr_levels.get('fib_levels', {})
             
-            if df_daily is not None and not df_daily.empty:
-                # Grafik için ek hesaplamalar
-                analysis_data['macd_data'] = calculate_macd(df_daily['close'])
-                analysis_data['bb_data'] = calculate_bollinger_bands(df_daily['close'])
-                analysis_data['fib_levels'] = sr_levels.get('fib_levels', {})
-                
-                chart_img = create_ultra_modern_chart(df_daily, symbol, analysis_data, '1d')
-                if chart_img:
-                    bot.send_photo(chat_id, chart_img)
-        except Exception as e:
-            print(f"Grafik hatası: {e}")
-        
-        # 7. Detaylı mesaj oluştur
-        text = f"🔥 <b>{coin_input.upper()} - DETAYLI ANALİZ</b>\n\n"
-        text += f"💰 <b>Fiyat:</b> {_fmt_price(current_price)}\n"
-        
-        if stats_24h:
-            text += f"📊 <b>24h Değişim:</b> {stats_24h.get('change_24h', 0):+.2f}%\n"
-            text += f"📈 <b>24h Hacim:</b> ${stats_24h.get('volume_24h', 0)/1e6:.1f}M\n\n"
-        else:
-            text += "\n"
-        
-        # Çoklu timeframe özet
-        text += "📊 <b>ÇOKLU ZAMAN ANALİZİ:</b>\n"
-        text += "━━━━━━━━━━━━━━━━━\n"
-        
-        for tf in ['1h', '4h', '1d', '1w']:
-            if tf in multi_tf_results:
-                data = multi_tf_results[tf]
-                score = data['score']
-                
-                # Emoji ve durum
-                if score >= 7:
-                    emoji = "🟢"
-                    status = "ALIM"
-                elif score >= 5.5:
-                    emoji = "🟡"
-                    status = "YÜKSEL"
-                elif score >= 4.5:
-                    emoji = "⚪"
-                    status = "NÖTR"
-                elif score >= 3:
-                    emoji = "🟡"
-                    status = "DÜŞÜŞ"
-                else:
-                    emoji = "🔴"
-                    status = "SATIM"
-                
-                tf_name = {'1h': '1 Saat', '4h': '4 Saat', '1d': '1 Gün', '1w': '1 Hafta'}.get(tf, tf)
-                text += f"{emoji} <b>{tf_name:8}</b> {status:6} ({score:.1f}/10) RSI:{int(data['rsi'])} MACD:{data['macd_status']}\n"
-        
-        # Genel skor
-        avg_score = sum(d['score'] for d in multi_tf_results.values()) / len(multi_tf_results) if multi_tf_results else 5
-        
-        text += "━━━━━━━━━━━━━━━━━\n"
-        text += f"💎 <b>Genel Skor:</b> {avg_score:.1f}/10 "
-        
-        if avg_score >= 7:
-            text += "(GÜÇLÜ ALIM 🚀)\n\n"
-        elif avg_score >= 5.5:
-            text += "(ALIM 📈)\n\n"
-        elif avg_score >= 4.5:
-            text += "(BEKLE ⚖️)\n\n"
-        elif avg_score >= 3:
-            text += "(SATIM 📉)\n\n"
-        else:
-            text += "(GÜÇLÜ SATIM 🔻)\n\n"
-        
-        # Risk Analizi
-        text += "⚠️ <b>RİSK ANALİZİ:</b>\n"
-        text += f"• Volatilite: %{risk_metrics['volatility_pct']:.1f}\n"
-        text += f"• Risk Seviyesi: {risk_metrics['risk_level']} ({risk_metrics['risk_score']}/10)\n"
-        text += f"• Önerilen Pozisyon: {risk_metrics['position_size']}\n\n"
-        
-        # Destek/Direnç
-        text += "📏 <b>ÖNEMLİ SEVİYELER:</b>\n"
-        text += f"🔴 Direnç: {_fmt_price(sr_levels['strong_resistance'])}\n"
-        text += f"⚪ Pivot: {_fmt_price(sr_levels['pivot'])}\n"
-        text += f"🟢 Destek: {_fmt_price(sr_levels['strong_support'])}\n\n"
-        
-        # Market Sentiment
-        text += "😱 <b>PİYASA DUYGUSU:</b>\n"
-        text += f"Fear & Greed: {sentiment['fear_greed']}/100 ({sentiment['fear_greed_text']})\n\n"
-        
-        # AI Yorumu
-        text += ai_comment + "\n\n"
-        
-        # Uyarı
-        text += "⚠️ <i>Bu analiz yatırım tavsiyesi değildir!</i>"
-        
-        bot.send_message(chat_id, text, parse_mode="HTML")
-        
+            chart = (chart_key(symbol, '1d', 'analysis_full', df_daily),
+                     lambda: render_chart('modern_chart', df_daily, symbol, analysis_data, '1d'))
     except Exception as e:
-        print(f"Detaylı analiz hatası: {e}")
-        bot.send_message(chat_id, f"❌ Analiz tamamlanamadı: {str(e)}")
+        print(f"Grafik hatası: {e}")
+    
+    # 7. Detaylı mesaj oluştur
+    text = f"🔥 <b>{coin_input.upper()} - DETAYLI ANALİZ</b>\n\n"
+    text += f"💰 <b>Fiyat:</b> {_fmt_price(current_price)}\n"
+    
+    if stats_24h:
+        text += f"📊 <b>24h Değişim:</b> {stats_24h.get('change_24h', 0):+.2f}%\n"
+        text += f"📈 <b>24h Hacim:</b> ${stats_24h.get('volume_24h', 0)/1e6:.1f}M\n\n"
+    else:
+        text += "\n"
+    
+    # Çoklu timeframe özet
+    text += "📊 <b>ÇOKLU ZAMAN ANALİZİ:</b>\n"
+    text += "━━━━━━━━━━━━━━━━━\n"
+    
+    for tf in ['1h', '4h', '1d', '1w']:
+        if tf in multi_tf_results:
+            data = multi_tf_results[tf]
+            score = data['score']
+            
+            # Emoji ve durum
+            if score >= 7:
+                emoji = "🟢"
+                status = "ALIM"
+            elif score >= 5.5:
+                emoji = "🟡"
+                status = "YÜKSEL"
+            elif score >= 4.5:
+                emoji = "⚪"
+                status = "NÖTR"
+            elif score >= 3:
+                emoji = "🟡"
+                status = "DÜŞÜŞ"
+            else:
+                emoji = "🔴"
+                status = "SATIM"
+            
+            tf_name = {'1h': '1 Saat', '4h': '4 Saat', '1d': '1 Gün', '1w': '1 Hafta'}.get(tf, tf)
+            text += f"{emoji} <b>{tf_name:8}</b> {status:6} ({score:.1f}/10) RSI:{int(data['rsi'])} MACD:{data['macd_status']}\n"
+    
+    # Genel skor
+    avg_score = sum(d['score'] for d in multi_tf_results.values()) / len(multi_tf_results) if multi_tf_results else 5
+    
+    text += "━━━━━━━━━━━━━━━━━\n"
+    text += f"💎 <b>Genel Skor:</b> {avg_score:.1f}/10 "
+    
+    if avg_score >= 7:
+        text += "(GÜÇLÜ ALIM 🚀)\n\n"
+    elif avg_score >= 5.5:
+        text += "(ALIM 📈)\n\n"
+    elif avg_score >= 4.5:
+        text += "(BEKLE ⚖️)\n\n"
+    elif avg_score >= 3:
+        text += "(SATIM 📉)\n\n"
+    else:
+        text += "(GÜÇLÜ SATIM 🔻)\n\n"
+    
+    # Risk Analizi
+    text += "⚠️ <b>RİSK ANALİZİ:</b>\n"
+    text += f"• Volatilite: %{risk_metrics['volatility_pct']:.1f}\n"
+    text += f"• Risk Seviyesi: {risk_metrics['risk_level']} ({risk_metrics['risk_score']}/10)\n"
+    text += f"• Önerilen Pozisyon: {risk_metrics['position_size']}\n\n"
+    
+    # Destek/Direnç
+    text += "📏 <b>ÖNEMLİ SEVİYELER:</b>\n"
+    text += f"🔴 Direnç: {_fmt_price(sr_levels['strong_resistance'])}\n"
+    text += f"⚪ Pivot: {_fmt_price(sr_levels['pivot'])}\n"
+    text += f"🟢 Destek: {_fmt_price(sr_levels['strong_support'])}\n\n"
+    
+    # Market Sentiment
+    text += "😱 <b>PİYASA DUYGUSU:</b>\n"
+    text += f"Fear & Greed: {sentiment['fear_greed']}/100 ({sentiment['fear_greed_text']})\n\n"
+    
+    # AI Yorumu
+    text += ai_comment + "\n\n"
+    
+    # Uyarı
+    text += "⚠️ <i>Bu analiz yatırım tavsiyesi değildir!</i>"
+    
+    # en kısa timeframe'in açık mumu kapanınca sonuç eskir
+    valid_until = min(int(df['close_time'].iloc[-1]) for df in frames.values())
+    return {'text': text, 'chart': chart, 'valid_until': valid_until}
 
 # ---------- Tekli Analiz (Geliştirilmiş) ----------
 def _perform_single_analysis(bot, chat_id: int, symbol: str, coin_input: str, timeframe: str, tf_name: str):
+    result = watchlist_get(symbol, timeframe, coin_input) or build_single_analysis(symbol, coin_input, timeframe, tf_name)
+    if result is None:
+        bot.send_message(chat_id, f"❌ {symbol} veri alınamadı!")
+        return
+    _send_analysis(bot, chat_id, result)
+
+
+def build_single_analysis(symbol: str, coin_input: str, timeframe: str, tf_name: str):
+    """Tekli analiz: {'text', 'chart': (anahtar, render), 'valid_until'}; veri yoksa None"""
     limit_map = {'1h':168, '4h':168, '1d':100, '1w':52}
     limit = limit_map.get(timeframe, 100)
     df = get_binance_ohlc(symbol, interval=timeframe, limit=limit)
     
     if df is None or df.empty:
-        bot.send_message(chat_id, f"❌ {symbol} veri alınamadı!")
-        return
+        return None
 
     cur = float(df['close'].iloc[-1])
     prev = float(df['close'].iloc[-2]) if len(df)>1 else cur
     chg = ((cur - prev)/prev)*100 if prev else 0.0
 
-    rsi = float(calculate_rsi(df['close']).iloc[-1])
-    macd = calculate_macd(df['close'])
-    bb = calculate_bollinger_bands(df['close'])
-    sma20 = float(calculate_sma(df['close'],20).iloc[-1])
-    sma50 = float(calculate_sma(df['close'],50).iloc[-1]) if len(df)>50 else 0.0
-    vol = calculate_volume_analysis(df)
-    signals = generate_trading_signals(df)
+    # Her indikatör bir kez: skor, sinyaller ve grafik aynı frame'i kullanır
+    ind = get_indicator_frame(symbol, timeframe, df)
+    rsi = float(ind.rsi().iloc[-1])
+    macd = ind.macd()
+    bb = ind.bollinger()
+    sma20 = float(ind.sma(20).iloc[-1])
+    sma50 = float(ind.sma(50).iloc[-1]) if len(df)>50 else 0.0
+    vol = ind.volume()
+    signals = ind.signals()
 
     # Destek/Direnç ve Risk
     sr_levels = calculate_support_resistance(df, cur)
@@ -689,23 +824,19 @@ def _perform_single_analysis(bot, chat_id: int, symbol: str, coin_input: str, ti
     # Skor hesapla
     score, score_signals = calculate_analysis_score(rsi, macd, bb, vol, cur, sma20)
 
-    # Grafik
-    try:
-        analysis_data = {
-            'price': cur,
-            'rsi': rsi,
-            'macd_data': macd,
-            'bb_data': bb,
-            'signals': signals,
-            'overall_score': score,
-            'fib_levels': sr_levels.get('fib_levels', {})
-        }
-        
-        chart_img = create_ultra_modern_chart(df, symbol, analysis_data, timeframe)
-        if chart_img:
-            bot.send_photo(chat_id, chart_img)
-    except Exception as e:
-        print(f"Grafik hatası: {e}")
+    # Grafik (gönderimde cache'ten ya da render edilir)
+    analysis_data = {
+        'price': cur,
+        'rsi': rsi,
+        'macd_data': macd,
+        'bb_data': bb,
+        'signals': signals,
+        'indicators': ind,
+        'overall_score': score,
+        'fib_levels': sr_levels.get('fib_levels', {})
+    }
+    chart = (chart_key(symbol, timeframe, 'analysis', df),
+             lambda: render_chart('modern_chart', df, symbol, analysis_data, timeframe))
 
     # AI YORUM - TEKLİ ANALİZ İÇİN
     ai_comment = generate_single_ai_comment(score, rsi, macd, cur, sr_levels, risk_metrics, vol, score_signals)
@@ -743,7 +874,7 @@ def _perform_single_analysis(bot, chat_id: int, symbol: str, coin_input: str, ti
     text += f"🔧 ⏰ /alarm {coin_input}   |   💧 /likidite {coin_input}\n"
     text += "⚠️ <i>Bu analiz yatırım tavsiyesi değildir!</i>"
 
-    bot.send_message(chat_id, text, parse_mode="HTML")
+    return {'text': text, 'chart': chart, 'valid_until': int(df['close_time'].iloc[-1])}
 
 def generate_single_ai_comment(score, rsi, macd_data, current_price, sr_levels, risk_metrics, vol, signals):
     """Tekli analiz için profesyonel AI yorumu"""
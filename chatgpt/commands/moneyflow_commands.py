@@ -3,11 +3,12 @@ Money Flow Takip Sistemi
 Para akışını ve sektör rotasyonunu takip eder
 """
 
-import requests
 import pandas as pd
 from datetime import datetime, timedelta
 from telebot import types
 
+from services.market import start as market_start, get_ticker_table
+
 class MoneyFlowTracker:
     def __init__(self):
         self.base_url = "https://api.binance.com/api/v3"
@@ -15,31 +16,14 @@ class MoneyFlowTracker:
     def get_top_gainers(self, limit=10):
         """Son 24 saatin en çok kazandıranları"""
         try:
-            url = f"{self.base_url}/ticker/24hr"
-            response = requests.get(url, timeout=10)
-            
-            if response.status_code != 200:
+            # Ortak snapshot'ın kolon tablosu (services/market) – ağ isteği yok
+            table = get_ticker_table()
+            if table is None or not len(table):
                 return []
             
-            data = response.json()
-            
-            # USDT paritelerini filtrele ve sırala
-            usdt_pairs = [
-                {
-                    'symbol': item['symbol'],
-                    'price': float(item['lastPrice']),
-                    'change_percent': float(item['priceChangePercent']),
-                    'volume': float(item['quoteVolume']),
-                    'count': int(item['count'])
-                }
-                for item in data 
-                if item['symbol'].endswith('USDT') and float(item['quoteVolume']) > 1000000
-            ]
-            
-            # Değişime göre sırala
-            usdt_pairs.sort(key=lambda x: x['change_percent'], reverse=True)
-            
-            return usdt_pairs[:limit]
+            # USDT pariteleri, 1M$ üzeri hacim; değişime göre ilk `limit`
+            mask = table.mask(min_quote_volume=1000000)
+            return table.records(table.top_k('change', limit, mask))
         except Exception as e:
             print(f"Top gainers hatası: {e}")
             return []
@@ -47,31 +31,13 @@ class MoneyFlowTracker:
     def get_top_losers(self, limit=10):
         """Son 24 saatin en çok kaybedenler"""
         try:
-            url = f"{self.base_url}/ticker/24hr"
-            response = requests.get(url, timeout=10)
-            
-            if response.status_code != 200:
+            table = get_ticker_table()
+            if table is None or not len(table):
                 return []
             
-            data = response.json()
-            
-            # USDT paritelerini filtrele ve sırala
-            usdt_pairs = [
-                {
-                    'symbol': item['symbol'],
-                    'price': float(item['lastPrice']),
-                    'change_percent': float(item['priceChangePercent']),
-                    'volume': float(item['quoteVolume']),
-                    'count': int(item['count'])
-                }
-                for item in data 
-                if item['symbol'].endswith('USDT') and float(item['quoteVolume']) > 1000000
-            ]
-            
             # Değişime göre sırala (en düşük)
-            usdt_pairs.sort(key=lambda x: x['change_percent'])
-            
-            return usdt_pairs[:limit]
+            mask = table.mask(min_quote_volume=1000000)
+            return table.records(table.top_k('change', limit, mask, ascending=True))
         except Exception as e:
             print(f"Top losers hatası: {e}")
             return []
@@ -79,31 +45,12 @@ class MoneyFlowTracker:
     def get_volume_leaders(self, limit=10):
         """En yüksek hacimli coinler"""
         try:
-            url = f"{self.base_url}/ticker/24hr"
-            response = requests.get(url, timeout=10)
-            
-            if response.status_code != 200:
+            table = get_ticker_table()
+            if table is None or not len(table):
                 return []
             
-            data = response.json()
-            
-            # USDT paritelerini filtrele ve hacme göre sırala
-            usdt_pairs = [
-                {
-                    'symbol': item['symbol'],
-                    'price': float(item['lastPrice']),
-                    'change_percent': float(item['priceChangePercent']),
-                    'volume': float(item['quoteVolume']),
-                    'count': int(item['count'])
-                }
-                for item in data 
-                if item['symbol'].endswith('USDT')
-            ]
-            
-            # Hacme göre sırala
-            usdt_pairs.sort(key=lambda x: x['volume'], reverse=True)
-            
-            return usdt_pairs[:limit]
+            # USDT pariteleri, hacme göre sırala
+            return table.records(table.top_k('quote_volume', limit, table.mask()))
         except Exception as e:
             print(f"Volume leaders hatası: {e}")
             return []
@@ -121,29 +68,18 @@ class MoneyFlowTracker:
                 'Exchange': ['BNBUSDT', 'OKBUSDT', 'HTUSDT', 'FTTUSDT']
             }
             
-            url = f"{self.base_url}/ticker/24hr"
-            response = requests.get(url, timeout=10)
-            
-            if response.status_code != 200:
-                return {}
-            
-            data = response.json()
-            price_data = {item['symbol']: float(item['priceChangePercent']) for item in data}
+            table = get_ticker_table()
+            if table is None or not len(table):
+                return []
             
+            # Grup ortalaması tek bincount ile
             sector_performance = {}
-            for sector, coins in sectors.items():
-                changes = []
-                for coin in coins:
-                    if coin in price_data:
-                        changes.append(price_data[coin])
-                
-                if changes:
-                    avg_change = sum(changes) / len(changes)
-                    sector_performance[sector] = {
-                        'avg_change': avg_change,
-                        'coin_count': len(changes),
-                        'interpretation': self._interpret_sector(avg_change)
-                    }
+            for sector, (avg_change, coin_count) in table.group_mean('change', sectors).items():
+                sector_performance[sector] = {
+                    'avg_change': avg_change,
+                    'coin_count': coin_count,
+                    'interpretation': self._interpret_sector(avg_change)
+                }
             
             # Sıralama
             sorted_sectors = sorted(sector_performance.items(), key=lambda x: x[1]['avg_change'], reverse=True)
@@ -173,37 +109,25 @@ class MoneyFlowTracker:
         try:
             # Bu örnek bir implementasyon
             # Gerçek kullanımda historical volume datası gerekli
-            url = f"{self.base_url}/ticker/24hr"
-            response = requests.get(url, timeout=10)
-            
-            if response.status_code != 200:
+            table = get_ticker_table()
+            if table is None or not len(table):
                 return []
             
-            data = response.json()
-            
-            unusual = []
-            for item in data:
-                if not item['symbol'].endswith('USDT'):
-                    continue
-                
-                volume = float(item['quoteVolume'])
-                count = int(item['count'])
-                
-                # Basit anormal hacim tespiti
-                # Gerçekte: (bugünkü hacim / ortalama hacim) > 2
-                if count > 100000 and volume > 10000000:  # Yüksek işlem sayısı ve hacim
-                    unusual.append({
-                        'symbol': item['symbol'],
-                        'volume': volume,
-                        'count': count,
-                        'change': float(item['priceChangePercent']),
-                        'alert': '🔔 Yüksek aktivite!'
-                    })
+            # Basit anormal hacim tespiti
+            # Gerçekte: (bugünkü hacim / ortalama hacim) > 2
+            mask = table.mask(min_quote_volume=10000000, min_count=100000)  # Yüksek işlem sayısı ve hacim
             
             # Hacme göre sırala
-            unusual.sort(key=lambda x: x['volume'], reverse=True)
-            
-            return unusual[:10]
+            return [
+                {
+                    'symbol': r['symbol'],
+                    'volume': r['volume'],
+                    'count': r['count'],
+                    'change': r['change_percent'],
+                    'alert': '🔔 Yüksek aktivite!'
+                }
+                for r in table.records(table.top_k('quote_volume', 10, mask))
+            ]
         except Exception as e:
             print(f"Unusual volume hatası: {e}")
             return []
@@ -212,6 +136,7 @@ flow_tracker = MoneyFlowTracker()
 
 def register_moneyflow_commands(bot):
     """Money flow komutlarını kaydet"""
+    market_start()  # ortak ticker snapshot'ı ayakta
     
     @bot.message_handler(commands=['flow', 'moneyflow', 'paraakisi'])
     def moneyflow_command(message):
@@ -2,13 +2,18 @@
 Price Commands – /fiyat, /price
 - Kaynak: services/market (Binance REST + cache)
 - Tek mesaj: İlk çağrıda cache boşsa 2 sn'ye kadar bekler, hazır olunca gönderir.
+  (WebSocket akışı açıksa fiyat zaten hafızadadır; beklenmez.)
 - Grup desteği: /fiyat@BotAdi ... şeklini de algılar
+- Async modda (BOT_RUNTIME = "async") handler coroutine: cache boşsa fiyat aiohttp ile çekilir
 """
 
 from __future__ import annotations
 import time
 import re
-from services.market import start as market_start, get_price, get_change, to_binance_symbol
+from services.market import (
+    start as market_start, get_price, get_change, to_binance_symbol, is_streaming, peek_price,
+)
+from services.watchlist import record_price
 
 def _pretty_price(v: float) -> str:
     if v is None: return "—"
@@ -28,10 +33,24 @@ def _split_command(text: str):
     parts[0] = parts[0].split("@")[0]  # /fiyat@BotAdi -> /fiyat
     return parts
 
+def _price_text(symbol: str, price: float, change) -> str:
+    arrow = "🟢" if (change or 0) >= 0 else "🔻"
+    emoji = "📈" if (change or 0) >= 0 else "📉"
+    ch_txt = f"{arrow} %{(change or 0):.2f} {emoji}"
+    return (
+        f"💸 <b>{symbol}</b>\n\n"
+        f"Fiyat: <b>{_pretty_price(price)}</b>\n"
+        f"24s: {ch_txt}"
+    )
+
 def register_price_commands(bot):
     # Market servisini çalışır tut
     market_start()
 
+    if getattr(bot, "is_async", False):
+        _register_async(bot)
+        return
+
     @bot.message_handler(commands=["fiyat", "price"])
     def cmd_price(message):
         parts = _split_command(message.text)
@@ -44,13 +63,14 @@ def register_price_commands(bot):
         if not symbol:
             bot.reply_to(message, f"❌ '{coin.upper()}' bulunamadı!")
             return
+        record_price(symbol)
 
         # Tek mesaj politikası: cache boşsa kısa süre bekle
         bot.send_chat_action(message.chat.id, "typing")
         price = get_price(symbol)
         change = get_change(symbol)
 
-        if price is None:
+        if price is None and not is_streaming():
             deadline = time.time() + 2.0   # en fazla 2 sn bekle
             while time.time() < deadline:
                 time.sleep(0.25)
@@ -63,13 +83,37 @@ def register_price_commands(bot):
             bot.reply_to(message, "⚠️ Şu an fiyat erişilemedi, lütfen tekrar dener misin?")
             return
 
-        arrow = "🟢" if (change or 0) >= 0 else "🔻"
-        emoji = "📈" if (change or 0) >= 0 else "📉"
-        ch_txt = f"{arrow} %{(change or 0):.2f} {emoji}"
+        bot.send_message(message.chat.id, _price_text(symbol, price, change), parse_mode="HTML")
+
+def _register_async(bot):
+    """Async runtime: handler event loop'ta çalışır, ağ beklemesi diğer istekleri durdurmaz."""
+    from services import async_market
+    aio = bot.aio
+
+    @bot.message_handler(commands=["fiyat", "price"])
+    async def cmd_price(message):
+        parts = _split_command(message.text)
+        if len(parts) < 2:
+            await aio.reply_to(message, "Kullanım: /fiyat <coin>\nÖrn: /fiyat btc")
+            return
+
+        coin = parts[1]
+        # sembol haritası saatte bir ağdan yenilenir → executor'da
+        symbol = await bot.run_blocking(to_binance_symbol, coin)
+        if not symbol:
+            await aio.reply_to(message, f"❌ '{coin.upper()}' bulunamadı!")
+            return
+        record_price(symbol)
+
+        await aio.send_chat_action(message.chat.id, "typing")
+        ent = peek_price(symbol)
+        if ent is None:
+            # cache/snapshot'ta yok: beklemek yerine doğrudan çek
+            data = await async_market.ticker_24h(symbol)
+            ent = peek_price(symbol) if data else None
+
+        if ent is None:
+            await aio.reply_to(message, "⚠️ Şu an fiyat erişilemedi, lütfen tekrar dener misin?")
+            return
 
-        text = (
-            f"💸 <b>{symbol}</b>\n\n"
-            f"Fiyat: <b>{_pretty_price(price)}</b>\n"
-            f"24s: {ch_txt}"
-        )
-        bot.send_message(message.chat.id, text, parse_mode="HTML")
+        await aio.send_message(message.chat.id, _price_text(symbol, ent["price"], ent["change"]), parse_mode="HTML")
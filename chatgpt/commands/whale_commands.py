@@ -8,6 +8,8 @@ import time
 from datetime import datetime, timedelta
 from telebot import types
 
+from services.market import start as market_start, get_ticker
+
 # Whale Alert benzeri takip
 class WhaleTracker:
     def __init__(self):
@@ -62,13 +64,10 @@ class WhaleTracker:
                 }
             }
             
-            # Binance cüzdan istatistikleri
-            url = "https://api.binance.com/api/v3/ticker/24hr"
-            params = {"symbol": "BTCUSDT"}
-            response = requests.get(url, params=params, timeout=10)
+            # Binance 24s istatistikleri (ortak snapshot'tan)
+            data = get_ticker("BTCUSDT")
             
-            if response.status_code == 200:
-                data = response.json()
+            if data:
                 volume = float(data['volume'])
                 quote_volume = float(data['quoteVolume'])
                 
@@ -93,6 +92,7 @@ whale_tracker = WhaleTracker()
 
 def register_whale_commands(bot):
     """Whale komutlarını kaydet"""
+    market_start()  # ortak ticker snapshot'ı ayakta
     
     @bot.message_handler(commands=['whale', 'balina'])
     def whale_command(message):
@@ -20,9 +20,10 @@ YAHOO_FINANCE_BASE_URL = "https://query1.finance.yahoo.com/v8/finance"
 # BOT AYARLARI
 # =============================================================================
 # Alarm ayarları
-ALARM_CHECK_INTERVAL = 30  # Saniye (60 = 1 dakika)
-MAX_ALARMS_PER_USER = 10   # Kullanıcı başına maksimum alarm
+ALARM_CHECK_INTERVAL = 30  # Saniye; alarmlar her fiyat tick'inde değerlendirilir, bu sadece yedek yoklama
+MAX_ALARMS_PER_USER = 50   # Kullanıcı başına maksimum alarm
 PRICE_TOLERANCE = 0.001    # Fiyat toleransı (%0.001)
+ALARM_STORE = "journal"    # "journal" (alarms.json + alarms.journal) veya "sqlite" (alarms.db)
 
 # Analiz – "Basitçe" metninde seviyeleri biraz yakınlaştırma oranı
 # 0.003 = %0.3 (direnç biraz aşağı, destek biraz yukarı gösterilir)
@@ -32,12 +33,91 @@ SIMPLE_TEXT_LEVEL_OFFSET = 0.003
 CHART_WIDTH = 18
 CHART_HEIGHT = 10
 CHART_DPI = 200
+LIQUIDITY_CACHE_TTL = 60   # /likidite sonucu (symbol, timeframe, lookback) başına saniye
+
+# Grafik render havuzu (services/render_service)
+RENDER_WORKERS = 2         # Render süreci sayısı (0 = handler thread'inde çiz)
+RENDER_QUEUE_SIZE = 8      # Aynı anda kabul edilen render işi
+RENDER_QUEUE_WAIT = 10     # Kuyruk doluysa yer için bekleme (saniye)
+RENDER_TIMEOUT = 60        # Tek render için üst süre (saniye)
+
+# Grafik cache (services/chart_cache) - anahtar: sembol/timeframe/grafik tipi/son mum close_time
+CHART_CACHE_MAX_BYTES = 64 * 1024 * 1024        # Bellekteki PNG'ler (LRU)
+CHART_CACHE_DIR = None                          # Örn. "data/chart_cache" → taşan PNG'ler diske
+CHART_CACHE_DISK_MAX_BYTES = 512 * 1024 * 1024  # Disk payı
 
 # API timeout'ları
 API_TIMEOUT = 15  # Saniye
 BINANCE_TIMEOUT = 10
 COINGECKO_TIMEOUT = 10
 
+# Kline store (utils/binance_api) - kapanmış mumlar saklanır, sadece yeni mumlar indirilir
+KLINE_STORE_MAX_SERIES = 1500 # Bellekte tutulan (sembol, interval) mum serisi (LRU); /tara her interval için ~400
+
+# Detaylı analiz (commands/analysis_commands)
+ANALYSIS_FETCH_WORKERS = 8    # Eşzamanlı veri isteği (timeframe'ler, F&G, 24h)
+
+# Piyasa taraması (/tara, services/universe_scanner) - tüm USDT pariteleri
+SCAN_FETCH_WORKERS = 16       # Eşzamanlı kline isteği (Binance ağırlık limiti için sınırlı)
+SCAN_KLINE_LIMIT = 200        # Parite başına mum (daha az mumu olan yeni listelemeler atlanır)
+SCAN_CACHE_TTL = 120          # Interval başına tarama sonucu (saniye)
+SCAN_VOLUME_SPIKE = 3.0       # "Hacim patlaması" listesi: son mum hacmi / 20 mum ortalaması
+SCAN_TOP_N = 5                # Kategori başına listelenen parite
+
+# Watchlist (services/watchlist): POPULAR_COINS için /analiz sonuçları ve grafikleri önceden hazır
+WATCHLIST_ENABLED = True
+WATCHLIST_TIMEFRAMES = ("1h", "4h", "1d", "1w")  # + detaylı analiz
+WATCHLIST_TICK = 10           # Kapanan mum kontrolü (saniye)
+WATCHLIST_MAX_AGE = 300       # Mum kapanmasa da bu kadar saniyede bir yenile (fiyat satırı bayatlamasın)
+WATCHLIST_WORKERS = 2         # Aynı anda yenilenen analiz
+
+# Telegram Bot API adresi (None = resmi sunucu). Yerel test sunucusu için örn:
+# "http://127.0.0.1:8081/bot{0}/{1}"
+TELEGRAM_API_URL = None
+
+# Bot çalışma modu: "threaded" (TeleBot.infinity_polling) ya da "async"
+# (AsyncTeleBot + aiohttp; senkron handler'lar executor'da, port edilmişler coroutine)
+BOT_RUNTIME = "threaded"
+ASYNC_HANDLER_WORKERS = 16   # async modda senkron handler'ları çalıştıran thread sayısı
+
+# Update alma yöntemi: "polling" (getUpdates) ya da "webhook" (services/webhook_server)
+BOT_UPDATE_MODE = "polling"
+WEBHOOK_HOST = "127.0.0.1"  # Reverse proxy arkasında; doğrudan dışa açmak için "0.0.0.0" (secret ile)
+WEBHOOK_PORT = 8443
+WEBHOOK_PATH = "/telegram"
+WEBHOOK_URL = None          # Telegram'a kaydedilecek genel adres, örn. "https://bot.example.com/telegram"
+WEBHOOK_SECRET = None       # X-Telegram-Bot-Api-Secret-Token (None: WEBHOOK_URL varsa rastgele üretilir,
+                            # yoksa doğrulama yok → sadece yerel test)
+WEBHOOK_WORKERS = 8         # Update işleyen thread sayısı
+WEBHOOK_QUEUE_SIZE = 1000   # Dolarsa 503 döner, Telegram tekrar dener
+
+# Handler zamanlayıcı (services/handler_scheduler): sınıf başına ayrı kuyruk ve worker
+HANDLER_SCHEDULER_ENABLED = True
+HANDLER_WORKERS = {"instant": 4, "network": 8, "render": 3}
+HANDLER_CHAT_QUEUE_LIMIT = {"instant": 10, "network": 5, "render": 2}   # sohbet başına bekleyen + çalışan iş
+# Komut adları; "_" ile bitenler callback_data önekidir
+HANDLER_RENDER_COMMANDS = ("analiz", "likidite", "tf_")
+HANDLER_NETWORK_COMMANDS = (
+    "fiyat", "price", "korku", "whale", "balina", "flow", "moneyflow", "paraakisi",
+    "social", "sosyal", "trend", "start", "whale_", "flow_", "social_", "score_",
+    "tara", "scan",   # soğuk tarama ~400 kline isteği bekler; instant worker'ları tutmasın
+)
+
+# Haber dağıtımı (kanal postu → abonelere forward)
+NEWS_FANOUT_WORKERS = 8    # Paralel gönderim thread'i
+NEWS_GLOBAL_RATE = 25      # Saniyede toplam mesaj (Telegram limiti ~30/sn)
+NEWS_USER_RATE = 1.0       # Özel sohbet başına saniyede mesaj
+NEWS_GROUP_RATE = 20 / 60  # Grup başına saniyede mesaj (20/dk)
+
+# Ortak 24s ticker snapshot'ı (services/market) kaç saniyede bir yenilensin
+# Tüm semboller tek istekte iner; /flow, /whale, /fiyat hepsi buradan okur
+TICKER_SNAPSHOT_INTERVAL = 10
+
+# Binance miniTicker WebSocket akışı (opsiyonel, websocket-client gerekir)
+# True: fiyat cache'i akıştan canlı beslenir, /fiyat ağ beklemez
+MARKET_STREAM_ENABLED = False
+BINANCE_WS_URL = "wss://stream.binance.com:9443/ws/!miniTicker@arr"
+
 # =============================================================================
 # HABER SİSTEMİ KANAL AYARLARI
 # =============================================================================
@@ -18,7 +18,8 @@ import requests
 # CONFIG
 # ==========================
 try:
-    from config import TELEGRAM_TOKEN, COINGECKO_BASE_URL, COINGECKO_TIMEOUT, DEBUG_MODE
+    from config import TELEGRAM_TOKEN, COINGECKO_BASE_URL, COINGECKO_TIMEOUT, DEBUG_MODE, TELEGRAM_API_URL, BOT_RUNTIME
+    from config import BOT_UPDATE_MODE, HANDLER_SCHEDULER_ENABLED
 except ImportError:
     print("❌ config.py bulunamadı!")
     sys.exit(1)
@@ -79,23 +80,47 @@ atexit.register(_remove_lock)
 ensure_single_instance()
 
 # ==========================
-# BOT
+# Render havuzu: arka plan thread'leri (async event loop dahil) başlamadan önce fork edilmeli
 # ==========================
-bot = telebot.TeleBot(TELEGRAM_TOKEN, parse_mode="HTML")
-
 try:
-    print("🔧 Webhook temizleniyor…")
-    bot.remove_webhook()
-    time.sleep(1)
+    from services.render_service import start as render_start, get_render_stats
+    render_start()
 except Exception as e:
-    print("⚠️ remove_webhook:", e)
+    print("❌ render_service:", e)
+    get_render_stats = lambda: {}
+
+# ==========================
+# BOT
+# ==========================
+if TELEGRAM_API_URL:
+    telebot.apihelper.API_URL = TELEGRAM_API_URL   # yerel/sahte Bot API sunucusu
+if BOT_RUNTIME == "async":
+    from services.async_runtime import AsyncBotAdapter
+    bot = AsyncBotAdapter(TELEGRAM_TOKEN, parse_mode="HTML")
+    print("⚡ Async runtime (AsyncTeleBot + aiohttp)")
+else:
+    # webhook modunda update'leri webhook worker'ları doğrudan işler (TeleBot'un iç havuzu yerine)
+    bot = telebot.TeleBot(TELEGRAM_TOKEN, parse_mode="HTML", threaded=BOT_UPDATE_MODE != "webhook")
+
+# Handler'lar maliyet sınıfına göre ayrı kuyruklarda (kayıtlardan önce kurulmalı)
+from services.handler_scheduler import install as install_scheduler, get_scheduler_stats
+if HANDLER_SCHEDULER_ENABLED:
+    install_scheduler(bot)
+
+if BOT_UPDATE_MODE != "webhook":
+    try:
+        print("🔧 Webhook temizleniyor…")
+        bot.remove_webhook()
+        time.sleep(1)
+    except Exception as e:
+        print("⚠️ remove_webhook:", e)
 
 # ==========================
 # Komut modülleri
 # ==========================
 try:
     from commands.price_commands import register_price_commands
-    from commands.alarm_commands import register_alarm_commands, price_alarms
+    from commands.alarm_commands import register_alarm_commands, price_alarms, get_alarm_stats
     from commands.analysis_commands import register_analysis_commands
     from commands.fng_commands import register_fng_commands
     from commands.whale_commands import register_whale_commands
@@ -113,6 +138,10 @@ except Exception as e:
     print("❌ Komut paketleri import hatası:", e)
     sys.exit(1)
 
+from services.chart_cache import get_chart_cache_stats
+from services.webhook_server import get_webhook_stats
+from services.watchlist import get_watchlist_stats
+
 # Kayıt
 try: register_price_commands(bot);      print("💰 price_commands ✓")
 except Exception as e: print("❌ price_commands:", e)
@@ -251,6 +280,8 @@ def callback_show_help(call):
 • <code>/analiz eth</code> - Ethereum teknik analizi
 ➜ Zaman dilimi seçin (1h, 4h, 1d, 1w)
 ➜ RSI, MACD, Bollinger Bands dahil
+• <code>/tara 4h</code> - Tüm USDT paritelerini tara
+➜ Aşırı satım/alım, hacim patlaması, MACD kesişimi
 
 <b>💧 Likidite Haritası:</b>
 • <code>/likidite btc</code> - Bitcoin likidite
@@ -312,6 +343,8 @@ def send_help(message):
 • <code>/analiz eth</code> - Ethereum teknik analizi
 ➜ Zaman dilimi seçin (1h, 4h, 1d, 1w)
 ➜ RSI, MACD, Bollinger Bands dahil
+• <code>/tara 4h</code> - Tüm USDT paritelerini tara
+➜ Aşırı satım/alım, hacim patlaması, MACD kesişimi
 
 <b>💧 Likidite Haritası:</b>
 • <code>/likidite btc</code> - Bitcoin likidite
@@ -363,6 +396,26 @@ def send_stats(message):
     
     try:
         news_stats = get_news_stats()
+        alarm_stats = get_alarm_stats()
+        p95 = alarm_stats.get('latency_p95_ms')
+        fan = news_stats.get('fanout', {})
+        rs = get_render_stats()
+        cs = get_chart_cache_stats()
+        wh = get_webhook_stats()
+        hs = get_scheduler_stats()
+        wl = get_watchlist_stats()
+        hs_line = "".join(
+            f"• Kuyruk {cls}: {q['queued']} bekliyor, p95 bekleme {q['wait_p95_ms'] if q['wait_p95_ms'] is not None else '-'} ms, {q['dropped']} reddedildi\n"
+            for cls, q in hs.items()
+        )
+        wh_line = (f"• Webhook: {wh.get('received', 0)} alındı, {wh.get('queued', 0)} kuyrukta, "
+                   f"{wh.get('dropped', 0)} düşürüldü, {wh.get('rejected', 0)} reddedildi\n") if wh else ""
+        wl_rate = f"%{wl['hit_rate'] * 100:.0f}" if wl['hit_rate'] is not None else "-"
+        wl_cold = ", ".join(s.replace("USDT", "") for s, _ in wl['top_cold']) or "-"
+        wl_rsi = lambda rows: ", ".join(f"{s.replace('USDT', '')} {tf} ({r:.0f})" for s, tf, r in rows[:6]) or "-"
+        wl_line = (f"• Watchlist: {wl['ready']}/{wl['slots']} hazır, isabet {wl_rate}, "
+                   f"en çok ıskalanan: {wl_cold}\n"
+                   f"• RSI (kapanmış mum): &lt;30 {wl_rsi(wl['oversold'])} · &gt;70 {wl_rsi(wl['overbought'])}\n")
         
         stats_text = f"""
 📊 <b>BOT İSTATİSTİKLERİ</b>
@@ -374,15 +427,21 @@ def send_stats(message):
 ⏰ <b>Alarmlar:</b>
 • Toplam alarm: {sum(len(alarms) for alarms in price_alarms.values())}
 • Kullanıcı sayısı: {len(price_alarms)}
+• Tetikleme gecikmesi (p95): {f"{p95:.0f} ms" if p95 is not None else "-"}
 
 🤖 <b>Sistem:</b>
-• Bot versiyonu: 2.0
+• Render: {rs.get('rendered', 0)} grafik, ort. {rs.get('avg_render_ms', '-')} ms, {rs.get('rejected', 0)} reddedildi
+• Grafik cache: {cs.get('file_id_hits', 0)} file_id, {cs.get('memory_hits', 0) + cs.get('disk_hits', 0)} PNG isabet, {cs.get('misses', 0)} render
+{wh_line}{hs_line}{wl_line}• Bot versiyonu: 2.0
 • Uptime: Aktif
 • Son güncelleme: {datetime.now().strftime('%d.%m.%Y %H:%M')}
 
 📰 <b>Haber Sistemi:</b>
 • Kanal: @primecrypto_tr
 • Durum: ✅ Aktif
+• Dağıtım: {fan.get('sent', 0)} gönderildi, {fan.get('queue_depth', fan.get('queued', 0))} kuyrukta, {fan.get('pruned', 0)} düşürüldü
+• Boşaltma hızı: {fan.get('drain_rate', 0)} msj/sn (son 1 dk)
+• Son post: {fan.get('last_post_rate', '-')} msj/sn
 """
         
         bot.send_message(message.chat.id, stats_text, parse_mode="HTML")
@@ -444,6 +503,18 @@ def habertest(message):
 # ==========================
 print("✅ Bot başlatılıyor...")
 
+ALLOWED_UPDATES = [
+    "message",
+    "callback_query",
+    "channel_post",
+    "my_chat_member"
+]
+
+if BOT_UPDATE_MODE == "webhook":
+    from services.webhook_server import WebhookServer
+    WebhookServer(bot).serve_forever(allowed_updates=ALLOWED_UPDATES)
+    sys.exit(0)
+
 delay = 2
 while True:
     try:
@@ -451,12 +522,7 @@ while True:
             skip_pending=True,
             long_polling_timeout=10,
             timeout=20,
-            allowed_updates=[
-                "message",
-                "callback_query",
-                "channel_post",
-                "my_chat_member"
-            ],
+            allowed_updates=ALLOWED_UPDATES,
         )
     except Exception as e:
         print(f"❌ Polling hata: {e}. {delay}s sonra tekrar…")
@@ -0,0 +1,155 @@
+"""
+services/alarm_engine.py
+- Fiyat indeksli alarm motoru
+- Her sembol için iki sıralı defter: "up" ve "down" eşikleri (PRICE_TOLERANCE uygulanmış)
+- Yeni fiyat geldiğinde tetiklenen tüm alarmlar tek bisect ile bulunur
+"""
+
+from __future__ import annotations
+import threading
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Tuple
+
+Alarm = Dict[str, Any]
+Fired = Tuple[int, Alarm]   # (user_id, alarm)
+
+
+class _SymbolBook:
+    """Tek sembolün eşik defterleri. keys sıralı, items aynı sırada (user_id, alarm)."""
+    __slots__ = ("up_keys", "up_items", "down_keys", "down_items")
+
+    def __init__(self):
+        self.up_keys: List[float] = []
+        self.up_items: List[Fired] = []
+        self.down_keys: List[float] = []
+        self.down_items: List[Fired] = []
+
+    def __len__(self) -> int:
+        return len(self.up_keys) + len(self.down_keys)
+
+
+class AlarmEngine:
+    def __init__(self, tolerance: float):
+        self.tolerance = float(tolerance)
+        self._lock = threading.Lock()
+        self._books: Dict[str, _SymbolBook] = {}
+        self._count = 0
+
+    # -------------------- eşikler --------------------
+    def _threshold(self, alarm: Alarm) -> Tuple[str, float]:
+        target = float(alarm["target"])
+        if alarm.get("direction", "up") == "up":
+            # fiyat >= hedef*(1-tol) olunca tetiklenir
+            return "up", target * (1 - self.tolerance)
+        # fiyat <= hedef*(1+tol) olunca tetiklenir
+        return "down", target * (1 + self.tolerance)
+
+    def _sides(self, book: _SymbolBook, side: str):
+        return (book.up_keys, book.up_items) if side == "up" else (book.down_keys, book.down_items)
+
+    # -------------------- kayıt --------------------
+    def add(self, user_id: int, alarm: Alarm) -> None:
+        symbol = alarm.get("symbol")
+        if not symbol:
+            return
+        side, thr = self._threshold(alarm)
+        with self._lock:
+            book = self._books.get(symbol)
+            if book is None:
+                book = self._books[symbol] = _SymbolBook()
+            keys, items = self._sides(book, side)
+            i = bisect_right(keys, thr)
+            keys.insert(i, thr)
+            items.insert(i, (user_id, alarm))
+            self._count += 1
+
+    def remove(self, user_id: int, alarm: Alarm) -> bool:
+        """Alarmı defterden çıkar (dict kimliğiyle eşleşir)."""
+        symbol = alarm.get("symbol")
+        side, thr = self._threshold(alarm)
+        with self._lock:
+            book = self._books.get(symbol)
+            if book is None:
+                return False
+            keys, items = self._sides(book, side)
+            i = bisect_left(keys, thr)
+            while i < len(keys) and keys[i] == thr:
+                if items[i][1] is alarm:
+                    del keys[i]
+                    del items[i]
+                    self._count -= 1
+                    if not book:
+                        del self._books[symbol]
+                    return True
+                i += 1
+        return False
+
+    def remove_user(self, user_id: int, alarms: List[Alarm]) -> None:
+        for a in alarms:
+            self.remove(user_id, a)
+
+    def rebuild(self, price_alarms: Dict[int, List[Alarm]]) -> None:
+        """Defterleri kullanıcı → alarm listesi sözlüğünden baştan kur."""
+        books: Dict[str, _SymbolBook] = {}
+        count = 0
+        for uid, alarms in price_alarms.items():
+            for a in alarms:
+                symbol = a.get("symbol")
+                if not symbol:
+                    continue
+                side, thr = self._threshold(a)
+                book = books.setdefault(symbol, _SymbolBook())
+                keys, items = self._sides(book, side)
+                keys.append(thr)
+                items.append((uid, a))
+                count += 1
+        for book in books.values():
+            for keys, items in ((book.up_keys, book.up_items), (book.down_keys, book.down_items)):
+                order = sorted(range(len(keys)), key=keys.__getitem__)
+                keys[:] = [keys[i] for i in order]
+                items[:] = [items[i] for i in order]
+        with self._lock:
+            self._books = books
+            self._count = count
+
+    # -------------------- değerlendirme --------------------
+    def has_symbol(self, symbol: str) -> bool:
+        return symbol in self._books
+
+    def symbols(self) -> List[str]:
+        """Alarmı olan farklı semboller (fiyat sembol başına bir kez çekilir)."""
+        with self._lock:
+            return list(self._books)
+
+    def check(self, symbol: str, price: float) -> List[Fired]:
+        """`price` ile geçilen tüm alarmları defterden çıkarıp döndür."""
+        return self.check_range(symbol, price, price)
+
+    def check_range(self, symbol: str, low: float, high: float) -> List[Fired]:
+        """
+        Son değerlendirmeden beri görülen [low, high] aralığıyla geçilen alarmlar.
+        "up" defteri high ile, "down" defteri low ile karşılaştırılır; ani iğneler kaçmaz.
+        """
+        with self._lock:
+            book = self._books.get(symbol)
+            if book is None:
+                return []
+            # up: eşik <= en yüksek fiyat olanlar soldaki önek
+            i = bisect_right(book.up_keys, high)
+            fired = book.up_items[:i]
+            if i:
+                del book.up_keys[:i]
+                del book.up_items[:i]
+            # down: eşik >= en düşük fiyat olanlar sağdaki sonek
+            j = bisect_left(book.down_keys, low)
+            if j < len(book.down_keys):
+                fired.extend(book.down_items[j:])
+                del book.down_keys[j:]
+                del book.down_items[j:]
+            self._count -= len(fired)
+            if not book:
+                del self._books[symbol]
+            return fired
+
+    def __len__(self) -> int:
+        return self._count
@@ -0,0 +1,270 @@
+"""
+services/alarm_store.py
+- Alarm kalıcılığı: her değişiklik O(1) yazım (tüm dosyayı yeniden yazmak yok)
+- JournalAlarmStore: alarms.json snapshot + append-only alarms.journal, periyodik sıkıştırma
+- SqliteAlarmStore: WAL modunda SQLite; ilk açılışta eski alarms.json içe aktarılır
+- Her alarmın kalıcı bir "id" alanı vardır (silme/tetikleme kaydı için)
+"""
+
+from __future__ import annotations
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Tuple
+
+Alarm = Dict[str, Any]
+AlarmMap = Dict[int, List[Alarm]]
+
+
+def new_alarm_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def ensure_ids(price_alarms: AlarmMap) -> bool:
+    """id'si olmayan (eski) alarmlara id ver. Değişiklik olduysa True."""
+    changed = False
+    for alarms in price_alarms.values():
+        for a in alarms:
+            if not a.get("id"):
+                a["id"] = new_alarm_id()
+                changed = True
+    return changed
+
+
+def _read_legacy(path: str) -> AlarmMap:
+    """Eski tam-dosya formatı: {"<uid>": [alarm, ...]}"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    return {int(k): list(v) for k, v in data.items()}
+
+
+def _atomic_write_json(path: str, data) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class AlarmStore:
+    """Arayüz + hiçbir şey yazmayan varsayılan (testler/benchmark için)."""
+
+    def load(self) -> AlarmMap:
+        return {}
+
+    def add(self, user_id: int, alarm: Alarm) -> None:
+        pass
+
+    def remove_many(self, items: Iterable[Tuple[int, str]]) -> None:
+        """(user_id, alarm_id) çiftlerini tek seferde sil."""
+        pass
+
+    def remove_user(self, user_id: int) -> None:
+        pass
+
+    def rewrite(self, price_alarms: AlarmMap) -> None:
+        """Tüm durumu baştan yaz (sadece migrasyonda)."""
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+# ==================== Journal ====================
+class JournalAlarmStore(AlarmStore):
+    """
+    Snapshot (alarms.json, eski formatla aynı) + satır başına bir JSON işlem:
+      {"op": "add", "uid": .., "alarm": {..}} | {"op": "del", "uid": .., "id": ..} | {"op": "clear", "uid": ..}
+    Yükleme = snapshot + journal'ı yeniden oynat. Yarım kalmış son satır (çökme) atlanır.
+    İşlemler id'ye göre idempotent; sıkıştırma yarıda kesilse de tekrar oynatmak güvenli.
+    """
+
+    def __init__(self, path: str = "alarms.json", journal_path: str = None, compact_every: int = 500):
+        self.path = path
+        self.journal_path = journal_path or os.path.splitext(path)[0] + ".journal"
+        self.compact_every = compact_every
+        self._lock = threading.Lock()
+        self._journal = None
+        self._ops = 0
+
+    def _replay(self) -> AlarmMap:
+        state: Dict[int, Dict[Any, Alarm]] = {}
+        for uid, alarms in _read_legacy(self.path).items():
+            book = state.setdefault(uid, {})
+            for i, a in enumerate(alarms):
+                book[a.get("id") or ("#", i)] = a
+        self._ops = 0
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                        uid = int(rec["uid"])
+                        op = rec["op"]
+                        if op == "add":
+                            state.setdefault(uid, {})[rec["alarm"]["id"]] = rec["alarm"]
+                        elif op == "del":
+                            state.get(uid, {}).pop(rec["id"], None)
+                        elif op == "clear":
+                            state.pop(uid, None)
+                    except (ValueError, KeyError, TypeError):
+                        continue   # yarım ya da bozuk satır; diğer kayıtlar yüklenmeye devam eder
+                    self._ops += 1
+        except FileNotFoundError:
+            pass
+        return {uid: list(book.values()) for uid, book in state.items() if book}
+
+    def _truncate_partial_tail(self) -> None:
+        """Çökmeden kalan yarım son satırı kes; yoksa yeni kayıt ona yapışıp kaybolur."""
+        try:
+            with open(self.journal_path, "rb+") as f:
+                data = f.read()
+                if data and not data.endswith(b"\n"):
+                    f.truncate(data.rfind(b"\n") + 1)
+        except FileNotFoundError:
+            pass
+
+    def _open_journal(self):
+        if self._journal is None:
+            self._truncate_partial_tail()
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+        return self._journal
+
+    def _append(self, records: List[dict]) -> None:
+        if not records:
+            return
+        with self._lock:
+            f = self._open_journal()
+            f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records))
+            f.flush()
+            os.fsync(f.fileno())   # onaylanan alarm çökmede kaybolmasın (çağrı başına tek fsync)
+            self._ops += len(records)
+            if self._ops >= self.compact_every:
+                self._compact_locked()
+
+    def _compact_locked(self, state: AlarmMap = None) -> None:
+        """Snapshot'ı atomik yaz, sonra journal'ı boşalt."""
+        if state is None:
+            state = self._replay()
+        _atomic_write_json(self.path, {str(uid): alarms for uid, alarms in state.items()})
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        open(self.journal_path, "w").close()
+        self._ops = 0
+
+    def load(self) -> AlarmMap:
+        with self._lock:
+            return self._replay()
+
+    def add(self, user_id: int, alarm: Alarm) -> None:
+        self._append([{"op": "add", "uid": user_id, "alarm": alarm}])
+
+    def remove_many(self, items: Iterable[Tuple[int, str]]) -> None:
+        self._append([{"op": "del", "uid": uid, "id": aid} for uid, aid in items])
+
+    def remove_user(self, user_id: int) -> None:
+        self._append([{"op": "clear", "uid": user_id}])
+
+    def rewrite(self, price_alarms: AlarmMap) -> None:
+        with self._lock:
+            self._compact_locked(price_alarms)
+
+    def compact(self) -> None:
+        with self._lock:
+            self._compact_locked()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+
+# ==================== SQLite ====================
+class SqliteAlarmStore(AlarmStore):
+    """WAL modunda tek tablo. Eski alarms.json ilk açılışta bir kez içe aktarılır."""
+
+    def __init__(self, path: str = "alarms.db", legacy_path: str = "alarms.json"):
+        self.path = path
+        self.legacy_path = legacy_path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS alarms ("
+            " id TEXT PRIMARY KEY, uid INTEGER NOT NULL, data TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS alarms_uid ON alarms(uid)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def _import_legacy_locked(self) -> None:
+        if self._db.execute("SELECT 1 FROM meta WHERE key='legacy_imported'").fetchone():
+            return
+        data = _read_legacy(self.legacy_path)
+        ensure_ids(data)
+        self._rewrite_locked(data)
+        self._db.execute("INSERT OR REPLACE INTO meta VALUES ('legacy_imported', ?)", (str(time.time()),))
+        if data:
+            print(f"📦 {self.legacy_path} SQLite'a aktarıldı ({sum(len(v) for v in data.values())} alarm)")
+
+    def _rewrite_locked(self, price_alarms: AlarmMap) -> None:
+        now = time.time()
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.execute("DELETE FROM alarms")
+            self._db.executemany(
+                "INSERT OR REPLACE INTO alarms (id, uid, data, created) VALUES (?, ?, ?, ?)",
+                [(a["id"], uid, json.dumps(a, ensure_ascii=False), now)
+                 for uid, alarms in price_alarms.items() for a in alarms],
+            )
+
+    def load(self) -> AlarmMap:
+        with self._lock:
+            self._import_legacy_locked()
+            out: AlarmMap = {}
+            for uid, data in self._db.execute("SELECT uid, data FROM alarms ORDER BY rowid"):
+                out.setdefault(int(uid), []).append(json.loads(data))
+            return out
+
+    def add(self, user_id: int, alarm: Alarm) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO alarms (id, uid, data, created) VALUES (?, ?, ?, ?)",
+                (alarm["id"], user_id, json.dumps(alarm, ensure_ascii=False), time.time()),
+            )
+
+    def remove_many(self, items: Iterable[Tuple[int, str]]) -> None:
+        ids = [(aid,) for _, aid in items]
+        if not ids:
+            return
+        with self._lock, self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany("DELETE FROM alarms WHERE id = ?", ids)
+
+    def remove_user(self, user_id: int) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM alarms WHERE uid = ?", (user_id,))
+
+    def rewrite(self, price_alarms: AlarmMap) -> None:
+        with self._lock:
+            self._rewrite_locked(price_alarms)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def open_store(kind: str = "journal", path: str = "alarms.json") -> AlarmStore:
+    """config.ALARM_STORE değerine göre store oluştur ("journal" | "sqlite")."""
+    if kind == "sqlite":
+        return SqliteAlarmStore(os.path.splitext(path)[0] + ".db", legacy_path=path)
+    return JournalAlarmStore(path)
@@ -0,0 +1,79 @@
+"""
+services/async_market.py
+- Async çalışma modu için aiohttp tabanlı Binance istemcisi (tek paylaşılan ClientSession)
+- Dönüşler senkron taraftakiyle aynı biçimde: 24h ticker sözlüğü, (N, 12) kline dizisi
+- Çekilen fiyatlar services/market cache'ine de yazılır
+"""
+
+from __future__ import annotations
+import asyncio
+import json
+from typing import Dict, Optional
+
+import aiohttp
+import numpy as np
+
+from config import BINANCE_TIMEOUT
+from services.market import cache_price
+from utils.binance_api import (
+    KLINES_URL, TICKER_24H_URL, KLINE_MAX_ROWS, _decode_klines_payload, _parse_klines,
+)
+
+_session: Optional[aiohttp.ClientSession] = None
+
+
+def _get_session() -> aiohttp.ClientSession:
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=BINANCE_TIMEOUT),
+            headers={"User-Agent": "PrimeCryptoBot/1.0"},
+        )
+    return _session
+
+
+async def _get(url: str, params: dict) -> Optional[bytes]:
+    try:
+        async with _get_session().get(url, params=params) as resp:
+            if resp.status != 200:
+                print(f"⚠️ Binance async HTTP {resp.status}: {url}")
+                return None
+            return await resp.read()
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(f"⚠️ Binance async istek hatası: {e}")
+        return None
+
+
+async def ticker_24h(symbol: str) -> Optional[Dict]:
+    """Tek sembolün /ticker/24hr kaydı (fiyat cache'i de güncellenir)."""
+    raw = await _get(TICKER_24H_URL, {"symbol": symbol.upper()})
+    if raw is None:
+        return None
+    try:
+        data = json.loads(raw)
+        cache_price(symbol.upper(), float(data["lastPrice"]), float(data.get("priceChangePercent", 0.0)))
+    except (KeyError, TypeError, ValueError):
+        return None
+    return data
+
+
+async def klines(symbol: str, interval: str = "1h", limit: int = 200) -> Optional[np.ndarray]:
+    """Kline'lar (N, 12) float64 olarak (utils/binance_api KLINE_COLS sırası)."""
+    raw = await _get(KLINES_URL, {"symbol": symbol.upper(), "interval": interval,
+                                  "limit": min(limit, KLINE_MAX_ROWS)})
+    if raw is None:
+        return None
+    arr = _decode_klines_payload(raw)
+    if arr is None:
+        try:
+            arr = _parse_klines(json.loads(raw))
+        except (TypeError, ValueError):
+            return None
+    return arr if len(arr) else None
+
+
+async def close() -> None:
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
@@ -0,0 +1,125 @@
+"""
+services/async_runtime.py
+- BOT_RUNTIME = "async" için AsyncTeleBot (asyncio + aiohttp) üzerinde çalışan bot adaptörü
+- register_*_commands(bot) yapısı aynen kalır:
+  senkron handler'lar executor thread'lerinde, coroutine handler'lar doğrudan event loop'ta çalışır
+  → yavaş bir /analiz diğer kullanıcıların /fiyat'ını bekletmez, modüller tek tek port edilebilir
+- Thread'lerden (alarm monitörü, haber fan-out, senkron handler'lar) yapılan bot.send_message
+  gibi çağrılar event loop'a aktarılır ve sonucu beklenir
+- Port edilmiş handler'lar: await bot.aio.send_message(...), await bot.run_blocking(fn, ...)
+- Event loop thread'i ilk kullanımda açılır (render havuzunun fork'undan sonra)
+"""
+
+from __future__ import annotations
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from telebot import asyncio_helper
+from telebot.async_telebot import AsyncTeleBot
+
+from config import ASYNC_HANDLER_WORKERS, TELEGRAM_API_URL
+
+
+class AsyncBotAdapter:
+    """
+    TeleBot yerine geçer. Handler dekoratörleri (message_handler, callback_query_handler, ...)
+    ve API metodları (send_message, send_photo, ...) TeleBot ile aynı imzayla kullanılır.
+    """
+
+    is_async = True
+
+    def __init__(self, token: str, parse_mode: Optional[str] = None, workers: int = ASYNC_HANDLER_WORKERS):
+        if TELEGRAM_API_URL:
+            asyncio_helper.API_URL = TELEGRAM_API_URL   # yerel/sahte Bot API sunucusu
+        self.aio = AsyncTeleBot(token, parse_mode=parse_mode)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bot-handler")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._loop_lock = threading.Lock()
+
+    # -------------------- event loop --------------------
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def run():
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                self._loop_thread = threading.Thread(target=run, name="bot-asyncio", daemon=True)
+                self._loop_thread.start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    def call(self, coro_fn: Callable, *args, **kwargs) -> Any:
+        """Coroutine'i event loop'ta çalıştır ve (çağıran thread'de) sonucunu bekle."""
+        loop = self.loop
+        if threading.current_thread() is self._loop_thread:
+            raise RuntimeError(
+                f"{getattr(coro_fn, '__name__', coro_fn)}: event loop içinden senkron bot çağrısı; "
+                "await bot.aio.<metod>(...) kullanın"
+            )
+        return asyncio.run_coroutine_threadsafe(coro_fn(*args, **kwargs), loop).result()
+
+    async def run_blocking(self, fn: Callable, *args, **kwargs) -> Any:
+        """Port edilmiş handler'lar için: bloklayan ağ/CPU işini executor'da çalıştır."""
+        return await asyncio.get_running_loop().run_in_executor(
+            self._pool, functools.partial(fn, *args, **kwargs)
+        )
+
+    # -------------------- handler'lar --------------------
+    def _run_sync(self, fn: Callable, args: tuple) -> None:
+        try:
+            fn(*args)
+        except Exception as e:
+            print(f"❌ Handler hatası ({fn.__name__}): {e}")
+
+    def to_coroutine(self, fn: Callable) -> Callable:
+        """Senkron handler'ı executor'da çalışan coroutine'e çevir (coroutine ise aynen döner)."""
+        if asyncio.iscoroutinefunction(fn):
+            return fn
+
+        @functools.wraps(fn)
+        async def handler(*args):
+            await asyncio.get_running_loop().run_in_executor(self._pool, self._run_sync, fn, args)
+
+        return handler
+
+    def _handler_decorator(self, register: Callable) -> Callable:
+        def factory(*args, **kwargs):
+            decorate = register(*args, **kwargs)
+
+            def decorator(fn):
+                decorate(self.to_coroutine(fn))
+                return fn
+
+            return decorator
+
+        return factory
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.aio, name)
+        if name.endswith("_handler") and not name.startswith(("register_", "add_")):
+            return self._handler_decorator(attr)
+        if asyncio.iscoroutinefunction(attr):
+            return functools.partial(self.call, attr)
+        return attr
+
+    # -------------------- çalıştırma --------------------
+    def infinity_polling(self, skip_pending: bool = False, long_polling_timeout: int = 20,
+                         timeout: int = 20, allowed_updates=None, **kwargs) -> None:
+        """TeleBot.infinity_polling ile aynı imza; polling event loop'ta döner, bu thread bekler."""
+        self.call(self.aio.infinity_polling, timeout=long_polling_timeout, request_timeout=timeout,
+                  skip_pending=skip_pending, allowed_updates=allowed_updates, **kwargs)
+
+    def stop_polling(self) -> None:
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self.aio.stop_polling)
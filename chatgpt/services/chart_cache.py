@@ -0,0 +1,237 @@
+"""
+services/chart_cache.py
+- Render edilmiş grafik PNG'lerinin içerik adresli cache'i
+- Anahtar: (symbol, timeframe, grafik tipi, son mumun close_time'ı) → aynı mum içinde aynı grafik
+- Bellekte toplam byte'a göre LRU; taşan PNG'ler opsiyonel olarak diske yazılır (CHART_CACHE_DIR)
+- İlk send_photo'nun döndürdüğü Telegram file_id saklanır; tekrar isteklerde
+  render ve upload atlanır, fotoğraf file_id ile gönderilir
+- refresh(): aynı anahtarın grafiğini mum içinde yeniden çizer; eski PNG ve file_id atılır
+"""
+
+from __future__ import annotations
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from config import CHART_CACHE_MAX_BYTES, CHART_CACHE_DIR, CHART_CACHE_DISK_MAX_BYTES
+
+ChartKey = Tuple[str, str, str, int]   # (symbol, timeframe, chart_type, close_time_ms)
+
+MAX_FILE_IDS = 10000
+
+_lock = threading.Lock()
+_mem: "OrderedDict[str, bytes]" = OrderedDict()        # digest -> png
+_mem_bytes = 0
+_disk: "OrderedDict[str, int]" = OrderedDict()         # digest -> boyut
+_disk_bytes = 0
+_file_ids: "OrderedDict[str, str]" = OrderedDict()     # digest -> Telegram file_id
+_key_locks: Dict[str, threading.Lock] = {}
+_stats = {"file_id_hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0, "spilled": 0, "evicted": 0,
+          "refreshed": 0}
+
+
+def make_key(symbol: str, timeframe: str, chart_type: str, df) -> Optional[ChartKey]:
+    """DataFrame'in son mumundan anahtar üret (close_time kolonu yoksa None → cache yok)."""
+    try:
+        return (symbol.upper(), timeframe, chart_type, int(df["close_time"].iloc[-1]))
+    except Exception:
+        return None
+
+
+def _digest(key: ChartKey) -> str:
+    return hashlib.sha1("|".join(map(str, key)).encode()).hexdigest()
+
+
+def _disk_path(digest: str) -> str:
+    return os.path.join(CHART_CACHE_DIR, f"{digest}.png")
+
+
+# -------------------- bellek / disk --------------------
+def _spill_locked(digest: str, png: bytes) -> None:
+    global _disk_bytes
+    if not CHART_CACHE_DIR:
+        _stats["evicted"] += 1
+        return
+    try:
+        os.makedirs(CHART_CACHE_DIR, exist_ok=True)
+        with open(_disk_path(digest), "wb") as f:
+            f.write(png)
+    except Exception as e:
+        print(f"⚠️ chart cache diske yazılamadı: {e}")
+        return
+    _disk[digest] = len(png)
+    _disk_bytes += len(png)
+    _stats["spilled"] += 1
+    while _disk_bytes > CHART_CACHE_DISK_MAX_BYTES and _disk:
+        old, size = _disk.popitem(last=False)
+        _disk_bytes -= size
+        try:
+            os.remove(_disk_path(old))
+        except OSError:
+            pass
+
+
+def _put_locked(digest: str, png: bytes) -> None:
+    global _mem_bytes
+    if digest in _mem:
+        _mem.move_to_end(digest)
+        return
+    _mem[digest] = png
+    _mem_bytes += len(png)
+    while _mem_bytes > CHART_CACHE_MAX_BYTES and len(_mem) > 1:
+        old, old_png = _mem.popitem(last=False)
+        _mem_bytes -= len(old_png)
+        _spill_locked(old, old_png)
+
+
+def _get_locked(digest: str) -> Optional[bytes]:
+    global _disk_bytes
+    png = _mem.get(digest)
+    if png is not None:
+        _mem.move_to_end(digest)
+        _stats["memory_hits"] += 1
+        return png
+    if digest in _disk:
+        try:
+            with open(_disk_path(digest), "rb") as f:
+                png = f.read()
+        except OSError:
+            _disk_bytes -= _disk.pop(digest)
+            return None
+        _disk_bytes -= _disk.pop(digest)
+        try:
+            os.remove(_disk_path(digest))
+        except OSError:
+            pass
+        _put_locked(digest, png)     # tekrar sıcak
+        _stats["disk_hits"] += 1
+        return png
+    return None
+
+
+# -------------------- genel API --------------------
+def get_or_render(key: Optional[ChartKey], render_fn: Callable[[], Optional[bytes]]) -> Optional[bytes]:
+    """PNG'yi cache'ten ver ya da render_fn ile üret (aynı anahtar için tek render)."""
+    if key is None:
+        return render_fn()
+    digest = _digest(key)
+    with _lock:
+        png = _get_locked(digest)
+        if png is not None:
+            return png
+        key_lock = _key_locks.setdefault(digest, threading.Lock())
+    with key_lock:
+        with _lock:
+            png = _get_locked(digest)
+            if png is not None:
+                return png
+            _stats["misses"] += 1
+        png = render_fn()
+        with _lock:
+            if png:
+                _put_locked(digest, png)
+            _key_locks.pop(digest, None)
+        return png
+
+
+def refresh(key: Optional[ChartKey], render_fn: Callable[[], Optional[bytes]]) -> Optional[bytes]:
+    """
+    Cache'e bakmadan render et ve anahtarın PNG'sini değiştir (açık mum ilerledi).
+    Saklı file_id eski görüntüyü gösterdiği için düşürülür; sonraki gönderim yeni PNG'yi yükler.
+    """
+    global _mem_bytes, _disk_bytes
+    if key is None:
+        return render_fn()
+    digest = _digest(key)
+    with _lock:
+        key_lock = _key_locks.setdefault(digest, threading.Lock())
+    with key_lock:
+        png = render_fn()
+        with _lock:
+            _key_locks.pop(digest, None)
+            if not png:
+                return None
+            old = _mem.pop(digest, None)
+            if old is not None:
+                _mem_bytes -= len(old)
+            if digest in _disk:
+                _disk_bytes -= _disk.pop(digest)
+                try:
+                    os.remove(_disk_path(digest))
+                except OSError:
+                    pass
+            _file_ids.pop(digest, None)
+            _put_locked(digest, png)
+            _stats["refreshed"] += 1
+        return png
+
+
+def send_cached_photo(bot, chat_id: int, key: Optional[ChartKey],
+                      render_fn: Callable[[], Optional[bytes]], **kwargs):
+    """
+    Önce saklı file_id ile gönder; yoksa PNG'yi (cache/render) yükle ve dönen file_id'yi sakla.
+    Grafik üretilemezse None döner.
+    """
+    digest = _digest(key) if key is not None else None
+    if digest is not None:
+        with _lock:
+            file_id = _file_ids.get(digest)
+        if file_id:
+            try:
+                msg = bot.send_photo(chat_id, file_id, **kwargs)
+                with _lock:
+                    _stats["file_id_hits"] += 1
+                return msg
+            except Exception as e:
+                print(f"⚠️ file_id ile gönderilemedi, yeniden yükleniyor: {e}")
+                with _lock:
+                    _file_ids.pop(digest, None)
+
+    png = get_or_render(key, render_fn)
+    if not png:
+        return None
+    msg = bot.send_photo(chat_id, BytesIO(png), **kwargs)
+    if digest is not None:
+        try:
+            file_id = msg.photo[-1].file_id     # en büyük boyut
+        except Exception:
+            file_id = None
+        if file_id:
+            with _lock:
+                _file_ids[digest] = file_id
+                _file_ids.move_to_end(digest)
+                while len(_file_ids) > MAX_FILE_IDS:
+                    _file_ids.popitem(last=False)
+    return msg
+
+
+def _index_disk() -> None:
+    """Önceki süreçten kalan disk dosyalarını tanı (anahtarlar süreçler arası aynı)."""
+    global _disk_bytes
+    if not CHART_CACHE_DIR or not os.path.isdir(CHART_CACHE_DIR):
+        return
+    files = []
+    for name in os.listdir(CHART_CACHE_DIR):
+        if name.endswith(".png"):
+            path = os.path.join(CHART_CACHE_DIR, name)
+            try:
+                files.append((os.path.getmtime(path), name[:-4], os.path.getsize(path)))
+            except OSError:
+                pass
+    for _, digest, size in sorted(files):
+        _disk[digest] = size
+        _disk_bytes += size
+
+
+_index_disk()
+
+
+def get_chart_cache_stats() -> Dict[str, Any]:
+    with _lock:
+        out = dict(_stats)
+        out.update(memory_entries=len(_mem), memory_bytes=_mem_bytes,
+                   disk_entries=len(_disk), disk_bytes=_disk_bytes, file_ids=len(_file_ids))
+    return out
@@ -0,0 +1,199 @@
+"""
+services/handler_scheduler.py
+- Handler'ları maliyet sınıfına göre ayrı kuyruklarda çalıştırır:
+    instant → anlık metin cevapları (/start, /help, /alarm, ...)
+    network → ağ beklemeli sorgular (/fiyat, /korku, /whale, ...)
+    render  → grafik üreten komutlar (/analiz, /likidite)
+  Her sınıfın kendi worker sayısı var; /likidite yığılması /fiyat'ı bekletmez
+- Sınıf içinde sohbetler sırayla (round-robin) işlenir; bir sohbetin bekleyen iş sayısı sınırlı
+  (bekleyen + çalışan) → tek grup render worker'larını/kuyruğunu dolduramaz, fazlası kibarca reddedilir
+- Kuyrukta bekleme süreleri (p50/p95) get_scheduler_stats() ile görülür
+- install(bot) handler kayıtlarından önce çağrılır; coroutine handler'lar (async mod) sarılmaz
+"""
+
+from __future__ import annotations
+import asyncio
+import functools
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+from config import (
+    HANDLER_WORKERS, HANDLER_CHAT_QUEUE_LIMIT, HANDLER_RENDER_COMMANDS, HANDLER_NETWORK_COMMANDS,
+)
+
+INSTANT, NETWORK, RENDER = "instant", "network", "render"
+
+BUSY_TEXT = "⏳ Önceki isteklerin işleniyor, birazdan tekrar dener misin?"
+
+_WRAPPED = ("message_handler", "callback_query_handler", "channel_post_handler", "my_chat_member_handler")
+
+
+class _ClassQueue:
+    """Tek sınıfın kuyruğu: sohbet başına deque + sohbetlerin round-robin sırası."""
+
+    def __init__(self, name: str, workers: int, chat_limit: int):
+        self.name = name
+        self.workers = workers
+        self.chat_limit = chat_limit
+        self._cond = threading.Condition()
+        self._chats: Dict[Any, deque] = {}
+        self._ring: deque = deque()
+        self._inflight: Dict[Any, int] = {}          # sohbet -> bekleyen + çalışan iş
+        self._waits: deque = deque(maxlen=1000)     # saniye
+        self._stats = {"submitted": 0, "done": 0, "dropped": 0, "running": 0}
+        for i in range(workers):
+            threading.Thread(target=self._worker, name=f"handler-{name}-{i}", daemon=True).start()
+
+    def submit(self, chat_id, fn: Callable, args: tuple) -> bool:
+        with self._cond:
+            if self._inflight.get(chat_id, 0) >= self.chat_limit:
+                self._stats["dropped"] += 1
+                return False
+            self._inflight[chat_id] = self._inflight.get(chat_id, 0) + 1
+            q = self._chats.get(chat_id)
+            if q is None:
+                q = self._chats[chat_id] = deque()
+                self._ring.append(chat_id)
+            q.append((time.monotonic(), fn, args))
+            self._stats["submitted"] += 1
+            self._cond.notify()
+        return True
+
+    def _take(self):
+        with self._cond:
+            while not self._ring:
+                self._cond.wait()
+            chat_id = self._ring.popleft()
+            q = self._chats[chat_id]
+            queued_at, fn, args = q.popleft()
+            if q:
+                self._ring.append(chat_id)      # sohbetin sırası en sona
+            else:
+                del self._chats[chat_id]
+            self._waits.append(time.monotonic() - queued_at)
+            self._stats["running"] += 1
+            return chat_id, fn, args
+
+    def _worker(self) -> None:
+        while True:
+            chat_id, fn, args = self._take()
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"❌ Handler hatası ({getattr(fn, '__name__', fn)}): {e}")
+            finally:
+                with self._cond:
+                    self._stats["running"] -= 1
+                    self._stats["done"] += 1
+                    left = self._inflight.pop(chat_id) - 1
+                    if left:
+                        self._inflight[chat_id] = left
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            out = dict(self._stats)
+            out["queued"] = sum(len(q) for q in self._chats.values())
+            waits = sorted(self._waits)
+        out["workers"] = self.workers
+        out["wait_p50_ms"] = round(waits[len(waits) // 2] * 1000, 1) if waits else None
+        out["wait_p95_ms"] = round(waits[int(len(waits) * 0.95)] * 1000, 1) if waits else None
+        return out
+
+
+_queues: Dict[str, _ClassQueue] = {}
+_bot = None
+
+
+# -------------------- sınıflandırma --------------------
+def _command(text: Optional[str]) -> Optional[str]:
+    if not text or not text.startswith("/"):
+        return None
+    return text.split(maxsplit=1)[0][1:].split("@")[0].lower()
+
+
+def classify(update) -> str:
+    """Message / CallbackQuery / ChatMemberUpdated → sınıf adı"""
+    data = getattr(update, "data", None)
+    if isinstance(data, str):                    # CallbackQuery: callback_data önekine göre
+        for cls, names in ((RENDER, HANDLER_RENDER_COMMANDS), (NETWORK, HANDLER_NETWORK_COMMANDS)):
+            if any(n.endswith("_") and data.startswith(n) for n in names):
+                return cls
+        return INSTANT
+    cmd = _command(getattr(update, "text", None))
+    if cmd in HANDLER_RENDER_COMMANDS:
+        return RENDER
+    if cmd in HANDLER_NETWORK_COMMANDS:
+        return NETWORK
+    return INSTANT
+
+
+def _chat_key(update):
+    chat = getattr(update, "chat", None)
+    if chat is None:                             # CallbackQuery
+        msg = getattr(update, "message", None)
+        chat = getattr(msg, "chat", None)
+    if chat is not None:
+        return chat.id
+    user = getattr(update, "from_user", None)
+    return user.id if user is not None else None
+
+
+def _reject(update) -> None:
+    """
+    Sohbet limiti dolu: komut ve buton isteklerine kısa cevap (instant kuyruğunda).
+    Komut olmayan mesajlar (kullanıcı/grup takibi) sessizce düşer; kalabalık grup sohbetine cevap yazılmaz.
+    """
+    if isinstance(getattr(update, "data", None), str):
+        reply = functools.partial(_bot.answer_callback_query, update.id, BUSY_TEXT)
+    elif _command(getattr(update, "text", None)) is not None:
+        reply = functools.partial(_bot.reply_to, update, BUSY_TEXT)
+    else:
+        return
+    print(f"⏳ sohbet {_chat_key(update)} limiti dolu, istek reddedildi")
+    _queues[INSTANT].submit(("busy", _chat_key(update)), reply, ())
+
+
+# -------------------- kurulum --------------------
+def schedule(fn: Callable) -> Callable:
+    """Senkron handler'ı, gelen update'e göre sınıfının kuyruğuna atan sarmalayıcıya çevir."""
+    if asyncio.iscoroutinefunction(fn):
+        return fn
+
+    @functools.wraps(fn)
+    def handler(update, *args):
+        cls = classify(update)
+        if not _queues[cls].submit(_chat_key(update), fn, (update,) + args):
+            _reject(update)
+
+    return handler
+
+
+def install(bot) -> None:
+    """bot'un handler dekoratörlerini zamanlayıcıdan geçecek şekilde sar (kayıtlardan önce)."""
+    global _bot
+    if _bot is not None:
+        return
+    _bot = bot
+    for cls in (INSTANT, NETWORK, RENDER):
+        _queues[cls] = _ClassQueue(cls, HANDLER_WORKERS[cls], HANDLER_CHAT_QUEUE_LIMIT[cls])
+
+    for name in _WRAPPED:
+        register = getattr(bot, name)
+
+        def factory(*args, _register=register, **kwargs):
+            decorate = _register(*args, **kwargs)
+
+            def decorator(fn):
+                decorate(schedule(fn))
+                return fn
+
+            return decorator
+
+        setattr(bot, name, factory)
+    print("🚦 Handler zamanlayıcı: " + ", ".join(f"{c}={HANDLER_WORKERS[c]}" for c in _queues))
+
+
+def get_scheduler_stats() -> Dict[str, Dict[str, Any]]:
+    return {cls: q.get_stats() for cls, q in _queues.items()}
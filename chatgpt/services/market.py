@@ -2,15 +2,22 @@
 services/market.py
 - Tek yerden fiyat & değişim ve sembol eşleme
 - Binance dynamic mapping (exchangeInfo) + hafıza cache
+- Tüm semboller için tek /ticker/24hr snapshot (zamanlayıcı ile yenilenir)
+- Opsiyonel WebSocket akışı (services/market_stream) fiyat cache'ini canlı tutar
+- subscribe(): her fiyat güncellemesinde çağrılan abone callback'leri
 """
 
 from __future__ import annotations
 import time
 import threading
 import requests
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 
-from config import BINANCE_BASE_URL, COINGECKO_BASE_URL, BINANCE_TIMEOUT, COINGECKO_TIMEOUT
+from config import (
+    BINANCE_BASE_URL, COINGECKO_BASE_URL, BINANCE_TIMEOUT, COINGECKO_TIMEOUT,
+    TICKER_SNAPSHOT_INTERVAL, MARKET_STREAM_ENABLED,
+)
+from services.ticker_table import TickerTable
 
 # -------------------- Cache --------------------
 _symbol_map_lock = threading.Lock()
@@ -22,6 +29,25 @@ _price_lock = threading.Lock()
 _price_cache: Dict[str, Dict] = {}    # "ENAUSDT" -> {"price": float, "change": float, "ts": time}
 _PRICE_TTL = 5  # saniye (çok kısa tutuyoruz)
 
+# Tüm sembollerin 24s ticker snapshot'ı (tek istek, herkes buradan okur)
+_ticker_lock = threading.Lock()          # yenilemeyi tekilleştirir (aynı anda tek indirme)
+_tickers: Dict[str, Dict] = {}           # "BTCUSDT" -> ham /ticker/24hr kaydı
+_tickers_ts: float = 0
+_ticker_table: Optional[TickerTable] = None  # aynı snapshot'ın kolon hali
+_TICKER_MAX_AGE = max(TICKER_SNAPSHOT_INTERVAL * 3, 30)  # bundan eskisi "bayat" sayılır
+
+# WebSocket akışı açıkken cache TTL'siz geçerlidir ve ağa hiç çıkılmaz
+_stream_ts: float = 0     # son akış mesajının geldiği an
+_STREAM_STALE = 15        # saniye; bu süre mesaj gelmezse REST moduna dönülür
+
+# Fiyat aboneleri: callback({"BTCUSDT": fiyat, ...}, ts) – her güncelleme partisinde
+PriceListener = Callable[[Dict[str, float], float], None]
+_listeners_lock = threading.Lock()
+_listeners: List[PriceListener] = []
+
+_ticker_thread: Optional[threading.Thread] = None
+_start_lock = threading.Lock()
+
 session = requests.Session()
 
 
@@ -77,8 +103,99 @@ def to_binance_symbol(coin: str) -> Optional[str]:
     return None
 
 
+# -------------------- Ticker snapshot --------------------
+def _refresh_tickers() -> bool:
+    """Tüm sembollerin /ticker/24hr listesini tek istekte indirip snapshot'ı değiştirir."""
+    global _tickers, _tickers_ts, _ticker_table
+    try:
+        url = f"{BINANCE_BASE_URL}/ticker/24hr"
+        r = session.get(url, timeout=BINANCE_TIMEOUT)
+        r.raise_for_status()
+        data = r.json()
+        if not isinstance(data, list):
+            return False
+        now = time.time()
+        snapshot = {item["symbol"]: item for item in data if item.get("symbol")}
+        table = TickerTable.from_tickers(snapshot.values())
+        _tickers = snapshot            # referans değişimi atomik; okuyucular kilit tutmaz
+        _ticker_table = table
+        _tickers_ts = now
+
+        # fiyat cache'ini de aynı veriden doldur (akış canlıysa o daha taze, dokunma)
+        if is_streaming():
+            return True
+        prices: Dict[str, float] = {}
+        with _price_lock:
+            for sym, item in snapshot.items():
+                try:
+                    price = float(item["lastPrice"])
+                    _price_cache[sym] = {
+                        "price": price,
+                        "change": float(item.get("priceChangePercent", 0.0)),
+                        "ts": now,
+                    }
+                    prices[sym] = price
+                except (KeyError, TypeError, ValueError):
+                    continue
+        _publish(prices, now)
+        return True
+    except Exception as e:
+        print(f"⚠️ Ticker snapshot çekilemedi: {e}")
+        return False
+
+
+def _ensure_tickers(max_age: float = _TICKER_MAX_AGE) -> Dict[str, Dict]:
+    """Snapshot bayatsa (veya hiç yoksa) tek bir indirme yap; eşzamanlı çağıranlar bekler."""
+    if _tickers and time.time() - _tickers_ts < max_age:
+        return _tickers
+    with _ticker_lock:
+        # kilidi beklerken başka bir thread yenilemiş olabilir
+        if not _tickers or time.time() - _tickers_ts >= max_age:
+            _refresh_tickers()
+    return _tickers
+
+
+def _ticker_loop() -> None:
+    while True:
+        with _ticker_lock:
+            _refresh_tickers()
+        time.sleep(TICKER_SNAPSHOT_INTERVAL)
+
+
+def get_all_tickers() -> List[Dict]:
+    """Tüm sembollerin ham 24s ticker kayıtları (hafızadan)."""
+    return list(_ensure_tickers().values())
+
+
+def get_ticker(symbol: str) -> Optional[Dict]:
+    """Tek sembolün ham 24s ticker kaydı (hafızadan). Listede yoksa None."""
+    if not symbol:
+        return None
+    return _ensure_tickers().get(symbol.upper())
+
+
+def get_ticker_table() -> Optional[TickerTable]:
+    """Snapshot'ın NumPy kolon tablosu (sıralama/filtre sorguları için)."""
+    _ensure_tickers()
+    return _ticker_table
+
+
+def get_snapshot_age() -> Optional[float]:
+    """Snapshot'ın yaşı (saniye). Henüz yüklenmediyse None."""
+    if not _tickers_ts:
+        return None
+    return time.time() - _tickers_ts
+
+
 # -------------------- Price --------------------
 def _fetch_binance_ticker(symbol: str) -> Optional[Dict]:
+    # Önce ortak snapshot; sembol listede yoksa tekil REST çağrısına düş
+    item = _ensure_tickers().get(symbol)
+    if item and "lastPrice" in item:
+        try:
+            return {"price": float(item["lastPrice"]), "change": float(item.get("priceChangePercent", 0.0))}
+        except (TypeError, ValueError):
+            pass
     try:
         url = f"{BINANCE_BASE_URL}/ticker/24hr"
         r = session.get(url, params={"symbol": symbol}, timeout=BINANCE_TIMEOUT)
@@ -95,41 +212,124 @@ def _fetch_binance_ticker(symbol: str) -> Optional[Dict]:
         return None
 
 
-def get_price(symbol: str) -> Optional[float]:
+def _lookup(symbol: str) -> Optional[Dict]:
     now = time.time()
+    streaming = is_streaming()
     with _price_lock:
         ent = _price_cache.get(symbol)
-        if ent and (now - ent["ts"] < _PRICE_TTL):
-            return ent["price"]
+        if ent and (streaming or now - ent["ts"] < _PRICE_TTL):
+            return ent
+
+    if streaming:
+        # Akış açıkken ağa çıkma: akışta henüz görünmediyse son snapshot'a bak
+        item = _tickers.get(symbol)
+        if not item:
+            return None
+        try:
+            return {"price": float(item["lastPrice"]), "change": float(item.get("priceChangePercent", 0.0))}
+        except (KeyError, TypeError, ValueError):
+            return None
 
     data = _fetch_binance_ticker(symbol)
     if not data:
         return None
 
+    ent = {"price": data["price"], "change": data["change"], "ts": now}
     with _price_lock:
-        _price_cache[symbol] = {"price": data["price"], "change": data["change"], "ts": now}
-    return data["price"]
+        _price_cache[symbol] = ent
+    return ent
+
+
+def get_price(symbol: str) -> Optional[float]:
+    ent = _lookup(symbol)
+    return ent["price"] if ent else None
 
 
 def get_change(symbol: str) -> Optional[float]:
+    ent = _lookup(symbol)
+    return ent["change"] if ent else None
+
+
+def peek_price(symbol: str) -> Optional[Dict]:
+    """Ağa çıkmadan cache/snapshot'tan {"price", "change"} (yoksa None) - async handler'lar için."""
     now = time.time()
     with _price_lock:
         ent = _price_cache.get(symbol)
-        if ent and (now - ent["ts"] < _PRICE_TTL):
-            return ent["change"]
+        if ent and (is_streaming() or now - ent["ts"] < _PRICE_TTL):
+            return ent
+    item = _tickers.get(symbol)
+    if item and now - _tickers_ts < _TICKER_MAX_AGE:
+        try:
+            return {"price": float(item["lastPrice"]), "change": float(item.get("priceChangePercent", 0.0))}
+        except (KeyError, TypeError, ValueError):
+            pass
+    return None
 
-    data = _fetch_binance_ticker(symbol)
-    if not data:
-        return None
+
+def cache_price(symbol: str, price: float, change: float) -> None:
+    """Başka yoldan (örn. async istemci) alınan fiyatı cache'e yaz (akış sayılmaz)."""
+    with _price_lock:
+        _price_cache[symbol] = {"price": price, "change": change, "ts": time.time()}
+
+
+# -------------------- Stream --------------------
+def update_prices(entries: Dict[str, Tuple[float, float]]) -> None:
+    """Akıştan gelen {"BTCUSDT": (fiyat, değişim%)} kayıtlarını cache'e yaz."""
+    global _stream_ts
+    now = time.time()
     with _price_lock:
-        _price_cache[symbol] = {"price": data["price"], "change": data["change"], "ts": now}
-    return data["change"]
+        for sym, (price, change) in entries.items():
+            _price_cache[sym] = {"price": price, "change": change, "ts": now}
+    _stream_ts = now
+    _publish({sym: pc[0] for sym, pc in entries.items()}, now)
+
+
+def is_streaming() -> bool:
+    """WebSocket akışı canlı mı (son mesaj _STREAM_STALE saniyeden yeni)."""
+    return bool(_stream_ts) and time.time() - _stream_ts < _STREAM_STALE
+
+
+# -------------------- Subscribers --------------------
+def subscribe(callback: PriceListener) -> None:
+    """Her fiyat güncellemesinde callback(prices, ts) çağrılsın (snapshot ve akış)."""
+    with _listeners_lock:
+        if callback not in _listeners:
+            _listeners.append(callback)
+
+
+def unsubscribe(callback: PriceListener) -> None:
+    with _listeners_lock:
+        if callback in _listeners:
+            _listeners.remove(callback)
+
+
+def _publish(prices: Dict[str, float], ts: float) -> None:
+    # Callback'ler yayıncı thread'inde çalışır; kısa tutulmalı (iş kuyruğa atılmalı)
+    if not prices:
+        return
+    with _listeners_lock:
+        listeners = list(_listeners)
+    for cb in listeners:
+        try:
+            cb(prices, ts)
+        except Exception as e:
+            print(f"⚠️ Fiyat abonesi hatası: {e}")
 
 
 # -------------------- Lifecycle --------------------
 def start():
-    """Modül başlatıldığında sembol haritasını ısıt."""
+    """Modül başlatıldığında sembol haritasını ısıt ve ticker snapshot döngüsünü başlat."""
+    global _ticker_thread
     try:
         _refresh_symbol_map()
     except Exception:
         pass
+    with _start_lock:
+        if _ticker_thread and _ticker_thread.is_alive():
+            return
+        _ticker_thread = threading.Thread(target=_ticker_loop, name="ticker-snapshot", daemon=True)
+        _ticker_thread.start()
+
+    if MARKET_STREAM_ENABLED:
+        from services.market_stream import start_stream
+        start_stream()
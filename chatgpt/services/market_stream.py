@@ -0,0 +1,259 @@
+"""
+services/market_stream.py
+- Binance `!miniTicker@arr` WebSocket akışını arka planda dinler
+- Gelen her çerçeveyi services/market fiyat cache'ine yazar
+- Opsiyonel: websocket-client kurulu değilse REST moduna devam edilir
+- URL parametresi sayesinde kayıtlı çerçeveleri oynatan yerel bir WS sunucusuna bağlanabilir
+- Yerel test: kayıtlı çerçeveleri (satır başına bir JSON) localhost'ta WS olarak oynat
+    python -m services.market_stream record frames.jsonl 100   # canlı akıştan 100 çerçeve kaydet
+    python -m services.market_stream frames.jsonl [port]        # ws://127.0.0.1:8765 üzerinden oynat
+  ve start_stream("ws://127.0.0.1:8765") (ya da BINANCE_WS_URL) ile bağlan
+"""
+
+from __future__ import annotations
+import base64
+import hashlib
+import json
+import socket
+import socketserver
+import struct
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from config import BINANCE_WS_URL
+from services.market import update_prices
+
+try:
+    import websocket  # websocket-client
+except ImportError:
+    websocket = None
+
+_stream_thread: Optional[threading.Thread] = None
+_stream_lock = threading.Lock()
+_stream_running = False
+_ws = None
+
+_stats = {"frames": 0, "ticks": 0, "reconnects": 0, "last_error": None}
+
+
+# -------------------- Çerçeve işleme --------------------
+def handle_frame(raw) -> int:
+    """
+    Tek bir miniTicker çerçevesini işle (str/bytes JSON ya da çözülmüş liste).
+    Dönüş: cache'e yazılan sembol sayısı.
+    """
+    data = json.loads(raw) if isinstance(raw, (str, bytes, bytearray)) else raw
+    if isinstance(data, dict):
+        # combined stream ({"stream":..., "data": [...]}) ya da tekil ticker
+        data = data.get("data", [data])
+    if not isinstance(data, list):
+        return 0
+
+    entries: Dict[str, Tuple[float, float]] = {}
+    for t in data:
+        try:
+            sym = t["s"]
+            close = float(t["c"])
+            open_ = float(t["o"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        # miniTicker yüzde değişim vermez; 24s açılışa göre hesapla (Binance ile aynı tanım)
+        change = (close - open_) / open_ * 100 if open_ else 0.0
+        entries[sym] = (close, change)
+
+    if entries:
+        update_prices(entries)
+    _stats["frames"] += 1
+    _stats["ticks"] += len(entries)
+    return len(entries)
+
+
+# -------------------- WebSocket döngüsü --------------------
+def _on_message(_ws_app, message):
+    try:
+        handle_frame(message)
+    except Exception as e:
+        print(f"⚠️ miniTicker çerçeve hatası: {e}")
+
+
+def _on_error(_ws_app, error):
+    _stats["last_error"] = str(error)
+
+
+def _stream_loop(url: str) -> None:
+    global _ws
+    delay = 1
+    print(f"📡 miniTicker akışı başlıyor: {url}")
+    while _stream_running:
+        started = time.time()
+        try:
+            _ws = websocket.WebSocketApp(url, on_message=_on_message, on_error=_on_error)
+            _ws.run_forever(ping_interval=30, ping_timeout=10)
+        except Exception as e:
+            _stats["last_error"] = str(e)
+        if not _stream_running:
+            break
+        # Binance bağlantıları 24 saatte bir kapatır; uzun yaşamış bağlantıdan sonra hemen bağlan
+        if time.time() - started > 60:
+            delay = 1
+        _stats["reconnects"] += 1
+        print(f"🔁 miniTicker akışı koptu ({_stats['last_error']}). {delay}s sonra tekrar…")
+        time.sleep(delay)
+        delay = min(delay * 2, 60)
+
+
+def start_stream(url: Optional[str] = None) -> bool:
+    """Akışı arka plan thread'inde başlat. websocket-client yoksa False döner."""
+    global _stream_thread, _stream_running
+    if websocket is None:
+        print("⚠️ websocket-client kurulu değil; fiyatlar REST snapshot'tan gelmeye devam edecek.")
+        return False
+    with _stream_lock:
+        if _stream_thread and _stream_thread.is_alive():
+            return True
+        _stream_running = True
+        _stream_thread = threading.Thread(
+            target=_stream_loop, args=(url or BINANCE_WS_URL,), name="miniticker-stream", daemon=True
+        )
+        _stream_thread.start()
+    return True
+
+
+def stop_stream() -> None:
+    global _stream_running
+    _stream_running = False
+    if _ws is not None:
+        try:
+            _ws.close()
+        except Exception:
+            pass
+
+
+def get_stream_stats() -> dict:
+    return dict(_stats)
+
+
+# -------------------- yerel test: kayıtlı çerçeveleri oynatan WS sunucusu --------------------
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+def _ws_frame(opcode: int, payload: bytes = b"") -> bytes:
+    """Sunucu → istemci çerçevesi (maskesiz, tek parça)."""
+    n = len(payload)
+    if n < 126:
+        head = struct.pack("!BB", 0x80 | opcode, n)
+    elif n < 1 << 16:
+        head = struct.pack("!BBH", 0x80 | opcode, 126, n)
+    else:
+        head = struct.pack("!BBQ", 0x80 | opcode, 127, n)
+    return head + payload
+
+
+def _read_client_frames(sock: socket.socket, send_lock: threading.Lock, done: threading.Event) -> None:
+    """İstemcinin ping'lerine pong döner, close gelince bağlantıyı bitirir (istemci çerçeveleri maskeli)."""
+    f = sock.makefile("rb")
+    try:
+        while not done.is_set():
+            head = f.read(2)
+            if len(head) < 2:
+                break
+            opcode, n = head[0] & 0x0F, head[1] & 0x7F
+            if n == 126:
+                n = struct.unpack("!H", f.read(2))[0]
+            elif n == 127:
+                n = struct.unpack("!Q", f.read(8))[0]
+            mask = f.read(4) if head[1] & 0x80 else b"\0\0\0\0"
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(f.read(n)))
+            if opcode == 0x9:
+                with send_lock:
+                    sock.sendall(_ws_frame(0xA, payload))
+            elif opcode == 0x8:
+                break
+    except OSError:
+        pass
+    finally:
+        done.set()
+
+
+def serve_frames(path: str, host: str = "127.0.0.1", port: int = 8765,
+                 interval: float = 1.0, loop: bool = True) -> None:
+    """
+    Kayıtlı miniTicker çerçevelerini (satır başına bir JSON) her bağlanan istemciye
+    `interval` saniye arayla gönderen minimal WebSocket sunucusu. Ctrl+C ile durur.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        frames: List[bytes] = [line.strip().encode("utf-8") for line in f if line.strip()]
+    if not frames:
+        print(f"⚠️ {path}: oynatılacak çerçeve yok")
+        return
+
+    class Handler(socketserver.BaseRequestHandler):
+        def handle(self):
+            sock = self.request
+            raw = b""
+            while b"\r\n\r\n" not in raw:
+                chunk = sock.recv(4096)
+                if not chunk:
+                    return
+                raw += chunk
+            key = next((line.split(b":", 1)[1].strip() for line in raw.split(b"\r\n")
+                        if line.lower().startswith(b"sec-websocket-key:")), None)
+            if key is None:
+                sock.sendall(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+                return
+            accept = base64.b64encode(hashlib.sha1(key + _WS_GUID.encode()).digest())
+            sock.sendall(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+                         b"Connection: Upgrade\r\nSec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+
+            send_lock = threading.Lock()
+            done = threading.Event()
+            threading.Thread(target=_read_client_frames, args=(sock, send_lock, done), daemon=True).start()
+            sent = 0
+            try:
+                while not done.is_set():
+                    with send_lock:
+                        sock.sendall(_ws_frame(0x1, frames[sent % len(frames)]))
+                    sent += 1
+                    if sent % len(frames) == 0 and not loop:
+                        with send_lock:
+                            sock.sendall(_ws_frame(0x8))
+                        break
+                    done.wait(interval)
+            except OSError:
+                pass
+            finally:
+                done.set()
+                print(f"📼 {self.client_address[0]}: {sent} çerçeve gönderildi")
+
+    socketserver.ThreadingTCPServer.allow_reuse_address = True
+    with socketserver.ThreadingTCPServer((host, port), Handler) as srv:
+        srv.daemon_threads = True
+        print(f"📼 {len(frames)} çerçeve oynatılıyor: ws://{host}:{port} ({interval}s arayla)")
+        try:
+            srv.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def record_frames(path: str, count: int = 100, url: Optional[str] = None) -> None:
+    """Canlı akıştan `count` çerçeveyi dosyaya kaydet (serve_frames ile oynatmak için)."""
+    if websocket is None:
+        print("⚠️ websocket-client kurulu değil")
+        return
+    conn = websocket.create_connection(url or BINANCE_WS_URL, timeout=30)
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            for _ in range(count):
+                f.write(conn.recv().strip() + "\n")
+    finally:
+        conn.close()
+    print(f"💾 {count} çerçeve kaydedildi: {path}")
+
+
+if __name__ == "__main__":
+    import sys
+    if sys.argv[1] == "record":
+        record_frames(sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else 100)
+    else:
+        serve_frames(sys.argv[1], port=int(sys.argv[2]) if len(sys.argv) > 2 else 8765)
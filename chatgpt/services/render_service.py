@@ -0,0 +1,171 @@
+"""
+services/render_service.py
+- Grafik PNG'lerini handler thread'i yerine ayrı süreçlerde üretir (çok çekirdek, GIL yok)
+- Worker'lar başlangıçta matplotlib + grafik modülleri yüklü ve font cache ısınmış halde açılır
+- Sınırlı kuyruk: RENDER_QUEUE_SIZE iş doluysa yeni istek RENDER_QUEUE_WAIT sn bekler, sonra reddedilir
+- Grafik modülleri pyplot yerine Figure/FigureCanvasAgg kullanır; figure'lar agg_figure ile yeniden kullanılır
+- start() çağrılmadıysa ya da havuz bozulduysa çizim çağıran thread'de yapılır
+"""
+
+from __future__ import annotations
+import multiprocessing as mp
+import threading
+import time
+from io import BytesIO
+from typing import Any, Dict, Optional, Tuple
+
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from config import RENDER_WORKERS, RENDER_QUEUE_SIZE, RENDER_QUEUE_WAIT, RENDER_TIMEOUT
+
+_pool = None
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(RENDER_QUEUE_SIZE)
+_stats_lock = threading.Lock()
+_stats = {"rendered": 0, "inline": 0, "rejected": 0, "failed": 0, "render_ms_total": 0.0}
+
+# süreç (ve thread) başına yeniden kullanılan figure'lar
+_figures = threading.local()
+
+
+# -------------------- figure yeniden kullanımı --------------------
+def agg_figure(key: str, figsize: Tuple[float, float], facecolor: str) -> Figure:
+    """
+    pyplot state machine'i olmadan Agg figure döndür. Aynı key için aynı figure
+    temizlenip tekrar verilir (her çizimde Figure/Canvas kurulum maliyeti yok).
+    """
+    cache = getattr(_figures, "cache", None)
+    if cache is None:
+        cache = _figures.cache = {}
+    fig = cache.get(key)
+    if fig is None:
+        fig = Figure(figsize=figsize, facecolor=facecolor)
+        FigureCanvasAgg(fig)
+        cache[key] = fig
+    else:
+        fig.clear()
+        fig.set_size_inches(figsize)
+        fig.set_facecolor(facecolor)
+    return fig
+
+
+# -------------------- işler --------------------
+def _job_function(job: str):
+    if job == "modern_chart":
+        from utils.modern_charts import create_ultra_modern_chart
+        return create_ultra_modern_chart
+    if job == "liquidity_heatmap":
+        from utils.liquidity_heatmap import render_liquidity_heatmap
+        return render_liquidity_heatmap
+    if job == "multi_timeframe":
+        import matplotlib.pyplot as plt
+        # chart_generator importu plt.style.use('dark_background') çağırır; rcParams geri alınır,
+        # stil sadece bu işin içinde uygulanır → worker'daki sonraki modern_chart'lar etkilenmez
+        with plt.rc_context():
+            from utils.chart_generator import create_multi_timeframe_chart
+
+        def run(*args, **kwargs):
+            with plt.style.context('dark_background'):
+                return create_multi_timeframe_chart(*args, **kwargs)
+        return run
+    raise ValueError(f"bilinmeyen render işi: {job}")
+
+
+def _run_job(job: str, args: tuple, kwargs: dict) -> Optional[bytes]:
+    """Worker içinde çalışır; sonuç pickle edilebilir bytes olarak döner."""
+    out = _job_function(job)(*args, **kwargs)
+    if isinstance(out, BytesIO):
+        return out.getvalue()
+    return out
+
+
+def _warm_worker() -> None:
+    """Worker başlangıcı: modülleri yükle, font cache'i ve Agg'yi ısıt."""
+    # multi_timeframe (chart_generator) sadece iş gelirse yüklenir
+    for job in ("modern_chart", "liquidity_heatmap"):
+        try:
+            _job_function(job)
+        except Exception as e:
+            print(f"⚠️ render worker import ({job}): {e}")
+    fig = agg_figure("_warm", (2, 1), "#000000")
+    fig.text(0.5, 0.5, "warm", fontweight="bold")
+    fig.savefig(BytesIO(), format="png")
+
+
+# -------------------- servis --------------------
+def start(workers: int = RENDER_WORKERS) -> bool:
+    """
+    Render havuzunu aç. Arka plan thread'leri başlamadan (komut kayıtlarından önce)
+    çağrılmalı: worker'lar fork ile kopyalanır.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            return True
+        if workers <= 0:
+            return False
+        try:
+            ctx = mp.get_context("fork")
+            _pool = ctx.Pool(processes=workers, initializer=_warm_worker)
+            print(f"🖼️ Render havuzu hazır ({workers} süreç)")
+            return True
+        except Exception as e:
+            print(f"⚠️ Render havuzu açılamadı, çizim handler thread'inde yapılacak: {e}")
+            _pool = None
+            return False
+
+
+def stop() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.terminate()
+            _pool = None
+
+
+def render(job: str, *args, **kwargs) -> Optional[bytes]:
+    """
+    Grafiği üret ve PNG bytes döndür. Kuyruk doluysa ya da hata olursa None.
+    job: "modern_chart" | "liquidity_heatmap" | "multi_timeframe"
+    """
+    if not _slots.acquire(timeout=RENDER_QUEUE_WAIT):
+        with _stats_lock:
+            _stats["rejected"] += 1
+        print(f"⏳ Render kuyruğu dolu, istek reddedildi ({job})")
+        return None
+    t = time.time()
+    inline = False
+    try:
+        pool = _pool
+        if pool is not None:
+            try:
+                out = pool.apply_async(_run_job, (job, args, kwargs)).get(RENDER_TIMEOUT)
+            except mp.TimeoutError:
+                print(f"⚠️ Render zaman aşımı ({job})")
+                out = None
+        else:
+            inline = True
+            out = _run_job(job, args, kwargs)
+    except Exception as e:
+        print(f"⚠️ Render hatası ({job}): {e}")
+        out = None
+    finally:
+        _slots.release()
+
+    with _stats_lock:
+        if out is None:
+            _stats["failed"] += 1
+        else:
+            _stats["rendered"] += 1
+            _stats["inline"] += inline
+            _stats["render_ms_total"] += (time.time() - t) * 1000
+    return out
+
+
+def get_render_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        out = dict(_stats)
+    out["workers"] = RENDER_WORKERS if _pool is not None else 0
+    out["avg_render_ms"] = round(out.pop("render_ms_total") / out["rendered"], 1) if out["rendered"] else None
+    return out
@@ -0,0 +1,116 @@
+"""
+services/ticker_table.py
+- 24s ticker snapshot'ının kolon bazlı (NumPy struct-array) hali
+- Top-k (argpartition), filtre ve grup ortalaması vektörel çalışır
+- Tablo snapshot yenilendiğinde bir kez kurulur; butonlar sadece sorgu yapar
+"""
+
+from __future__ import annotations
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+TICKER_DTYPE = np.dtype([
+    ("sid", np.int32),             # symbols dizisindeki index
+    ("price", np.float64),         # lastPrice
+    ("change", np.float64),        # priceChangePercent
+    ("quote_volume", np.float64),  # quoteVolume (USDT cinsinden hacim)
+    ("count", np.int64),           # işlem sayısı
+])
+
+
+class TickerTable:
+    """Snapshot'ın salt-okunur kolon tablosu. Her yenilemede yenisi kurulur."""
+
+    def __init__(self, symbols: np.ndarray, rows: np.ndarray):
+        self.symbols = symbols                      # sid -> "BTCUSDT"
+        self.rows = rows                            # TICKER_DTYPE
+        self._index = {s: i for i, s in enumerate(symbols.tolist())}
+        self.usdt = np.char.endswith(symbols.astype(str), "USDT") if len(symbols) else np.zeros(0, dtype=bool)
+
+    @classmethod
+    def from_tickers(cls, items: Iterable[Dict]) -> "TickerTable":
+        """Ham /ticker/24hr kayıtlarından tablo kur (bozuk kayıtlar atlanır)."""
+        syms: List[str] = []
+        price: List[str] = []
+        change: List[str] = []
+        qvol: List[str] = []
+        count: List[int] = []
+        for it in items:
+            try:
+                s = it["symbol"]
+                p, c, q, n = it["lastPrice"], it["priceChangePercent"], it["quoteVolume"], int(it["count"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            syms.append(s); price.append(p); change.append(c); qvol.append(q); count.append(n)
+
+        rows = np.empty(len(syms), dtype=TICKER_DTYPE)
+        rows["sid"] = np.arange(len(syms), dtype=np.int32)
+        rows["price"] = np.array(price, dtype=np.float64)
+        rows["change"] = np.array(change, dtype=np.float64)
+        rows["quote_volume"] = np.array(qvol, dtype=np.float64)
+        rows["count"] = np.array(count, dtype=np.int64)
+        return cls(np.array(syms, dtype=object), rows)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    # -------------------- Sorgular --------------------
+    def mask(self, usdt_only: bool = True, min_quote_volume: Optional[float] = None,
+             min_count: Optional[int] = None) -> np.ndarray:
+        """Koşullara uyan satırlar için bool maske."""
+        m = self.usdt.copy() if usdt_only else np.ones(len(self.rows), dtype=bool)
+        if min_quote_volume is not None:
+            m &= self.rows["quote_volume"] > min_quote_volume
+        if min_count is not None:
+            m &= self.rows["count"] > min_count
+        return m
+
+    def top_k(self, column: str, k: int, mask: Optional[np.ndarray] = None,
+              ascending: bool = False) -> np.ndarray:
+        """`column`a göre en büyük (ascending=True ise en küçük) k satırın index'leri, sıralı."""
+        idx = np.flatnonzero(mask) if mask is not None else np.arange(len(self.rows))
+        if k <= 0 or idx.size == 0:
+            return idx[:0]
+        keys = self.rows[column][idx]
+        if not ascending:
+            keys = -keys
+        if k < idx.size:
+            part = np.argpartition(keys, k - 1)[:k]
+            idx, keys = idx[part], keys[part]
+        return idx[np.argsort(keys, kind="stable")]
+
+    def group_mean(self, column: str, groups: Dict[str, List[str]]) -> Dict[str, Tuple[float, int]]:
+        """Sembol grupları için ortalama. {grup: (ortalama, bulunan_sembol_sayısı)}; boş gruplar yok."""
+        names = list(groups)
+        gid: List[int] = []
+        pos: List[int] = []
+        for g, syms in enumerate(groups.values()):
+            for s in syms:
+                i = self._index.get(s)
+                if i is not None:
+                    gid.append(g); pos.append(i)
+        if not pos:
+            return {}
+        gid_arr = np.array(gid, dtype=np.intp)
+        vals = self.rows[column][np.array(pos, dtype=np.intp)]
+        counts = np.bincount(gid_arr, minlength=len(names))
+        sums = np.bincount(gid_arr, weights=vals, minlength=len(names))
+        return {
+            names[g]: (float(sums[g] / counts[g]), int(counts[g]))
+            for g in range(len(names)) if counts[g]
+        }
+
+    def records(self, idx: np.ndarray) -> List[Dict]:
+        """Seçilen satırları komutların beklediği dict formatına çevir."""
+        sel = self.rows[idx]
+        return [
+            {
+                "symbol": self.symbols[r["sid"]],
+                "price": float(r["price"]),
+                "change_percent": float(r["change"]),
+                "volume": float(r["quote_volume"]),
+                "count": int(r["count"]),
+            }
+            for r in sel
+        ]
@@ -0,0 +1,239 @@
+"""
+services/universe_scanner.py
+- Tüm TRADING USDT pariteleri için tek geçişte teknik tarama (/tara)
+- Mumlar kline store üzerinden, SCAN_FETCH_WORKERS ile sınırlı eşzamanlılıkla çekilir
+  (ilk taramadan sonra sembol başına sadece yeni mumlar iner)
+- Kapanışlar/hacimler (sembol × mum) 2-D diziye dizilir; RSI, MACD, Bollinger, hacim oranı ve
+  calculate_analysis_score ile aynı skor tüm semboller için vektörel hesaplanır
+- Sonuç interval başına SCAN_CACHE_TTL saniye saklanır; aynı anda gelen taramalar tek taramayı bekler
+"""
+
+from __future__ import annotations
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from config import SCAN_FETCH_WORKERS, SCAN_KLINE_LIMIT, SCAN_CACHE_TTL, SCAN_VOLUME_SPIKE, SCAN_TOP_N
+from utils.binance_api import load_all_binance_symbols, get_klines_array
+
+CLOSE, VOLUME = 4, 5   # utils/binance_api KLINE_COLS sırası
+
+_fetch_pool = ThreadPoolExecutor(max_workers=SCAN_FETCH_WORKERS, thread_name_prefix="scan-fetch")
+_results: Dict[str, Dict[str, Any]] = {}
+_scan_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+# -------------------- vektörel indikatörler (satır = sembol) --------------------
+def _ewm(x: np.ndarray, span: int) -> np.ndarray:
+    """Satır başına pandas ewm(span, adjust=True).mean() (zaman ekseninde döngü, semboller vektörel)"""
+    decay = 1 - 2 / (span + 1)
+    out = np.empty_like(x)
+    num = np.zeros(len(x))
+    den = 0.0
+    for t in range(x.shape[1]):
+        num = x[:, t] + decay * num
+        den = 1 + decay * den
+        out[:, t] = num / den
+    return out
+
+
+def compute_indicators(close: np.ndarray, volume: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    (S, T) kapanış/hacim → sembol başına son değerler.
+    Tanımlar utils/technical_analysis ile aynı: RSI(14) rolling ortalama, MACD(12, 26, 9),
+    Bollinger(20, 2), SMA20, hacim oranı = son hacim / 20 mum ortalaması.
+    """
+    delta = np.diff(close[:, -15:], axis=1)
+    gain = np.where(delta > 0, delta, 0.0).mean(axis=1)
+    loss = np.where(delta < 0, -delta, 0.0).mean(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100 - 100 / (1 + gain / loss)
+
+    macd = _ewm(close, 12) - _ewm(close, 26)
+    signal = _ewm(macd, 9)
+
+    last20 = close[:, -20:]
+    sma20 = last20.mean(axis=1)
+    std20 = last20.std(axis=1, ddof=1)
+    vol_avg = volume[:, -20:].mean(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        volume_ratio = np.where(vol_avg > 0, volume[:, -1] / vol_avg, 1.0)
+
+    return {
+        "price": close[:, -1],
+        "rsi": rsi,
+        "macd": macd[:, -1], "macd_prev": macd[:, -2],
+        "signal": signal[:, -1], "signal_prev": signal[:, -2],
+        "sma20": sma20,
+        "bb_upper": sma20 + 2 * std20, "bb_lower": sma20 - 2 * std20,
+        "volume_ratio": volume_ratio,
+    }
+
+
+def compute_scores(ind: Dict[str, np.ndarray]) -> np.ndarray:
+    """commands/analysis_commands.calculate_analysis_score'un vektörel karşılığı (NaN davranışı dahil)"""
+    rsi, price = ind["rsi"], ind["price"]
+    score = np.full(len(price), 5.0)
+    score += np.select([rsi < 30, rsi < 40, rsi > 70, rsi > 60], [2.5, 1.5, -2.5, -1.5], 0.0)
+
+    above = ind["macd"] > ind["signal"]
+    cross_up = above & (ind["macd_prev"] <= ind["signal_prev"])
+    cross_down = ~above & (ind["macd_prev"] >= ind["signal_prev"])
+    score += np.where(above, 1.5, -1.5) + cross_up - cross_down
+
+    score += np.select([price <= ind["bb_lower"], price >= ind["bb_upper"]], [2.0, -2.0], 0.0)
+    score += np.where(price > ind["sma20"], 1.0, -1.0)
+    vr = ind["volume_ratio"]
+    score += np.select([vr > 1.5, vr < 0.5], [0.5, -0.5], 0.0)
+    return np.clip(score, 0, 10)
+
+
+# -------------------- veri --------------------
+def _fetch(symbol: str, interval: str, limit: int) -> Optional[np.ndarray]:
+    try:
+        return get_klines_array(symbol, interval, limit)
+    except Exception as e:
+        print(f"⚠️ Tarama verisi alınamadı ({symbol}): {e}")
+        return None
+
+
+def load_universe(interval: str, limit: int = SCAN_KLINE_LIMIT):
+    """
+    Tüm USDT paritelerinin son `limit` mumu → (semboller, kapanış (S, T), hacim (S, T), eksik sayısı).
+    Henüz `limit` mumu olmayan yeni listelemeler ve hatalı istekler atlanır.
+    """
+    symbols = sorted(set(load_all_binance_symbols().values()))
+    futures = [(s, _fetch_pool.submit(_fetch, s, interval, limit)) for s in symbols]
+    kept: List[str] = []
+    rows: List[np.ndarray] = []
+    for s, fut in futures:
+        arr = fut.result()
+        if arr is None or len(arr) < limit:
+            continue
+        kept.append(s)
+        rows.append(arr[:, [CLOSE, VOLUME]])
+    if not rows:
+        return kept, np.empty((0, limit)), np.empty((0, limit)), len(symbols)
+    data = np.stack(rows)
+    return kept, data[:, :, 0], data[:, :, 1], len(symbols) - len(kept)
+
+
+# -------------------- sıralama --------------------
+def _rows(symbols: List[str], ind: Dict[str, np.ndarray], score: np.ndarray, idx: np.ndarray) -> List[dict]:
+    return [
+        {"symbol": symbols[i], "price": float(ind["price"][i]), "rsi": float(ind["rsi"][i]),
+         "volume_ratio": float(ind["volume_ratio"][i]), "score": float(score[i])}
+        for i in idx[:SCAN_TOP_N]
+    ]
+
+
+def rank(symbols: List[str], ind: Dict[str, np.ndarray], score: np.ndarray) -> Dict[str, List[dict]]:
+    rsi, vr, price = ind["rsi"], ind["volume_ratio"], ind["price"]
+    cross = (ind["macd"] > ind["signal"]) & (ind["macd_prev"] <= ind["signal_prev"])
+
+    def pick(mask: np.ndarray, key: np.ndarray) -> np.ndarray:
+        idx = np.flatnonzero(mask)
+        return idx[np.argsort(key[idx], kind="stable")]
+
+    return {
+        "oversold": _rows(symbols, ind, score, pick(rsi < 30, rsi)),
+        "overbought": _rows(symbols, ind, score, pick(rsi > 70, -rsi)),
+        "volume_spike": _rows(symbols, ind, score, pick(vr >= SCAN_VOLUME_SPIKE, -vr)),
+        "macd_cross": _rows(symbols, ind, score, pick(cross, -score)),
+        "bb_lower": _rows(symbols, ind, score, pick(price <= ind["bb_lower"], rsi)),
+        "top_score": _rows(symbols, ind, score, pick(np.isfinite(score), -score)),
+        "bottom_score": _rows(symbols, ind, score, pick(np.isfinite(score), score)),
+    }
+
+
+# -------------------- tarama --------------------
+def _lock_for(interval: str) -> threading.Lock:
+    with _locks_guard:
+        lock = _scan_locks.get(interval)
+        if lock is None:
+            lock = _scan_locks[interval] = threading.Lock()
+        return lock
+
+
+def scan(interval: str = "4h", force: bool = False) -> Dict[str, Any]:
+    """
+    Tüm USDT paritelerini tara ve kategorilere göre sıralı listeler döndür.
+    {"interval", "at", "symbols", "skipped", "fetch_s", "compute_s", "rankings"}
+    """
+    cached = _results.get(interval)
+    if cached and not force and time.time() - cached["at"] < SCAN_CACHE_TTL:
+        return cached
+    with _lock_for(interval):
+        cached = _results.get(interval)     # bu sırada başka tarama bitmiş olabilir
+        if cached and not force and time.time() - cached["at"] < SCAN_CACHE_TTL:
+            return cached
+
+        t0 = time.perf_counter()
+        symbols, close, volume, skipped = load_universe(interval)
+        t1 = time.perf_counter()
+        if symbols:
+            ind = compute_indicators(close, volume)
+            score = compute_scores(ind)
+            rankings = rank(symbols, ind, score)
+        else:
+            rankings = {}
+        t2 = time.perf_counter()
+
+        result = {
+            "interval": interval, "at": time.time(), "symbols": len(symbols), "skipped": skipped,
+            "fetch_s": round(t1 - t0, 2), "compute_s": round(t2 - t1, 3), "rankings": rankings,
+        }
+        if symbols:
+            _results[interval] = result
+        print(f"🔭 Tarama {interval}: {len(symbols)} parite ({skipped} atlandı), "
+              f"veri {result['fetch_s']}s, hesap {result['compute_s']}s")
+        return result
+
+
+def get_scanner_stats() -> Dict[str, Dict[str, Any]]:
+    return {
+        iv: dict({k: r[k] for k in ("symbols", "skipped", "fetch_s", "compute_s")}, age_s=int(time.time() - r["at"]))
+        for iv, r in list(_results.items())
+    }
+
+
+def test_scanner_parity(n_symbols: int = 400, n: int = SCAN_KLINE_LIMIT) -> None:
+    """Vektörel tarama = sembol başına IndicatorFrame + calculate_analysis_score; süre karşılaştırması."""
+    import pandas as pd
+    from commands.analysis_commands import calculate_analysis_score
+    from utils.technical_analysis import IndicatorFrame
+
+    rng = np.random.default_rng(5)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (n_symbols, n)), axis=1))
+    volume = rng.lognormal(10, 1, (n_symbols, n))
+    close[0, -15:] = close[0, -16]          # değişmeyen fiyat → RSI NaN
+    volume[1, -20:] = 0                     # hacimsiz parite
+
+    t = time.perf_counter()
+    ind = compute_indicators(close, volume)
+    score = compute_scores(ind)
+    vec = time.perf_counter() - t
+
+    t = time.perf_counter()
+    for i in range(n_symbols):
+        frame = IndicatorFrame(pd.DataFrame({"close": close[i], "volume": volume[i]}))
+        rsi = float(frame.rsi().iloc[-1])
+        macd, bb, vol = frame.macd(), frame.bollinger(), frame.volume()
+        ref, _ = calculate_analysis_score(rsi, macd, bb, vol, close[i, -1], float(frame.sma(20).iloc[-1]))
+        assert np.isclose(score[i], ref), (i, score[i], ref)
+        assert np.isclose(ind["rsi"][i], rsi, equal_nan=True), i
+        assert np.isclose(ind["macd"][i], macd["macd"].iloc[-1], rtol=1e-9, atol=1e-12), i
+        assert np.isclose(ind["signal_prev"][i], macd["signal"].iloc[-2], rtol=1e-9, atol=1e-12), i
+        assert np.isclose(ind["bb_upper"][i], bb["upper"].iloc[-1], rtol=1e-9), i
+        assert np.isclose(ind["volume_ratio"][i], vol["volume_ratio"]), i
+    loop = time.perf_counter() - t
+    print(f"✅ vektörel tarama = sembol başına analiz ({n_symbols} parite × {n} mum). "
+          f"Vektörel: {vec * 1000:.1f} ms, döngü: {loop * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    test_scanner_parity()
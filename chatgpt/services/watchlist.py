@@ -0,0 +1,221 @@
+"""
+services/watchlist.py
+- config.POPULAR_COINS (sıcak küme) için /analiz sonuçlarını arka planda hazır tutar:
+  her timeframe'in tekli analizi + detaylı analiz (metin, skorlar, S/R seviyeleri, 24h istatistik)
+  ve grafik PNG'si (services/chart_cache'e önceden render edilir)
+- Bir sonuç, hesaplandığı açık mum kapanınca (valid_until) ya da WATCHLIST_MAX_AGE saniye
+  sonra yenilenir; istek yolunda sıcak coinler için hesaplama/render yapılmaz
+- Mum içi (MAX_AGE) yenilemede açık mumun kapanışı değiştiyse get_indicator_frame frame'i yeniden
+  kurar: fiyat satırıyla birlikte RSI/MACD/skor da güncellenir; grafik chart_cache.refresh ile
+  yeniden çizilir (aynı mum anahtarındaki eski PNG ve Telegram file_id atılır)
+- Fiyat zaten services/market snapshot'ından gelir; /fiyat için sadece isabet sayılır
+- Sıcak coin × timeframe serileri utils/streaming_indicators ile izlenir: yenilemelerin çektiği
+  mumlar kline store üzerinden state'leri ilerletir, kapanmış mum RSI/MACD'si yeniden hesaplanmadan okunur
+- get_watchlist_stats(): tür başına isabet / ıska (sıcak kümede değil / hazır değil),
+  en çok ıskalanan semboller (sıcak kümenin boyutu doğru mu?) ve kapanmış mumda RSI uçları
+"""
+
+from __future__ import annotations
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from config import (
+    POPULAR_COINS, WATCHLIST_ENABLED, WATCHLIST_TIMEFRAMES, WATCHLIST_TICK, WATCHLIST_MAX_AGE,
+    WATCHLIST_WORKERS,
+)
+from services.chart_cache import get_or_render, refresh
+from utils.binance_api import find_binance_symbol
+from utils.streaming_indicators import track, get_state
+
+KINDS = tuple(WATCHLIST_TIMEFRAMES) + ("full",)
+_CLOSE_MARGIN_MS = 5000     # mum kapanışından sonra Binance'ın yeni mumu vermesi için pay
+
+_lock = threading.Lock()
+_hot: Dict[str, str] = {}                                # symbol -> coin girdisi ("btc")
+_snapshots: Dict[Tuple[str, str], Dict[str, Any]] = {}   # (symbol, kind) -> sonuç
+_refreshing: set = set()
+_builder: Optional[Callable] = None
+_pool: Optional[ThreadPoolExecutor] = None
+_started = False
+
+_hits: Counter = Counter()          # kind -> hazır sonuçtan verilen istek
+_cold: Counter = Counter()          # kind -> sıcak kümede olmayan sembol
+_not_ready: Counter = Counter()     # kind -> sıcak ama sonuç yok/eskimiş
+_cold_symbols: Counter = Counter()  # sıcak kümeye eklenmeye aday semboller
+_refresh_stats = {"refreshes": 0, "errors": 0, "seconds": 0.0}
+
+
+def _resolve_hot_set() -> Dict[str, str]:
+    hot = {}
+    for coin in POPULAR_COINS:
+        symbol = find_binance_symbol(coin)
+        if symbol:
+            hot[symbol] = coin
+        else:
+            print(f"⚠️ Watchlist: {coin.upper()} Binance'da bulunamadı, atlandı")
+    return hot
+
+
+def _is_fresh(snap: Dict[str, Any], now: float) -> bool:
+    return (now * 1000 < snap["valid_until"] + _CLOSE_MARGIN_MS
+            and now - snap["at"] < WATCHLIST_MAX_AGE)
+
+
+# -------------------- istek yolu --------------------
+def get(symbol: str, kind: str, coin_input: str) -> Optional[Dict[str, Any]]:
+    """Hazır ve güncel sonuç (yoksa None → çağıran kendisi hesaplar). İsabet/ıska sayılır."""
+    if not _started:
+        return None
+    with _lock:
+        coin = _hot.get(symbol)
+        if coin is None:
+            _cold[kind] += 1
+            _cold_symbols[symbol] += 1
+            return None
+        snap = _snapshots.get((symbol, kind))
+        # metin başlığı coin girdisini içerir ("BTC"); farklı yazımda yeniden hesapla
+        if snap is None or coin_input.lower() != coin or not _is_fresh(snap, time.time()):
+            _not_ready[kind] += 1
+            return None
+        _hits[kind] += 1
+        return snap["result"]
+
+
+def record_price(symbol: str) -> None:
+    """/fiyat isteği: fiyat her sembol için snapshot'tan gelir, burada sadece sıcak küme isabeti sayılır."""
+    if not _started:
+        return
+    with _lock:
+        if symbol in _hot:
+            _hits["price"] += 1
+        else:
+            _cold["price"] += 1
+            _cold_symbols[symbol] += 1
+
+
+# -------------------- arka plan yenileme --------------------
+def _refresh(symbol: str, kind: str) -> None:
+    """builder taze mumlarla çalışır; indikatörler açık mumun son kapanış/hacmine göre yeniden hesaplanır."""
+    t = time.perf_counter()
+    try:
+        with _lock:
+            prev = _snapshots.get((symbol, kind))
+        result = _builder(symbol, kind, _hot[symbol])
+        if result is not None:
+            key, render_fn = result["chart"]
+            if render_fn is not None:
+                # PNG chart cache'e; istekte sadece gönderilir. Aynı mumdaki yenilemede anahtar
+                # değişmez, get_or_render eski grafiği döndürürdü → zorla yeniden çiz
+                if prev is not None and prev["valid_until"] == result["valid_until"]:
+                    refresh(key, render_fn)
+                else:
+                    get_or_render(key, render_fn)
+            with _lock:
+                _snapshots[(symbol, kind)] = {"result": result, "valid_until": result["valid_until"],
+                                              "at": time.time()}
+                _refresh_stats["refreshes"] += 1
+                _refresh_stats["seconds"] += time.perf_counter() - t
+    except Exception as e:
+        with _lock:
+            _refresh_stats["errors"] += 1
+        print(f"⚠️ Watchlist yenileme hatası ({symbol} {kind}): {e}")
+    finally:
+        with _lock:
+            _refreshing.discard((symbol, kind))
+
+
+def _track_all(hot: Dict[str, str]) -> None:
+    """Sıcak küme serilerini streaming indikatörlere tohumla (arka planda, store'u da ısıtır)."""
+    for symbol in hot:
+        for tf in WATCHLIST_TIMEFRAMES:
+            try:
+                track(symbol, tf)
+            except Exception as e:
+                print(f"⚠️ Watchlist izleme hatası ({symbol} {tf}): {e}")
+
+
+def closed_indicators(symbol: str, tf: str) -> Optional[Dict[str, float]]:
+    """Sıcak sembolün son kapanmış mumdaki indikatörleri (streaming state; hesaplama yok)."""
+    state = get_state(symbol, tf)
+    return state.values() if state is not None else None
+
+
+def _tick() -> None:
+    now = time.time()
+    due = []
+    with _lock:
+        for symbol in _hot:
+            for kind in KINDS:
+                snap = _snapshots.get((symbol, kind))
+                if (symbol, kind) in _refreshing or (snap is not None and _is_fresh(snap, now)):
+                    continue
+                _refreshing.add((symbol, kind))
+                due.append((symbol, kind))
+    for symbol, kind in due:
+        _pool.submit(_refresh, symbol, kind)
+
+
+def _loop() -> None:
+    while True:
+        try:
+            _tick()
+        except Exception as e:
+            print(f"⚠️ Watchlist döngü hatası: {e}")
+        time.sleep(WATCHLIST_TICK)
+
+
+def start(builder: Callable[[str, str, str], Optional[Dict[str, Any]]]) -> None:
+    """
+    builder(symbol, kind, coin) → {'text', 'chart': (anahtar, render), 'valid_until'} ya da None.
+    register_analysis_commands çağırır; birden fazla çağrı tek döngü başlatır.
+    """
+    global _builder, _pool, _started
+    if not WATCHLIST_ENABLED or _started:
+        return
+    hot = _resolve_hot_set()
+    with _lock:
+        _hot.update(hot)
+    _builder = builder
+    _pool = ThreadPoolExecutor(max_workers=WATCHLIST_WORKERS, thread_name_prefix="watchlist")
+    _started = True
+    _pool.submit(_track_all, hot)
+    threading.Thread(target=_loop, name="watchlist", daemon=True).start()
+    print(f"🔥 Watchlist: {len(hot)} coin × {len(KINDS)} analiz önceden hazırlanıyor")
+
+
+def get_watchlist_stats() -> Dict[str, Any]:
+    now = time.time()
+    with _lock:
+        ready = sum(1 for s in _snapshots.values() if _is_fresh(s, now))
+        kinds = set(_hits) | set(_cold) | set(_not_ready)
+        per_kind = {k: {"hits": _hits[k], "cold": _cold[k], "not_ready": _not_ready[k]} for k in kinds}
+        total = sum(_hits.values()) + sum(_cold.values()) + sum(_not_ready.values())
+        refreshes = _refresh_stats["refreshes"]
+        hot = list(_hot)
+    oversold, overbought = [], []
+    for symbol in hot:
+        for tf in WATCHLIST_TIMEFRAMES:
+            v = closed_indicators(symbol, tf)
+            if v is None:
+                continue
+            if v["rsi"] < 30:
+                oversold.append((symbol, tf, round(v["rsi"], 1)))
+            elif v["rsi"] > 70:
+                overbought.append((symbol, tf, round(v["rsi"], 1)))
+    with _lock:
+        return {
+            "hot": len(_hot),
+            "ready": ready,
+            "slots": len(_hot) * len(KINDS),
+            "hit_rate": round(sum(_hits.values()) / total, 3) if total else None,
+            "per_kind": per_kind,
+            "top_cold": _cold_symbols.most_common(5),
+            "refreshes": refreshes,
+            "errors": _refresh_stats["errors"],
+            "avg_refresh_s": round(_refresh_stats["seconds"] / refreshes, 2) if refreshes else None,
+            "oversold": oversold,
+            "overbought": overbought,
+        }
@@ -0,0 +1,177 @@
+"""
+services/webhook_server.py
+- Webhook modu (BOT_UPDATE_MODE = "webhook"): Telegram update'leri HTTP POST ile gelir
+- İstek thread'i sadece secret token'ı doğrular (WEBHOOK_URL varsa secret zorunlu; verilmezse
+  rastgele üretilip set_webhook'a geçilir), update'i kuyruğa yazar ve hemen 200 döner
+- Worker thread'leri kuyruktaki update'leri bot.process_new_updates ile işler
+- Kuyruk doluysa 503 → Telegram aynı update'i sonra tekrar gönderir
+- Yerel test: kayıtlı update JSON'larını POST'la
+    python -m services.webhook_server updates.jsonl [http://127.0.0.1:8443/telegram]
+"""
+
+from __future__ import annotations
+import hmac
+import json
+import queue
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+from telebot import types
+
+from config import (
+    WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_PATH, WEBHOOK_URL, WEBHOOK_SECRET,
+    WEBHOOK_WORKERS, WEBHOOK_QUEUE_SIZE,
+)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+MAX_BODY = 1 << 20   # tek update için 1 MB yeter
+
+_server: Optional["WebhookServer"] = None
+
+
+class WebhookServer:
+    def __init__(self, bot, host: str = WEBHOOK_HOST, port: int = WEBHOOK_PORT, path: str = WEBHOOK_PATH,
+                 secret: Optional[str] = WEBHOOK_SECRET, workers: int = WEBHOOK_WORKERS,
+                 queue_size: int = WEBHOOK_QUEUE_SIZE):
+        self.bot = bot
+        self.path = path
+        if WEBHOOK_URL and not secret:
+            # genel adrese açık sunucu doğrulamasız kalmasın: Telegram'a bu token kaydedilir
+            secret = secrets.token_urlsafe(32)
+            print("🔐 WEBHOOK_SECRET yok, bu çalıştırma için rastgele secret token üretildi")
+        self.secret = secret
+        self.workers = workers
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._stats = {"received": 0, "rejected": 0, "dropped": 0, "processed": 0, "errors": 0}
+        self._stats_lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+
+    # -------------------- HTTP --------------------
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, code: int, body: bytes = b"") -> None:
+                self.send_response(code)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                if self.path.split("?", 1)[0] != server.path:
+                    return self._reply(404)
+                if server.secret and not hmac.compare_digest(
+                    self.headers.get(SECRET_HEADER, ""), server.secret
+                ):
+                    server._count("rejected")
+                    return self._reply(403)
+                length = int(self.headers.get("Content-Length") or 0)
+                if length <= 0 or length > MAX_BODY:
+                    return self._reply(400)
+                code = server.accept(self.rfile.read(length))
+                self._reply(code, b"ok" if code == 200 else b"")
+
+        return Handler
+
+    def accept(self, body: bytes) -> int:
+        """Ham update gövdesini kuyruğa al; HTTP durum kodu döner."""
+        try:
+            update = types.Update.de_json(body.decode("utf-8"))
+        except Exception:
+            return 400
+        try:
+            self._queue.put_nowait(update)
+        except queue.Full:
+            self._count("dropped")
+            return 503
+        self._count("received")
+        return 200
+
+    # -------------------- işleme --------------------
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def _worker(self) -> None:
+        while True:
+            update = self._queue.get()
+            if update is None:
+                return
+            try:
+                self.bot.process_new_updates([update])
+                self._count("processed")
+            except Exception as e:
+                self._count("errors")
+                print(f"⚠️ Webhook update işlenemedi ({update.update_id}): {e}")
+
+    def start(self, allowed_updates: Optional[List[str]] = None) -> None:
+        """Worker'ları ve HTTP sunucusunu (arka planda) başlat, WEBHOOK_URL varsa Telegram'a kaydet."""
+        global _server
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker, name=f"webhook-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        threading.Thread(target=self.httpd.serve_forever, name="webhook-http", daemon=True).start()
+        _server = self
+        host, port = self.httpd.server_address[:2]
+        print(f"🌐 Webhook dinleniyor: http://{host}:{port}{self.path} ({self.workers} worker)")
+        if WEBHOOK_URL:
+            self.bot.set_webhook(url=WEBHOOK_URL, secret_token=self.secret,
+                                 allowed_updates=allowed_updates, drop_pending_updates=True)
+            print(f"🔗 Webhook Telegram'a kaydedildi: {WEBHOOK_URL}")
+
+    def serve_forever(self, allowed_updates: Optional[List[str]] = None) -> None:
+        self.start(allowed_updates)
+        try:
+            while True:
+                time.sleep(3600)
+        finally:
+            self.stop()
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        for _ in self._threads:
+            self._queue.put(None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            out = dict(self._stats)
+        out["queued"] = self._queue.qsize()
+        return out
+
+
+def get_webhook_stats() -> Dict[str, Any]:
+    return _server.get_stats() if _server is not None else {}
+
+
+# -------------------- yerel test --------------------
+def post_updates(path: str, url: Optional[str] = None, secret: Optional[str] = WEBHOOK_SECRET) -> None:
+    """Satır başına bir update JSON'u içeren dosyayı webhook'a POST'la (kayıtlı trafik oynatma)."""
+    import requests
+    url = url or f"http://127.0.0.1:{WEBHOOK_PORT}{WEBHOOK_PATH}"
+    headers = {"Content-Type": "application/json"}
+    if secret:
+        headers[SECRET_HEADER] = secret
+    codes: Dict[int, int] = {}
+    t = time.time()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            r = requests.post(url, data=line.encode("utf-8"), headers=headers, timeout=10)
+            codes[r.status_code] = codes.get(r.status_code, 0) + 1
+    print(f"📨 {sum(codes.values())} update gönderildi, {time.time() - t:.2f}s, durum kodları: {codes}")
+
+
+if __name__ == "__main__":
+    import sys
+    post_updates(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
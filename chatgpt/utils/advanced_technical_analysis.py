@@ -6,6 +6,7 @@ Gelişmiş teknik indikatörler ve çoklu timeframe analizi
 import pandas as pd
 import numpy as np
 from config import *
+from utils.technical_analysis import find_support_levels, find_resistance_levels  # ortak pivot bulucu
 
 def calculate_rsi(prices, window=14):
     """RSI (Relative Strength Index) hesapla"""
@@ -383,34 +384,6 @@ def calculate_entry_exit_points(df, current_price, bb_data, signals):
         print(f"Entry/Exit hesaplama hatası: {e}")
         return {}
 
-def find_support_levels(df, current_price, window=5):
-    """Destek seviyelerini bul"""
-    try:
-        lows = []
-        for i in range(window, len(df) - window):
-            if all(df['low'].iloc[i] <= df['low'].iloc[i-j] for j in range(1, window+1)) and \
-               all(df['low'].iloc[i] <= df['low'].iloc[i+j] for j in range(1, window+1)):
-                if df['low'].iloc[i] < current_price:  # Sadece mevcut fiyatın altındaki destekler
-                    lows.append(df['low'].iloc[i])
-        
-        return sorted(lows, reverse=True)[:3]  # En yakın 3 destek
-    except:
-        return []
-
-def find_resistance_levels(df, current_price, window=5):
-    """Direnç seviyelerini bul"""
-    try:
-        highs = []
-        for i in range(window, len(df) - window):
-            if all(df['high'].iloc[i] >= df['high'].iloc[i-j] for j in range(1, window+1)) and \
-               all(df['high'].iloc[i] >= df['high'].iloc[i+j] for j in range(1, window+1)):
-                if df['high'].iloc[i] > current_price:  # Sadece mevcut fiyatın üstündeki dirençler
-                    highs.append(df['high'].iloc[i])
-        
-        return sorted(highs)[:3]  # En yakın 3 direnç
-    except:
-        return []
-
 # =============================================================================
 # YARDIMCI FONKSİYONLAR
 # =============================================================================
@@ -3,14 +3,20 @@ Binance API Utils (fixed)
 - Case-insensitive coin eşleştirme
 - USDT paritelerini önbelleğe alma
 - Güvenli OHLC (kline) veri dönüşümü
+- Kline store: kapanmış mumlar saklanır, sadece kuyruk yenilenir
 """
 
 from __future__ import annotations
 import time
+import threading
+import warnings
+from collections import OrderedDict
+import numpy as np
 import requests
 import pandas as pd
-from typing import Dict, Optional, List
+from typing import Callable, Dict, Optional, List
 from config import *
+from services.market import get_ticker
 
 # -------------------------------------------------------------------
 # Global state
@@ -159,66 +165,210 @@ def find_binance_symbol(coin_input: str) -> Optional[str]:
 # -------------------------------------------------------------------
 # OHLC (Kline) verisi
 # -------------------------------------------------------------------
-def get_binance_ohlc(symbol: str, interval: str = "1h", limit: int = 200) -> Optional[pd.DataFrame]:
+KLINE_COLS = ["open_time","open","high","low","close","volume","close_time","qav","num_trades","taker_base","taker_quote","ignore"]
+_KLINE_INT_COLS = ("open_time", "close_time", "num_trades")
+KLINE_MAX_ROWS = 1000          # Binance tek istek limiti; store bundan fazlasını tutmaz
+_CLOSED_MARGIN_MS = 5000       # saat kayması payı: bu kadar eski close_time'lar kapanmış sayılır
+
+# (SYMBOL, interval) -> {"rows": kapanmış mumlar (N, 12) float64, "lock": Lock}
+_kline_store: "OrderedDict[tuple, dict]" = OrderedDict()
+_kline_store_lock = threading.Lock()
+# Yeni kapanmış mum gelince çağrılır: callback(symbol, interval, kapanmış_mumlar)
+_kline_listeners: List[Callable[[str, str, np.ndarray], None]] = []
+_kline_stats = {"full": 0, "tail": 0}
+
+
+def _decode_klines_payload(raw: bytes) -> Optional[np.ndarray]:
     """
-    Kline verisi al ve DataFrame döndür.
-    Kolonlar: open_time, open, high, low, close, volume, close_time
-    Index: pandas datetime (close_time)
+    Hızlı yol: /klines JSON gövdesini Python nesnesi üretmeden (N, 12) float64'e çevir.
+    Köşeli parantez ve tırnaklar atılır, kalan virgüllü sayı dizisi np.fromstring ile
+    tek seferde okunur. Beklenmeyen format (eksik alan, hata gövdesi) → None, yavaş yola düşülür.
     """
+    raw = raw.strip()
+    if not raw.startswith(b"[") or raw.startswith(b"[]"):
+        return None
+    rows = raw.count(b"],[") + 1
     try:
-        if interval not in INTERVAL_MAP:
-            interval = "1h"
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")   # eski NumPy: okunamayan gövdede uyarı verip kısa döner
+            flat = np.fromstring(raw.translate(None, b'[]"').decode("ascii", "replace"), sep=",")
+    except ValueError:
+        return None
+    if flat.size != rows * len(KLINE_COLS) or not np.isfinite(flat).all():
+        return None
+    return flat.reshape(rows, len(KLINE_COLS))
+
+
+def _parse_klines(klines: list) -> np.ndarray:
+    """Ham kline listesi -> (N, 12) float64 (bozuk satırlar atlanır) - yavaş/güvenli yol"""
+    rows: List[List[float]] = []
+    for k in klines:
+        # k = [ open_time, open, high, low, close, volume, close_time, ... ]
+        try:
+            rows.append([
+                int(k[0]),
+                float(k[1]),
+                float(k[2]),
+                float(k[3]),
+                float(k[4]),
+                float(k[5]),
+                int(k[6]),
+                float(k[7]),
+                int(k[8]),
+                float(k[9]),
+                float(k[10]),
+                float(k[11]) if len(k) > 11 else 0.0
+            ])
+        except Exception:
+            continue
+    return np.array(rows, dtype=np.float64).reshape(-1, len(KLINE_COLS))
+
+
+def _klines_to_df(arr: np.ndarray) -> pd.DataFrame:
+    df = pd.DataFrame(arr, columns=KLINE_COLS)
+    for c in _KLINE_INT_COLS:
+        df[c] = df[c].astype(np.int64)
+    # datetime index (close_time)
+    df["dt"] = pd.to_datetime(df["close_time"], unit="ms")
+    df.set_index("dt", inplace=True)
+    return df[["open","high","low","close","volume","open_time","close_time"]]
+
+
+def _fetch_klines(symbol: str, interval: str, limit: int, start_time: Optional[int] = None) -> Optional[np.ndarray]:
+    params = {"symbol": symbol, "interval": INTERVAL_MAP[interval], "limit": limit}
+    if start_time is not None:
+        params["startTime"] = start_time
+    resp = _safe_request(KLINES_URL, params=params, timeout=20)
+    if not resp:
+        return None
+    arr = _decode_klines_payload(resp.content)
+    if arr is not None:
+        return arr
+    klines = resp.json()
+    if not isinstance(klines, list):
+        return None
+    return _parse_klines(klines)
 
-        params = {
-            "symbol": symbol.upper(),
-            "interval": INTERVAL_MAP[interval],
-            "limit": max(10, min(int(limit or 200), 1000)),
-        }
 
-        resp = _safe_request(KLINES_URL, params=params, timeout=20)
-        if not resp:
-            return None
+def _store_entry(key: tuple) -> dict:
+    with _kline_store_lock:
+        entry = _kline_store.get(key)
+        if entry is None:
+            entry = _kline_store[key] = {"rows": None, "lock": threading.Lock()}
+            while len(_kline_store) > KLINE_STORE_MAX_SERIES:
+                _kline_store.popitem(last=False)
+        else:
+            _kline_store.move_to_end(key)
+        return entry
 
-        klines = resp.json()
-        if not isinstance(klines, list) or not klines:
-            return None
 
-        cols = ["open_time","open","high","low","close","volume","close_time","qav","num_trades","taker_base","taker_quote","ignore"]
-        rows: List[List] = []
-        for k in klines:
-            # k = [ open_time, open, high, low, close, volume, close_time, ... ]
-            try:
-                rows.append([
-                    int(k[0]),
-                    float(k[1]),
-                    float(k[2]),
-                    float(k[3]),
-                    float(k[4]),
-                    float(k[5]),
-                    int(k[6]),
-                    float(k[7]),
-                    int(k[8]),
-                    float(k[9]),
-                    float(k[10]),
-                    float(k[11]) if len(k) > 11 else 0.0
-                ])
-            except Exception:
-                continue
+def subscribe_klines(callback: Callable[[str, str, np.ndarray], None]) -> None:
+    """Store'a yeni kapanmış mum eklendiğinde çağrılacak callback (örn. streaming indikatörler)."""
+    if callback not in _kline_listeners:
+        _kline_listeners.append(callback)
 
-        if not rows:
-            return None
 
-        df = pd.DataFrame(rows, columns=cols)
-        # datetime index (close_time)
-        df["dt"] = pd.to_datetime(df["close_time"], unit="ms")
-        df.set_index("dt", inplace=True)
-        return df[["open","high","low","close","volume","open_time","close_time"]]
+def _notify_klines(symbol: str, interval: str, closed: np.ndarray) -> None:
+    for cb in list(_kline_listeners):
+        try:
+            cb(symbol, interval, closed)
+        except Exception as e:
+            print(f"⚠️ kline listener hatası: {e}")
+
+
+def get_klines_array(symbol: str, interval: str = "1h", limit: int = 200) -> Optional[np.ndarray]:
+    """
+    Son `limit` mum (sonuncusu açık mum olabilir) (N, 12) dizi olarak.
+    Kapanmış mumlar (symbol, interval) başına saklanır; sonraki çağrılarda sadece
+    son kapanmış mumdan sonrası istenir (genelde 1-2 satırlık küçük istek).
+    """
+    if interval not in INTERVAL_MAP:
+        interval = "1h"
+    symbol = symbol.upper()
+    limit = max(10, min(int(limit or 200), KLINE_MAX_ROWS))
+    entry = _store_entry((symbol, interval))
+
+    with entry["lock"]:
+        closed = entry["rows"]
+        fresh = None
+        if closed is not None and len(closed) >= limit - 1:
+            # Kuyruk yenileme: son kapanmış mumun close_time'ından sonrası
+            fresh = _fetch_klines(symbol, interval, KLINE_MAX_ROWS, start_time=int(closed[-1, 6]) + 1)
+            if fresh is not None and len(fresh) >= KLINE_MAX_ROWS:
+                fresh = None          # arada çok mum birikmiş, baştan indir
+                closed = None
+            elif fresh is not None:
+                _kline_stats["tail"] += 1
+        if fresh is None:
+            closed = None
+            fresh = _fetch_klines(symbol, interval, limit)
+            if fresh is None:
+                return None
+            _kline_stats["full"] += 1
+
+        now_ms = time.time() * 1000
+        is_closed = fresh[:, 6] + _CLOSED_MARGIN_MS < now_ms
+        new_closed, live = fresh[is_closed], fresh[~is_closed]
+        if closed is not None and len(new_closed):
+            new_closed = new_closed[new_closed[:, 0] > closed[-1, 0]]
+            closed = np.concatenate([closed, new_closed])[-KLINE_MAX_ROWS:]
+        elif closed is None:
+            closed = new_closed
+        entry["rows"] = closed
+
+        out = np.concatenate([closed, live]) if len(live) else closed
+    if len(new_closed) and _kline_listeners:
+        _notify_klines(symbol, interval, closed)
+    return out[-limit:]
+
+
+def get_binance_ohlc(symbol: str, interval: str = "1h", limit: int = 200) -> Optional[pd.DataFrame]:
+    """
+    Kline verisi al ve DataFrame döndür.
+    Kolonlar: open_time, open, high, low, close, volume, close_time
+    Index: pandas datetime (close_time)
+    Kapanmış mumlar saklanır; tekrar çağrılarda sadece yeni mumlar indirilir.
+    """
+    try:
+        arr = get_klines_array(symbol, interval, limit)
+        if arr is None or not len(arr):
+            return None
+        return _klines_to_df(arr)
 
     except Exception as e:
         print(f"OHLC veri hatası ({symbol}, {interval}): {e}")
         return None
 
 
+def benchmark_kline_parse(n: int = 1000, repeats: int = 200) -> None:
+    """1000 mumluk /klines gövdesi için çözme süreleri (eski satır döngüsü vs hızlı yol)."""
+    import json
+    hour = 3_600_000
+    payload = json.dumps([
+        [i * hour, f"{i * 1.1:.8f}", f"{i * 1.2:.8f}", f"{i * 0.9:.8f}", f"{i:.8f}", f"{i * 10:.8f}",
+         i * hour + hour - 1, f"{i * 3.3:.8f}", 1234, f"{1.1:.8f}", f"{2.2:.8f}", "0"]
+        for i in range(1000, 1000 + n)
+    ], separators=(",", ":")).encode()
+
+    cases = [
+        ("json + satır döngüsü", lambda: _parse_klines(json.loads(payload))),
+        ("hızlı yol (ndarray)", lambda: _decode_klines_payload(payload)),
+        ("json + döngü + DataFrame", lambda: _klines_to_df(_parse_klines(json.loads(payload)))),
+        ("hızlı yol + DataFrame", lambda: _klines_to_df(_decode_klines_payload(payload))),
+    ]
+    assert np.array_equal(_decode_klines_payload(payload), _parse_klines(json.loads(payload)))
+    for name, fn in cases:
+        t = time.perf_counter()
+        for _ in range(repeats):
+            fn()
+        print(f"{name:28s}: {(time.perf_counter() - t) / repeats * 1000:.3f} ms ({n} mum)")
+
+
+def get_kline_store_stats() -> Dict[str, int]:
+    with _kline_store_lock:
+        return {"series": len(_kline_store), **_kline_stats}
+
+
 # -------------------------------------------------------------------
 # Fiyat/İstatistik yardımcıları (opsiyonel ama faydalı)
 # -------------------------------------------------------------------
@@ -240,10 +390,13 @@ def get_24h_stats(symbol: str) -> Optional[dict]:
     24s istatistikler: lastPrice, priceChangePercent, volume, highPrice, lowPrice
     """
     try:
-        resp = _safe_request(TICKER_24H_URL, params={"symbol": symbol.upper()}, timeout=10)
-        if not resp:
-            return None
-        data = resp.json()
+        # Önce services/market'in ortak snapshot'ı; sembol orada yoksa tekil istek
+        data = get_ticker(symbol)
+        if not data:
+            resp = _safe_request(TICKER_24H_URL, params={"symbol": symbol.upper()}, timeout=10)
+            if not resp:
+                return None
+            data = resp.json()
         return {
             "price": float(data.get("lastPrice", 0) or 0),
             "change_24h": float(data.get("priceChangePercent", 0) or 0),
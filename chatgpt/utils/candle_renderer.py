@@ -0,0 +1,157 @@
+"""
+Ortak vektörel mum / bar çizimi
+- Tüm mumlar tek LineCollection (fitiller) + tek PolyCollection (gövdeler)
+- Bar grafikleri (hacim, MACD histogramı) tek PolyCollection
+- 168 mumluk grafik yüzlerce artist yerine birkaç artist ile çizilir
+"""
+
+import numpy as np
+import matplotlib.colors as mcolors
+from matplotlib.collections import LineCollection, PolyCollection
+
+
+def _rgba(colors, alpha):
+    """Renk(ler) + alpha(lar) -> (N, 4) RGBA dizisi"""
+    rgba = mcolors.to_rgba_array(colors)
+    rgba[:, 3] = alpha
+    return rgba
+
+
+def _rects(x, bottom, top, width):
+    """(N, 4, 2) dikdörtgen köşe dizisi"""
+    x = np.asarray(x, dtype=float)
+    left, right = x - width / 2, x + width / 2
+    return np.stack([
+        np.column_stack([left, bottom]),
+        np.column_stack([left, top]),
+        np.column_stack([right, top]),
+        np.column_stack([right, bottom]),
+    ], axis=1)
+
+
+def draw_candles(ax, x, open_, high, low, close, up_color, down_color,
+                 body_width=0.6, wick_width=1.0, wick_alpha=1.0,
+                 body_alpha=1.0, body_linewidth=1.0, flat_body_alpha=None,
+                 doji_line_width=None):
+    """
+    Mumları iki collection ile çiz.
+    - flat_body_alpha: open == close olan gövdelerin alpha'sı (None = body_alpha)
+    - doji_line_width: verilirse open == close mumlar gövde yerine bu genişlikte
+      yatay çizgi olarak (fitil collection'ına) eklenir
+    Dönüş: (wicks, bodies)
+    """
+    x = np.asarray(x, dtype=float)
+    o = np.asarray(open_, dtype=float)
+    h = np.asarray(high, dtype=float)
+    l = np.asarray(low, dtype=float)
+    c = np.asarray(close, dtype=float)
+
+    up = c >= o
+    colors = np.where(up, mcolors.to_hex(up_color), mcolors.to_hex(down_color))
+    flat = c == o
+
+    # Fitiller: low -> high dikey segment
+    segments = np.stack([np.column_stack([x, l]), np.column_stack([x, h])], axis=1)
+    wick_colors = _rgba(colors, wick_alpha)
+    if doji_line_width is not None and flat.any():
+        xd, cd = x[flat], c[flat]
+        doji = np.stack([np.column_stack([xd - doji_line_width / 2, cd]),
+                         np.column_stack([xd + doji_line_width / 2, cd])], axis=1)
+        segments = np.concatenate([segments, doji])
+        wick_colors = np.concatenate([wick_colors, _rgba(colors[flat], wick_alpha)])
+    wicks = LineCollection(segments, colors=wick_colors, linewidths=wick_width, zorder=2)
+
+    # Gövdeler: open/close dikdörtgeni
+    keep = ~flat if doji_line_width is not None else np.ones(len(x), dtype=bool)
+    bottom = np.minimum(o, c)[keep]
+    top = np.maximum(o, c)[keep]
+    alphas = np.full(len(x), body_alpha, dtype=float)
+    if flat_body_alpha is not None:
+        alphas[flat] = flat_body_alpha
+    body_colors = _rgba(colors[keep], alphas[keep])
+    bodies = PolyCollection(_rects(x[keep], bottom, top, body_width),
+                            facecolors=body_colors, edgecolors=body_colors,
+                            linewidths=body_linewidth, zorder=1)
+
+    ax.add_collection(bodies)
+    ax.add_collection(wicks)
+    ax.autoscale_view()
+    return wicks, bodies
+
+
+def draw_bars(ax, x, heights, colors, width=0.8, alpha=1.0):
+    """ax.bar yerine: tüm barlar tek PolyCollection (negatif yükseklik desteklenir)"""
+    x = np.asarray(x, dtype=float)
+    heights = np.nan_to_num(np.asarray(heights, dtype=float))
+    bottom = np.minimum(heights, 0)
+    top = np.maximum(heights, 0)
+    rgba = _rgba(np.broadcast_to(np.asarray(colors, dtype=object), x.shape).tolist(), alpha)
+    bars = PolyCollection(_rects(x, bottom, top, width), facecolors=rgba,
+                          edgecolors='none', zorder=1)
+    ax.add_collection(bars)
+    ax.autoscale_view()
+    return bars
+
+
+def direction_colors(close, first_color, up_color, down_color):
+    """Önceki kapanışa göre bar renkleri (ilk bar first_color) - vektörel"""
+    close = np.asarray(close, dtype=float)
+    colors = np.where(np.r_[False, close[1:] >= close[:-1]], up_color, down_color).astype(object)
+    if len(colors):
+        colors[0] = first_color
+    return colors.tolist()
+
+
+def benchmark_candle_render(n=168, repeats=3, dpi=150):
+    """
+    Eski mum başına ax.plot + Rectangle yaklaşımı ile collection tabanlı çizimi karşılaştır.
+    Çizim + PNG kaydetme süresi ve artist sayısı yazdırılır.
+    """
+    import time
+    from io import BytesIO
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from matplotlib.patches import Rectangle
+
+    rng = np.random.default_rng(0)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.005, n))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.005, n))
+    volume = rng.uniform(1e3, 1e6, n)
+
+    def legacy():
+        fig, (ax, axv) = plt.subplots(2, 1, figsize=(16, 10))
+        for i in range(n):
+            color = '#3fb950' if close[i] >= open_[i] else '#f85149'
+            ax.plot([i, i], [low[i], high[i]], color=color, linewidth=1, alpha=0.8)
+            height = abs(close[i] - open_[i])
+            ax.add_patch(Rectangle((i - 0.3, min(close[i], open_[i])), 0.6, height,
+                                   facecolor=color, edgecolor=color, alpha=0.9))
+        axv.bar(range(n), volume, color=['#3fb950'] * n, alpha=0.7, width=0.8)
+        for i in range(n):
+            if volume[i] > volume.mean() * 1.5:
+                axv.scatter(i, volume[i], s=30, marker='*')
+        return fig, ax, axv
+
+    def batched():
+        fig, (ax, axv) = plt.subplots(2, 1, figsize=(16, 10))
+        draw_candles(ax, np.arange(n), open_, high, low, close, '#3fb950', '#f85149',
+                     wick_alpha=0.8, body_alpha=0.9, flat_body_alpha=0.5)
+        draw_bars(axv, np.arange(n), volume, '#3fb950', alpha=0.7)
+        spikes = np.flatnonzero(volume > volume.mean() * 1.5)
+        axv.scatter(spikes, volume[spikes], s=30, marker='*')
+        return fig, ax, axv
+
+    for name, build in (("per-candle", legacy), ("collections", batched)):
+        times = []
+        for _ in range(repeats):
+            t = time.perf_counter()
+            fig, ax, axv = build()
+            buf = BytesIO()
+            fig.savefig(buf, format='png', dpi=dpi)
+            times.append(time.perf_counter() - t)
+            artists = len(ax.get_children()) + len(axv.get_children())
+            plt.close(fig)
+        print(f"{name:12s}: {min(times) * 1000:7.1f} ms, {artists} artist ({n} mum)")
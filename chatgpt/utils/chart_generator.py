@@ -17,6 +17,8 @@ import re
 
 from config import *
 from utils.technical_analysis import *
+from utils.candle_renderer import direction_colors
+from services.render_service import agg_figure
 
 # Matplotlib ayarları
 plt.style.use('dark_background')
@@ -248,7 +250,7 @@ def create_macd_chart(ax, df, analysis_data):
         ax.plot(df.index, macd_data['macd'], color='#2196f3', linewidth=2, label='MACD')
         ax.plot(df.index, macd_data['signal'], color='#ff9800', linewidth=2, label='Signal')
         
-        hist_colors = ['#4caf50' if val >= 0 else '#f44336' for val in macd_data['histogram']]
+        hist_colors = np.where(macd_data['histogram'].to_numpy() >= 0, '#4caf50', '#f44336')
         ax.bar(df.index, macd_data['histogram'], color=hist_colors, alpha=0.6, width=0.8)
         ax.axhline(y=0, color='white', linestyle='-', alpha=0.3, linewidth=1)
         
@@ -274,13 +276,7 @@ def create_volume_chart(ax, df):
     try:
         ax.set_facecolor('#1a1d29')
         
-        bar_colors = []
-        for i in range(len(df)):
-            if i == 0:
-                bar_colors.append('#2196f3')
-            else:
-                color = '#4caf50' if df['close'].iloc[i] >= df['close'].iloc[i-1] else '#f44336'
-                bar_colors.append(color)
+        bar_colors = direction_colors(df['close'], '#2196f3', '#4caf50', '#f44336')
         
         ax.bar(df.index, df['volume'], color=bar_colors, alpha=0.7, width=0.8)
         
@@ -428,7 +424,8 @@ def create_signals_panel(ax, analysis_data):
 def create_multi_timeframe_chart(symbol, timeframe_results):
     """Çoklu timeframe karşılaştırma grafiği"""
     try:
-        fig, axes = plt.subplots(2, 2, figsize=(16, 10), facecolor='#0f1419')
+        fig = agg_figure('multi_timeframe', (16, 10), '#0f1419')
+        axes = fig.subplots(2, 2)
         fig.suptitle(_de_emoji(f'{symbol} - Çoklu Timeframe Analizi'), fontsize=16, color='white', fontweight='bold')
         
         timeframes = ['1h', '4h', '1d', '1w']
@@ -468,18 +465,16 @@ def create_multi_timeframe_chart(symbol, timeframe_results):
             ax.set_ylim(0, 1)
             ax.axis('off')
         
-        plt.tight_layout()
+        fig.tight_layout()
         
         img = BytesIO()
-        plt.savefig(img, format='png', dpi=150, bbox_inches='tight', 
+        fig.savefig(img, format='png', dpi=150, bbox_inches='tight', 
                     facecolor='#0f1419', edgecolor='none')
         img.seek(0)
-        plt.close()
         
         return img
     except Exception as e:
         print(f"Multi timeframe grafik hatası: {e}")
-        plt.close()
         return None
 
 def create_fibonacci_chart(df, symbol, fib_levels):
@@ -627,29 +622,4 @@ def create_simple_price_chart(symbol, price_data):
 if DEBUG_MODE:
     print("📊 Advanced chart generator utils yüklendi!")
 
-# --- Basit S/R yardımcıları (mevcut analiz kodlarıyla uyumlu)
-def find_support_levels(df, current_price, window=5):
-    """Destek seviyelerini bul"""
-    try:
-        lows = []
-        for i in range(window, len(df) - window):
-            if all(df['low'].iloc[i] <= df['low'].iloc[i-j] for j in range(1, window+1)) and \
-               all(df['low'].iloc[i] <= df['low'].iloc[i+j] for j in range(1, window+1)):
-                if df['low'].iloc[i] < current_price:
-                    lows.append(df['low'].iloc[i])
-        return sorted(lows, reverse=True)[:3]
-    except Exception:
-        return []
-
-def find_resistance_levels(df, current_price, window=5):
-    """Direnç seviyelerini bul"""
-    try:
-        highs = []
-        for i in range(window, len(df) - window):
-            if all(df['high'].iloc[i] >= df['high'].iloc[i-j] for j in range(1, window+1)) and \
-               all(df['high'].iloc[i] >= df['high'].iloc[i+j] for j in range(1, window+1)):
-                if df['high'].iloc[i] > current_price:
-                    highs.append(df['high'].iloc[i])
-        return sorted(highs)[:3]
-    except Exception:
-        return []
+# --- Basit S/R yardımcıları (find_support_levels / find_resistance_levels) utils.technical_analysis'ten gelir
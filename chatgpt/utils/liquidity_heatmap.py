@@ -1,6 +1,11 @@
 """
 Professional Volume-Based Liquidity Heatmap Generator
 CoinGlass tarzı profesyonel likidite haritası - Hatasız versiyon
+
+Aşamalı akış (tek hesap, her aşamaya aynı sonuç geçer):
+  fetch (mumlar) → levels (likidite seviyeleri) → analysis (anahtar seviyeler) → render (PNG)
+Sonuç (symbol, timeframe, lookback) anahtarıyla kısa süre saklanır; aynı anda gelen
+/likidite istekleri tek hesabı paylaşır.
 """
 
 import matplotlib.pyplot as plt
@@ -8,25 +13,35 @@ import matplotlib.patches as patches
 import matplotlib.colors as mcolors
 import numpy as np
 import pandas as pd
+import threading
+import time
 from io import BytesIO
 from utils.binance_api import get_binance_ohlc
+from utils.candle_renderer import draw_candles
+from services import render_service, chart_cache
+from config import LIQUIDITY_CACHE_TTL
 # import seaborn as sns
 
-def create_professional_liquidity_heatmap(symbol, timeframe='1h', lookback_hours=48):
+# -------------------- aşamalı akış --------------------
+_pipeline_lock = threading.Lock()
+_pipeline_cache = {}    # (symbol, timeframe, lookback) -> (ts, sonuç)
+_key_locks = {}         # aynı anahtar için tek hesap (single-flight)
+
+def fetch_liquidity_candles(symbol, timeframe='1h', lookback_hours=48):
+    """1. aşama: mumları al"""
+    df = get_binance_ohlc(symbol, interval=timeframe, limit=lookback_hours)
+    if df is None or df.empty:
+        return None
+    return df
+
+def render_liquidity_heatmap(symbol, df, liquidity_data):
     """
-    CoinGlass tarzı profesyonel likidite haritası oluştur
+    4. aşama: hesaplanmış seviyelerden PNG üret (veri çekmez, hesap yapmaz)
     """
     try:
-        # Veri al
-        df = get_binance_ohlc(symbol, interval=timeframe, limit=lookback_hours)
-        if df is None or df.empty:
-            return None
-
-        # Likidite seviyelerini hesapla
-        liquidity_data = calculate_liquidity_levels(df)
-        
         # Grafik oluştur - daha açık arkaplan
-        fig, ax = plt.subplots(1, 1, figsize=(20, 12), facecolor='#1a1a1a')
+        fig = render_service.agg_figure('liquidity_heatmap', (20, 12), '#1a1a1a')
+        ax = fig.add_subplot(1, 1, 1)
         ax.set_facecolor('#1a1a1a')
         
         # Likidite haritasını çiz
@@ -46,21 +61,145 @@ def create_professional_liquidity_heatmap(symbol, timeframe='1h', lookback_hours
         
         # Grafik kaydet - daha açık arkaplan
         img = BytesIO()
-        plt.savefig(img, format='png', dpi=300, bbox_inches='tight', 
+        fig.savefig(img, format='png', dpi=300, bbox_inches='tight', 
                     facecolor='#1a1a1a', edgecolor='none')
-        img.seek(0)
-        plt.close()
         
-        return img
+        return img.getvalue()
         
     except Exception as e:
         print(f"Likidite haritası oluşturma hatası: {e}")
-        plt.close()
         return None
 
+def _run_liquidity_pipeline(symbol, timeframe, lookback_hours):
+    df = fetch_liquidity_candles(symbol, timeframe, lookback_hours)
+    if df is None:
+        return None
+    liquidity_data = calculate_liquidity_levels(df)
+    if liquidity_data is None:
+        return None
+    analysis = analyze_key_liquidity_levels(liquidity_data)
+    key = chart_cache.make_key(symbol, timeframe, f'liquidity_{lookback_hours}', df)
+    image = chart_cache.get_or_render(
+        key, lambda: render_service.render('liquidity_heatmap', symbol, df, liquidity_data)
+    )
+    return {
+        'df': df,
+        'liquidity_data': liquidity_data,
+        'analysis': analysis,
+        'image_bytes': image,
+        'chart_key': key,
+    }
+
+def get_liquidity_pipeline(symbol, timeframe='1h', lookback_hours=48):
+    """
+    Tüm aşamaları bir kez çalıştır; sonuç LIQUIDITY_CACHE_TTL saniye saklanır.
+    Aynı anahtar için eşzamanlı çağrılar hesabın bitmesini bekleyip aynı sonucu alır.
+    """
+    key = (symbol, timeframe, lookback_hours)
+    with _pipeline_lock:
+        hit = _pipeline_cache.get(key)
+        if hit and time.time() - hit[0] < LIQUIDITY_CACHE_TTL:
+            return hit[1]
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+
+    with key_lock:
+        with _pipeline_lock:
+            hit = _pipeline_cache.get(key)
+            if hit and time.time() - hit[0] < LIQUIDITY_CACHE_TTL:
+                return hit[1]
+        result = _run_liquidity_pipeline(symbol, timeframe, lookback_hours)
+        now = time.time()
+        with _pipeline_lock:
+            if result is not None:
+                for k in [k for k, (ts, _) in _pipeline_cache.items() if now - ts >= LIQUIDITY_CACHE_TTL]:
+                    _pipeline_cache.pop(k, None)
+                _pipeline_cache[key] = (now, result)
+            # bekleyenler kilidi zaten tuttu ve cache'i görecek; sözlük sembollerle büyümesin
+            _key_locks.pop(key, None)
+        return result
+
+def create_professional_liquidity_heatmap(symbol, timeframe='1h', lookback_hours=48):
+    """
+    CoinGlass tarzı profesyonel likidite haritası oluştur
+    """
+    result = get_liquidity_pipeline(symbol, timeframe, lookback_hours)
+    if not result or not result['image_bytes']:
+        return None
+    return BytesIO(result['image_bytes'])   # her çağırana kendi okuma konumu
+
+def _level_volumes_loop(df, price_levels, proximity_threshold):
+    """
+    Eski satır satır hesap (referans). O(seviye × mum) - sadece parite testi için.
+    Dönüş: (level_volume, level_touches) listeleri
+    """
+    volumes, touches = [], []
+    for price_level in price_levels:
+        level_volume = 0
+        level_touches = 0
+        for i, row in df.iterrows():
+            # High/Low bu seviyeyi test ettiyse
+            if row['low'] <= price_level <= row['high']:
+                # Fiyata olan yakınlığa göre ağırlıklandır
+                distance = min(
+                    abs(row['high'] - price_level),
+                    abs(row['low'] - price_level),
+                    abs(row['close'] - price_level)
+                )
+                if distance <= proximity_threshold:
+                    weight = 1 - (distance / proximity_threshold)
+                    level_volume += row['volume'] * weight
+                    level_touches += 1
+        volumes.append(level_volume)
+        touches.append(level_touches)
+    return volumes, touches
+
+def _level_volumes(df, price_levels, proximity_threshold):
+    """
+    Vektörel hesap: her mum sadece high/low/close'a proximity_threshold mesafedeki
+    seviyeleri etkileyebilir. Seviyeler eşit aralıklı olduğundan her çapa (high, low, close)
+    için birkaç aday seviye index'i çıkarılır; aday (mum × aday) matrisi tek broadcast ile
+    değerlendirilir, sonuç bincount ile seviyelere toplanır. Maliyet O(mum), seviye sayısından bağımsız.
+    """
+    levels = np.asarray(price_levels, dtype=np.float64)
+    n_levels = len(levels)
+    high = df['high'].to_numpy(dtype=np.float64)
+    low = df['low'].to_numpy(dtype=np.float64)
+    close = df['close'].to_numpy(dtype=np.float64)
+    volume = df['volume'].to_numpy(dtype=np.float64)
+    if n_levels == 0 or len(high) == 0:
+        return np.zeros(n_levels), np.zeros(n_levels, dtype=np.int64)
+    if n_levels == 1 or proximity_threshold <= 0:
+        step = 1.0
+        cand = np.broadcast_to(np.arange(n_levels), (len(high), n_levels))
+    else:
+        step = (levels[-1] - levels[0]) / (n_levels - 1)
+        # çapa başına [x - eşik, x + eşik] aralığını kapsayan seviye index'leri (+1 pay)
+        width = int(np.ceil(2 * proximity_threshold / step)) + 3
+        anchors = np.stack([high, low, close], axis=1)                       # (N, 3)
+        first = np.floor((anchors - proximity_threshold - levels[0]) / step).astype(np.int64) - 1
+        cand = (first[:, :, None] + np.arange(width)).reshape(len(high), -1)  # (N, 3*width)
+        cand = np.clip(cand, 0, n_levels - 1)
+        cand.sort(axis=1)
+        # aynı mum için tekrar eden adayları ele (bir seviye bir mumdan bir kez sayılır)
+        dup = np.zeros(cand.shape, dtype=bool)
+        dup[:, 1:] = cand[:, 1:] == cand[:, :-1]
+
+    p = levels[cand]                                                          # (N, K)
+    h, l, c = high[:, None], low[:, None], close[:, None]
+    distance = np.minimum(np.minimum(np.abs(h - p), np.abs(l - p)), np.abs(c - p))
+    hit = (l <= p) & (p <= h) & (distance <= proximity_threshold)
+    if n_levels > 1 and proximity_threshold > 0:
+        hit &= ~dup
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weight = 1 - distance / proximity_threshold if proximity_threshold > 0 else np.ones_like(distance)
+    idx = cand[hit]
+    level_volume = np.bincount(idx, weights=(volume[:, None] * weight)[hit], minlength=n_levels)
+    level_touches = np.bincount(idx, minlength=n_levels)
+    return level_volume, level_touches
+
 def calculate_liquidity_levels(df, num_levels=30):
     """
-    Fiyat seviyelerinde likidite hesapla - optimized
+    Fiyat seviyelerinde likidite hesapla - vektörel (bkz. _level_volumes)
     """
     try:
         current_price = df['close'].iloc[-1]
@@ -75,41 +214,24 @@ def calculate_liquidity_levels(df, num_levels=30):
         # Fiyat seviyelerini oluştur
         price_levels = np.linspace(extended_low, extended_high, num_levels)
         
-        liquidity_levels = []
+        # Bu seviyelere yakın işlem gören volume'u hesapla
+        proximity_threshold = (extended_high - extended_low) / num_levels
+        level_volumes, level_touches = _level_volumes(df, price_levels, proximity_threshold)
         
-        for price_level in price_levels:
-            # Bu seviyeye yakın işlem gören volume'u hesapla
-            proximity_threshold = (extended_high - extended_low) / num_levels
-            
-            # Yakın fiyat seviyelerindeki volume'u topla
-            level_volume = 0
-            level_touches = 0
-            
-            for i, row in df.iterrows():
-                # High/Low bu seviyeyi test ettiyse
-                if row['low'] <= price_level <= row['high']:
-                    # Fiyata olan yakınlığa göre ağırlıklandır
-                    distance = min(
-                        abs(row['high'] - price_level),
-                        abs(row['low'] - price_level),
-                        abs(row['close'] - price_level)
-                    )
-                    
-                    if distance <= proximity_threshold:
-                        weight = 1 - (distance / proximity_threshold)
-                        level_volume += row['volume'] * weight
-                        level_touches += 1
-            
-            # Likidite gücü hesapla
-            liquidity_strength = level_volume * (1 + level_touches * 0.1)
-            
-            liquidity_levels.append({
-                'price': price_level,
-                'volume': level_volume,
-                'touches': level_touches,
-                'strength': liquidity_strength,
+        # Likidite gücü hesapla
+        strengths = level_volumes * (1 + level_touches * 0.1)
+        
+        liquidity_levels = [
+            {
+                'price': float(price_level),
+                'volume': float(level_volume),
+                'touches': int(touches),
+                'strength': float(strength),
                 'type': 'support' if price_level < current_price else 'resistance'
-            })
+            }
+            for price_level, level_volume, touches, strength
+            in zip(price_levels, level_volumes, level_touches, strengths)
+        ]
         
         # Manuel seviyeler ekle (current_price'ı geç)
         manual_levels = calculate_manual_levels(df, current_price)
@@ -240,31 +362,12 @@ def add_price_line(ax, df):
         # X ekseni için normalize edilmiş pozisyonlar
         x_positions = np.linspace(0.15, 0.85, len(recent_df))
         
-        # Candlestick benzeri çizim - daha belirgin
-        for i, (idx, row) in enumerate(recent_df.iterrows()):
-            x_pos = x_positions[i]
-            
-            # Renk belirle - daha parlak
-            color = '#00ff41' if row['close'] >= row['open'] else '#ff1744'
-            
-            # High-Low çizgisi - daha kalın
-            ax.plot([x_pos, x_pos], [row['low'], row['high']], 
-                   color=color, linewidth=1.5, alpha=1.0)
-            
-            # Open-Close dikdörtgeni - daha geniş
-            body_height = abs(row['close'] - row['open'])
-            body_bottom = min(row['close'], row['open'])
-            
-            if body_height > 0:
-                rect = patches.Rectangle(
-                    (x_pos - 0.006, body_bottom), 0.012, body_height,
-                    facecolor=color, alpha=1.0, edgecolor=color, linewidth=0.5
-                )
-                ax.add_patch(rect)
-            else:
-                # Doji - horizontal çizgi
-                ax.plot([x_pos - 0.004, x_pos + 0.004], [row['close'], row['close']], 
-                       color=color, linewidth=1.5, alpha=1.0)
+        # Candlestick benzeri çizim - daha belirgin, parlak renkler
+        # Doji mumlar gövde yerine yatay çizgi
+        draw_candles(ax, x_positions, recent_df['open'], recent_df['high'],
+                     recent_df['low'], recent_df['close'], '#00ff41', '#ff1744',
+                     body_width=0.012, wick_width=1.5, body_linewidth=0.5,
+                     doji_line_width=0.008)
             
     except Exception as e:
         print(f"Fiyat çizgisi hatası: {e}")
@@ -402,26 +505,17 @@ def format_volume(volume):
 
 def create_professional_liquidity_heatmap_with_analysis(symbol, timeframe='1h', lookback_hours=48):
     """
-    Analiz bilgileriyle birlikte likidite haritası oluştur
+    Analiz bilgileriyle birlikte likidite haritası oluştur (mumlar bir kez çekilir)
     """
     try:
-        # Veri al
-        df = get_binance_ohlc(symbol, interval=timeframe, limit=lookback_hours)
-        if df is None or df.empty:
+        result = get_liquidity_pipeline(symbol, timeframe, lookback_hours)
+        if not result:
             return None
-
-        # Likidite seviyelerini hesapla
-        liquidity_data = calculate_liquidity_levels(df)
-        
-        # Grafik oluştur
-        img = create_professional_liquidity_heatmap(symbol, timeframe, lookback_hours)
-        
-        # Analiz bilgileri
-        analysis = analyze_key_liquidity_levels(liquidity_data)
         
         return {
-            'image': img,
-            'analysis': analysis
+            'image': BytesIO(result['image_bytes']) if result['image_bytes'] else None,
+            'analysis': result['analysis'],
+            'chart_key': result['chart_key']
         }
         
     except Exception as e:
@@ -633,8 +727,9 @@ def add_liquidity_command_to_bot(bot):
                     binance_symbol, '1h', result['analysis']
                 )
                 
-                bot.send_photo(message.chat.id, result['image'], 
-                             caption=caption, parse_mode="Markdown")
+                chart_cache.send_cached_photo(
+                    bot, message.chat.id, result['chart_key'],
+                    result['image'].getvalue, caption=caption, parse_mode="Markdown")
             else:
                 bot.send_message(message.chat.id, 
                     "❌ Likidite haritası oluşturulamadı!")
@@ -657,5 +752,34 @@ def test_liquidity_heatmap():
     except Exception as e:
         print(f"Test hatası: {e}")
 
+def test_liquidity_levels_parity(num_levels=30, candles=48, seed=7):
+    """Vektörel seviye hesabını eski iterrows döngüsüyle karşılaştır (rastgele mumlar)."""
+    import time
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, candles)))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, candles))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, candles))
+    df = pd.DataFrame({'open': open_, 'high': high, 'low': low, 'close': close,
+                       'volume': rng.uniform(1e3, 1e6, candles)})
+
+    price_range = df['high'].max() - df['low'].min()
+    lo = df['low'].min() - price_range * 0.04
+    hi = df['high'].max() + price_range * 0.06
+    levels = np.linspace(lo, hi, num_levels)
+    thr = (hi - lo) / num_levels
+
+    t = time.perf_counter()
+    ref_vol, ref_touch = _level_volumes_loop(df, levels, thr)
+    t_loop = time.perf_counter() - t
+    t = time.perf_counter()
+    vol, touch = _level_volumes(df, levels, thr)
+    t_vec = time.perf_counter() - t
+
+    ok = np.array_equal(np.asarray(ref_touch), touch) and np.allclose(ref_vol, vol, rtol=1e-9, atol=1e-6)
+    print(f"{'✅' if ok else '❌'} parite {num_levels} seviye × {candles} mum: "
+          f"döngü {t_loop * 1000:.1f} ms, vektörel {t_vec * 1000:.2f} ms")
+    return ok
+
 if __name__ == "__main__":
     print("💧 Professional Liquidity Heatmap Generator yüklendi!")
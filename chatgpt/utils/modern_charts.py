@@ -14,6 +14,9 @@ import numpy as np
 import pandas as pd
 from io import BytesIO
 from datetime import datetime
+from utils.candle_renderer import draw_candles, draw_bars, direction_colors
+from services.render_service import agg_figure
+from utils.technical_analysis import IndicatorFrame
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -43,8 +46,12 @@ def create_ultra_modern_chart(df, symbol, analysis_data, timeframe="1h"):
     AI hedef noktaları ile
     """
     try:
+        # Handler'da hesaplanmış indikatörler (yoksa burada, her biri bir kez)
+        if 'indicators' not in analysis_data:
+            analysis_data = dict(analysis_data, indicators=IndicatorFrame(df))
+        
         # Figure oluştur - koyu tema
-        fig = plt.figure(figsize=(16, 10), facecolor=COLORS['bg_primary'])
+        fig = agg_figure('modern_chart', (16, 10), COLORS['bg_primary'])
         
         # Grid layout - sadece grafikler
         gs = GridSpec(4, 1, 
@@ -68,52 +75,38 @@ def create_ultra_modern_chart(df, symbol, analysis_data, timeframe="1h"):
         create_modern_volume(ax_volume, df)
         
         # Genel düzenlemeler
-        plt.tight_layout()
+        fig.tight_layout()
         
         # Grafik kaydet
         img = BytesIO()
-        plt.savefig(img, format='png', dpi=150, bbox_inches='tight', 
+        fig.savefig(img, format='png', dpi=150, bbox_inches='tight', 
                    facecolor=COLORS['bg_primary'], edgecolor='none')
         img.seek(0)
-        plt.close()
         
         return img
         
     except Exception as e:
         print(f"Ultra modern grafik hatası: {e}")
-        plt.close()
         return None
 
 def create_modern_price_chart_with_targets(ax, df, analysis_data, symbol, timeframe):
     """Modern fiyat grafiği - Candlestick + AI hedef noktaları"""
     ax.set_facecolor(COLORS['bg_secondary'])
     
-    # Candlestick çiz
-    for i in range(len(df)):
-        row = df.iloc[i]
-        color = COLORS['green'] if row['close'] >= row['open'] else COLORS['red']
-        
-        # High-Low çizgisi (wick)
-        ax.plot([i, i], [row['low'], row['high']], 
-               color=color, linewidth=1, alpha=0.8)
-        
-        # Open-Close dikdörtgeni (body)
-        height = abs(row['close'] - row['open'])
-        bottom = min(row['close'], row['open'])
-        
-        rect = Rectangle((i-0.3, bottom), 0.6, height,
-                        facecolor=color, edgecolor=color, 
-                        alpha=0.9 if height > 0 else 0.5)
-        ax.add_patch(rect)
+    # Candlestick çiz (fitiller + gövdeler iki collection)
+    draw_candles(ax, np.arange(len(df)), df['open'], df['high'], df['low'], df['close'],
+                 COLORS['green'], COLORS['red'],
+                 body_width=0.6, wick_alpha=0.8, body_alpha=0.9, flat_body_alpha=0.5)
     
     # Moving Averages
+    ind = analysis_data['indicators']
     if len(df) >= 20:
-        sma20 = df['close'].rolling(20).mean()
+        sma20 = ind.sma(20)
         ax.plot(range(len(df)), sma20, color=COLORS['yellow'], 
                linewidth=2, alpha=0.8, label='MA20')
     
     if len(df) >= 50:
-        sma50 = df['close'].rolling(50).mean()
+        sma50 = ind.sma(50)
         ax.plot(range(len(df)), sma50, color=COLORS['purple'], 
                linewidth=2, alpha=0.8, label='MA50')
     
@@ -286,9 +279,8 @@ def create_modern_rsi(ax, df, analysis_data):
     """Modern RSI grafiği"""
     ax.set_facecolor(COLORS['bg_secondary'])
     
-    # RSI hesapla
-    from utils.technical_analysis import calculate_rsi
-    rsi = calculate_rsi(df['close'])
+    # RSI (ortak frame'den)
+    rsi = analysis_data['indicators'].rsi()
     
     # RSI çizgisi
     x = range(len(rsi))
@@ -332,9 +324,8 @@ def create_modern_macd(ax, df, analysis_data):
     """Modern MACD grafiği"""
     ax.set_facecolor(COLORS['bg_secondary'])
     
-    # MACD hesapla
-    from utils.technical_analysis import calculate_macd
-    macd_data = calculate_macd(df['close'])
+    # MACD (ortak frame'den)
+    macd_data = analysis_data['indicators'].macd()
     
     x = range(len(macd_data['macd']))
     
@@ -345,23 +336,23 @@ def create_modern_macd(ax, df, analysis_data):
            linewidth=2, alpha=0.9, label='Signal')
     
     # Histogram
-    colors = [COLORS['green'] if val >= 0 else COLORS['red'] 
-             for val in macd_data['histogram']]
-    ax.bar(x, macd_data['histogram'], color=colors, alpha=0.5, width=0.8)
+    hist = macd_data['histogram'].to_numpy()
+    colors = np.where(hist >= 0, COLORS['green'], COLORS['red'])
+    draw_bars(ax, np.arange(len(hist)), hist, colors, width=0.8, alpha=0.5)
     
     # Zero line
     ax.axhline(y=0, color=COLORS['text_secondary'], linewidth=1, alpha=0.3)
     
-    # Crossover işaretleri
-    for i in range(1, len(macd_data['macd'])):
-        if (macd_data['macd'].iloc[i] > macd_data['signal'].iloc[i] and 
-            macd_data['macd'].iloc[i-1] <= macd_data['signal'].iloc[i-1]):
-            ax.scatter(i, macd_data['macd'].iloc[i], color=COLORS['green'], 
-                      s=50, zorder=5, marker='^')
-        elif (macd_data['macd'].iloc[i] < macd_data['signal'].iloc[i] and 
-              macd_data['macd'].iloc[i-1] >= macd_data['signal'].iloc[i-1]):
-            ax.scatter(i, macd_data['macd'].iloc[i], color=COLORS['red'], 
-                      s=50, zorder=5, marker='v')
+    # Crossover işaretleri (yön başına tek scatter)
+    macd = macd_data['macd'].to_numpy()
+    signal = macd_data['signal'].to_numpy()
+    above, below = macd > signal, macd < signal
+    bull = np.flatnonzero(above[1:] & (macd[:-1] <= signal[:-1])) + 1
+    bear = np.flatnonzero(below[1:] & (macd[:-1] >= signal[:-1])) + 1
+    if len(bull):
+        ax.scatter(bull, macd[bull], color=COLORS['green'], s=50, zorder=5, marker='^')
+    if len(bear):
+        ax.scatter(bear, macd[bear], color=COLORS['red'], s=50, zorder=5, marker='v')
     
     # MACD durumu
     if macd_data['macd'].iloc[-1] > macd_data['signal'].iloc[-1]:
@@ -395,17 +386,11 @@ def create_modern_volume(ax, df):
     ax.set_facecolor(COLORS['bg_secondary'])
     
     # Renkleri belirle
-    colors = []
-    for i in range(len(df)):
-        if i == 0:
-            colors.append(COLORS['blue'])
-        else:
-            color = COLORS['green'] if df['close'].iloc[i] >= df['close'].iloc[i-1] else COLORS['red']
-            colors.append(color)
+    colors = direction_colors(df['close'], COLORS['blue'], COLORS['green'], COLORS['red'])
     
     # Volume barları
     x = range(len(df))
-    bars = ax.bar(x, df['volume'], color=colors, alpha=0.7, width=0.8)
+    draw_bars(ax, np.arange(len(df)), df['volume'], colors, width=0.8, alpha=0.7)
     
     # Volume MA
     if len(df) >= 20:
@@ -415,10 +400,11 @@ def create_modern_volume(ax, df):
     
     # Anormal hacim işaretle
     avg_volume = df['volume'].mean()
-    for i, vol in enumerate(df['volume']):
-        if vol > avg_volume * 2:
-            ax.scatter(i, vol, color=COLORS['cyan'], s=30, 
-                      zorder=5, marker='*', alpha=0.8)
+    volume = df['volume'].to_numpy()
+    spikes = np.flatnonzero(volume > avg_volume * 2)
+    if len(spikes):
+        ax.scatter(spikes, volume[spikes], color=COLORS['cyan'], s=30, 
+                  zorder=5, marker='*', alpha=0.8)
     
     # Volume durumu
     current_vol = df['volume'].iloc[-1]
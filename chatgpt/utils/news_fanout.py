@@ -0,0 +1,377 @@
+"""
+utils/news_fanout.py
+- Kanal postlarını abonelere paralel ve Telegram limitlerine uygun iletir
+- Global ve sohbet başına token bucket (özel sohbet ~1/sn, grup ~20/dk)
+- 429 → retry_after kadar global bekleme + yeniden deneme
+- 403 (engellendi/atıldı) → on_forbidden ile abonelikten düşür
+- Polling thread'i bloklanmaz: post sadece kuyruğa yazılır
+- queue (utils/news_queue) verilirse işler diske yazılır; yeniden başlatmada kaldığı yerden devam
+- Yerel test: 429/403 döndüren sahte Bot API (stdlib HTTP)
+    python -m utils.news_fanout [port] [flood_every] [403_chat,...]   # TELEGRAM_API_URL'i buna yönlendir
+    python -m utils.news_fanout test                                   # bucket/retry/pruning doğrulaması
+"""
+
+from __future__ import annotations
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import NEWS_FANOUT_WORKERS, NEWS_GLOBAL_RATE, NEWS_USER_RATE, NEWS_GROUP_RATE
+
+MAX_ATTEMPTS = 5
+
+
+class TokenBucket:
+    """Basit token bucket. delay() beklenecek süreyi döner, take() token harcar."""
+    __slots__ = ("rate", "capacity", "tokens", "ts")
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.ts = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.ts) * self.rate)
+        self.ts = now
+
+    def delay(self, now: float) -> float:
+        """Bir token için kaç saniye beklenmeli (ayırmadan)."""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+
+def _error_info(e: Exception) -> Tuple[Optional[int], float]:
+    """telebot ApiTelegramException'dan (error_code, retry_after) çıkar."""
+    code = getattr(e, "error_code", None)
+    retry_after = 0.0
+    rj = getattr(e, "result_json", None) or {}
+    try:
+        retry_after = float((rj.get("parameters") or {}).get("retry_after", 0))
+    except (AttributeError, TypeError, ValueError):
+        pass
+    return code, retry_after
+
+
+class FanoutScheduler:
+    """
+    İş = (chat_id, from_chat_id, message_id). Zamanı gelmemiş işler heap'te bekler;
+    worker'lar global + sohbet bucket'ı uygun olan ilk işi alır.
+    """
+
+    def __init__(self, bot, workers: int = NEWS_FANOUT_WORKERS, global_rate: float = NEWS_GLOBAL_RATE,
+                 user_rate: float = NEWS_USER_RATE, group_rate: float = NEWS_GROUP_RATE,
+                 on_forbidden: Callable[[int], None] = None, queue=None):
+        self.bot = bot
+        self.queue = queue                     # BroadcastQueue (opsiyonel, kalıcı checkpoint)
+        self.workers = workers
+        self.user_rate = user_rate
+        self.group_rate = group_rate
+        self.on_forbidden = on_forbidden
+        self._global = TokenBucket(global_rate)
+        self._chat_buckets: Dict[int, TokenBucket] = {}
+        self._heap: List[tuple] = []          # (hazır_zaman, sıra, iş)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._paused_until = 0.0               # 429 sonrası global bekleme
+        self._threads: List[threading.Thread] = []
+        self._running = False
+        self._stats = {"sent": 0, "failed": 0, "retried": 0, "pruned": 0, "rate_limited": 0}
+        self._posts: Dict[Tuple[int, int], dict] = {}   # (from_chat, msg_id) -> ilerleme
+        self._last_post: Optional[dict] = None
+        self._done_ts: deque = deque(maxlen=20000)       # boşaltma hızı için tamamlanma zamanları
+
+    # -------------------- yaşam döngüsü --------------------
+    def start(self) -> None:
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        if self.queue is not None:
+            self._resume()
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker, name=f"news-fanout-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self) -> None:
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+    # -------------------- kuyruk --------------------
+    def _resume(self) -> None:
+        """Diskte bekleyen işleri (önceki süreçten kalan) tekrar sıraya koy."""
+        left = self.queue.pending()
+        for (src, mid), chat_ids in left.items():
+            self._push(src, mid, chat_ids)
+        if left:
+            print(f"🔁 Yarım kalan haber dağıtımı sürdürülüyor: {sum(map(len, left.values()))} iş")
+
+    def submit(self, from_chat_id: int, message_id: int, chat_ids: List[int]) -> None:
+        """Bir postu verilen sohbetlere iletmek üzere kuyruğa al (hemen döner)."""
+        if self.queue is not None and not self.queue.enqueue(from_chat_id, message_id, chat_ids):
+            return   # aynı post daha önce kuyruğa alınmış
+        self._push(from_chat_id, message_id, chat_ids)
+
+    def _push(self, from_chat_id: int, message_id: int, chat_ids: List[int]) -> None:
+        now = time.monotonic()
+        key = (from_chat_id, message_id)
+        with self._cond:
+            self._posts[key] = {"total": len(chat_ids), "done": 0, "sent": 0, "failed": 0,
+                                "started": time.time(), "finished": None}
+            for cid in chat_ids:
+                heapq.heappush(self._heap, (now, next(self._seq), (cid, from_chat_id, message_id, 0)))
+            self._cond.notify_all()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+    def _bucket(self, chat_id: int) -> TokenBucket:
+        b = self._chat_buckets.get(chat_id)
+        if b is None:
+            # negatif id = grup/süpergrup
+            b = self._chat_buckets[chat_id] = TokenBucket(
+                self.group_rate if chat_id < 0 else self.user_rate, capacity=1
+            )
+        return b
+
+    def _next_job(self):
+        """Çalıştırılabilir bir iş dönene kadar bekle; durdurulduysa None."""
+        with self._cond:
+            while self._running:
+                now = time.monotonic()
+                wait = self._paused_until - now
+                if wait <= 0 and self._heap:
+                    ready, _, job = self._heap[0]
+                    wait = ready - now
+                    if wait <= 0:
+                        wait = self._global.delay(now)
+                        if wait <= 0:
+                            chat_wait = self._bucket(job[0]).delay(now)
+                            heapq.heappop(self._heap)
+                            if chat_wait > 0:
+                                # sohbet limiti: işi ileri at, sıradakine geç
+                                heapq.heappush(self._heap, (now + chat_wait, next(self._seq), job))
+                                continue
+                            self._global.take(now)
+                            self._bucket(job[0]).take(now)
+                            return job
+                elif not self._heap:
+                    wait = None
+                self._cond.wait(wait)
+            return None
+
+    def _requeue(self, job, delay: float) -> None:
+        cid, src, mid, attempt = job
+        with self._cond:
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), (cid, src, mid, attempt + 1)))
+            self._cond.notify()
+
+    def _finish(self, job, ok: bool) -> None:
+        if self.queue is not None:
+            try:
+                self.queue.mark(job[1], job[2], job[0], ok)
+            except Exception as e:
+                print(f"⚠️ haber kuyruğu checkpoint: {e}")
+        with self._cond:
+            self._stats["sent" if ok else "failed"] += 1
+            self._done_ts.append(time.monotonic())
+            p = self._posts.get((job[1], job[2]))
+            if p is None:
+                return
+            p["done"] += 1
+            p["sent" if ok else "failed"] += 1
+            if p["done"] >= p["total"]:
+                p["finished"] = time.time()
+                self._posts.pop((job[1], job[2]), None)
+                self._last_post = p
+                took = max(p["finished"] - p["started"], 1e-9)
+                print(f"📢 Haber gönderildi: {p['sent']}/{p['total']} sohbet "
+                      f"(başarısız: {p['failed']}) {took:.1f}s, {p['sent'] / took:.1f} msj/sn")
+
+    # -------------------- worker --------------------
+    def _worker(self) -> None:
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            cid, src, mid, attempt = job
+            try:
+                self.bot.forward_message(chat_id=cid, from_chat_id=src, message_id=mid)
+                self._finish(job, True)
+            except Exception as e:
+                code, retry_after = _error_info(e)
+                if code == 429 and attempt < MAX_ATTEMPTS:
+                    with self._cond:
+                        self._stats["rate_limited"] += 1
+                        self._stats["retried"] += 1
+                        self._paused_until = max(self._paused_until, time.monotonic() + (retry_after or 1))
+                    self._requeue(job, retry_after or 1)
+                elif code == 403:
+                    with self._cond:
+                        self._stats["pruned"] += 1
+                        self._chat_buckets.pop(cid, None)
+                    if self.on_forbidden:
+                        try:
+                            self.on_forbidden(cid)
+                        except Exception as cb_err:
+                            print(f"⚠️ on_forbidden({cid}): {cb_err}")
+                    self._finish(job, False)
+                elif code is None and attempt < 2:
+                    # ağ hatası: kısa gecikmeyle bir kez daha dene
+                    with self._cond:
+                        self._stats["retried"] += 1
+                    self._requeue(job, 2)
+                else:
+                    print(f"⚠️ forward({cid}): {e}")
+                    self._finish(job, False)
+
+    # -------------------- istatistik --------------------
+    def get_stats(self) -> dict:
+        with self._cond:
+            out = dict(self._stats)
+            out["queued"] = len(self._heap)
+            now = time.monotonic()
+            recent = sum(1 for t in self._done_ts if now - t <= 60)
+            out["drain_rate"] = round(recent / 60, 2)    # son 1 dk, iş/sn
+            out["in_progress_posts"] = len(self._posts)
+            lp = self._last_post
+            if lp and lp["finished"]:
+                took = max(lp["finished"] - lp["started"], 1e-9)
+                out["last_post_seconds"] = round(took, 2)
+                out["last_post_rate"] = round(lp["sent"] / took, 1)
+        if self.queue is not None:
+            out["queue_depth"] = self.queue.depth()
+        return out
+
+
+# -------------------- yerel test: sahte Bot API --------------------
+def serve_fake_bot_api(host: str = "127.0.0.1", port: int = 8081, flood_every: int = 0,
+                       retry_after: int = 1, forbidden: Tuple[int, ...] = (), block: bool = True):
+    """
+    forwardMessage'a yanıt veren minimal Bot API sunucusu (stdlib). Her `flood_every`. forward
+    429 + parameters.retry_after, `forbidden` sohbetleri 403 döner; diğer metotlar ok.
+    config.TELEGRAM_API_URL = "http://127.0.0.1:8081/bot{0}/{1}" ile bot buraya yönlenir.
+    block=False: sunucu arka planda çalışır, (sunucu, çağrı listesi) döner.
+    """
+    import json
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs
+
+    blocked = {int(c) for c in forbidden}
+    calls: List[Tuple[float, str, Optional[int], int]] = []   # (zaman, metot, chat_id, http kodu)
+    lock = threading.Lock()
+    counter = itertools.count(1)
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            self._handle(self.path.partition("?")[2])
+
+        def do_POST(self):
+            size = int(self.headers.get("Content-Length") or 0)
+            self._handle(self.rfile.read(size).decode("utf-8", "replace"))
+
+        def _handle(self, body: str):
+            method = self.path.partition("?")[0].rsplit("/", 1)[-1]
+            params = {k: v[0] for k, v in parse_qs(body).items()}
+            chat_id = int(params["chat_id"]) if params.get("chat_id", "").lstrip("-").isdigit() else None
+            code, reply = 200, {"ok": True, "result": True}
+            if method == "getMe":
+                reply["result"] = {"id": 1, "is_bot": True, "first_name": "fake", "username": "fake_bot"}
+            elif method == "forwardMessage":
+                if chat_id in blocked:
+                    code, reply = 403, {"ok": False, "error_code": 403,
+                                        "description": "Forbidden: bot was blocked by the user"}
+                elif flood_every and next(counter) % flood_every == 0:
+                    code, reply = 429, {"ok": False, "error_code": 429,
+                                        "description": f"Too Many Requests: retry after {retry_after}",
+                                        "parameters": {"retry_after": retry_after}}
+                else:
+                    reply["result"] = {"message_id": int(params.get("message_id") or 1), "date": int(time.time()),
+                                       "chat": {"id": chat_id, "type": "group" if chat_id < 0 else "private"}}
+            with lock:
+                calls.append((time.monotonic(), method, chat_id, code))
+            data = json.dumps(reply).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    srv = ThreadingHTTPServer((host, port), Handler)
+    srv.daemon_threads = True
+    print(f"🧪 Sahte Bot API: http://{host}:{port}/bot{{0}}/{{1}} "
+          f"(429: her {flood_every or '-'}. forward, 403: {sorted(blocked) or '-'})")
+    if not block:
+        threading.Thread(target=srv.serve_forever, name="fake-bot-api", daemon=True).start()
+        return srv, calls
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+
+
+def test_fanout_fake_api(n_users: int = 60, n_groups: int = 5, port: int = 8081) -> None:
+    """Sahte Bot API'ye karşı dağıtım: 429'da bekleme + yeniden deneme, 403'te abonelikten düşürme."""
+    import telebot
+    from telebot import apihelper
+
+    forbidden = (1003, 1007, -2002)
+    srv, calls = serve_fake_bot_api(port=port, flood_every=25, retry_after=1, forbidden=forbidden, block=False)
+    old_url = apihelper.API_URL
+    apihelper.API_URL = f"http://127.0.0.1:{port}/bot{{0}}/{{1}}"
+    pruned: List[int] = []
+    chats = [1000 + i for i in range(n_users)] + [-2000 - i for i in range(n_groups)]
+    fan = FanoutScheduler(telebot.TeleBot("1:fake", threaded=False), workers=4, global_rate=30,
+                          on_forbidden=pruned.append)
+    try:
+        fan.start()
+        t = time.perf_counter()
+        fan.submit(-100, 7, chats)
+        while fan.get_stats()["sent"] + fan.get_stats()["failed"] < len(chats):
+            if time.perf_counter() - t > 60:
+                raise AssertionError(f"dağıtım bitmedi: {fan.get_stats()}")
+            time.sleep(0.05)
+        took = time.perf_counter() - t
+    finally:
+        fan.stop()
+        apihelper.API_URL = old_url
+        srv.shutdown()
+        srv.server_close()
+
+    stats = fan.get_stats()
+    floods = [c for c in calls if c[3] == 429]
+    assert sorted(pruned) == sorted(forbidden), pruned
+    assert stats["sent"] == len(chats) - len(forbidden), stats
+    assert stats["rate_limited"] == len(floods) > 0, (stats, len(floods))
+    for ts, _, _, _ in floods:
+        # 429'dan sonra retry_after boyunca yeni forward gitmemeli (işlemdeki istekler hariç)
+        early = [c for c in calls if c[1] == "forwardMessage" and ts + 0.05 < c[0] < ts + 0.95]
+        assert len(early) <= fan.workers, (ts, len(early))
+    print(f"✅ sahte Bot API: {stats['sent']}/{len(chats)} iletildi, {len(floods)}× 429 beklendi, "
+          f"{stats['pruned']} sohbet düşürüldü, {took:.1f}s")
+
+
+if __name__ == "__main__":
+    import sys
+    if sys.argv[1:2] == ["test"]:
+        test_fanout_fake_api()
+    else:
+        # python -m utils.news_fanout [port] [flood_every] [forbidden_chat,...]
+        serve_fake_bot_api(port=int(sys.argv[1]) if len(sys.argv) > 1 else 8081,
+                           flood_every=int(sys.argv[2]) if len(sys.argv) > 2 else 0,
+                           forbidden=tuple(int(c) for c in sys.argv[3].split(",")) if len(sys.argv) > 3 else ())
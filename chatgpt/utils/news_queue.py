@@ -0,0 +1,88 @@
+"""
+utils/news_queue.py
+- Haber dağıtımının diskteki kuyruğu: (kaynak sohbet, message_id, hedef chat_id) işleri
+- Her gönderimden sonra iş "tamamlandı" olarak işaretlenir (checkpoint)
+- Süreç yeniden başlarsa bekleyen işler kaldığı yerden devam eder, gönderilenler tekrar gitmez
+- SQLite WAL: iş başına tek satır güncellemesi
+"""
+
+from __future__ import annotations
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Tuple
+
+PENDING, DONE, FAILED = 0, 1, 2
+
+# Tamamlanmış postların kayıtları bu kadar saniye sonra silinir
+KEEP_FINISHED = 3 * 24 * 3600
+
+
+class BroadcastQueue:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " src INTEGER NOT NULL, message_id INTEGER NOT NULL, chat_id INTEGER NOT NULL,"
+            " state INTEGER NOT NULL DEFAULT 0, created REAL NOT NULL, updated REAL,"
+            " PRIMARY KEY (src, message_id, chat_id))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs(state)")
+
+    def enqueue(self, src: int, message_id: int, chat_ids: List[int]) -> bool:
+        """Postu kuyruğa yaz. Aynı post zaten kuyruktaysa (tekrar teslim) False."""
+        now = time.time()
+        with self._lock:
+            if self._db.execute(
+                "SELECT 1 FROM jobs WHERE src=? AND message_id=? LIMIT 1", (src, message_id)
+            ).fetchone():
+                return False
+            with self._db:
+                self._db.execute("BEGIN")
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO jobs (src, message_id, chat_id, state, created) VALUES (?, ?, ?, 0, ?)",
+                    [(src, message_id, cid, now) for cid in chat_ids],
+                )
+        return True
+
+    def mark(self, src: int, message_id: int, chat_id: int, ok: bool) -> None:
+        """Checkpoint: işin sonucunu kaydet."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET state=?, updated=? WHERE src=? AND message_id=? AND chat_id=?",
+                (DONE if ok else FAILED, time.time(), src, message_id, chat_id),
+            )
+
+    def pending(self) -> Dict[Tuple[int, int], List[int]]:
+        """Yarım kalmış postlar: {(src, message_id): [chat_id, ...]}"""
+        out: Dict[Tuple[int, int], List[int]] = {}
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT src, message_id, chat_id FROM jobs WHERE state=0 ORDER BY created, rowid"
+            ).fetchall()
+        for src, mid, cid in rows:
+            out.setdefault((src, mid), []).append(cid)
+        return out
+
+    def depth(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM jobs WHERE state=0").fetchone()[0]
+
+    def cleanup(self, keep: float = KEEP_FINISHED) -> int:
+        """Bekleyen işi kalmamış eski postları sil."""
+        cutoff = time.time() - keep
+        with self._lock:
+            cur = self._db.execute(
+                "DELETE FROM jobs WHERE created < ? AND (src, message_id) NOT IN "
+                "(SELECT src, message_id FROM jobs WHERE state=0)",
+                (cutoff,),
+            )
+            return cur.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -1,8 +1,11 @@
 from __future__ import annotations
-import os, json, threading
+import os, json, threading, atexit, time
 from telebot import TeleBot
 from telebot.types import Message, ChatMemberUpdated
 
+from utils.news_fanout import FanoutScheduler
+from utils.news_queue import BroadcastQueue
+
 # -----------------------------
 # Depolama: data/ klasörü
 # -----------------------------
@@ -12,6 +15,7 @@ os.makedirs(DATA_DIR, exist_ok=True)
 
 USERS_FILE  = os.path.join(DATA_DIR, "news_users.json")
 GROUPS_FILE = os.path.join(DATA_DIR, "news_groups.json")
+QUEUE_FILE  = os.path.join(DATA_DIR, "news_queue.db")
 
 # Eski kök konumlarla uyumluluk
 LEGACY_USERS_FILES  = [os.path.join(BASE_DIR, "news_users.json")]
@@ -24,6 +28,12 @@ _lock = threading.Lock()
 _users: set[int] = set()
 _groups: set[int] = set()
 
+# Kayıtlar bellekte tutulur; değişiklik olunca dosyalar en geç FLUSH_INTERVAL sn içinde yazılır
+FLUSH_INTERVAL = 5
+_dirty = {"users": False, "groups": False}
+_flush_thread: threading.Thread | None = None
+_fanout: FanoutScheduler | None = None
+
 def _load(path) -> list[int]:
     try:
         if os.path.exists(path):
@@ -35,11 +45,37 @@ def _load(path) -> list[int]:
 
 def _save(path, data):
     try:
-        with open(path, "w", encoding="utf-8") as f:
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
             json.dump(sorted(list(data)), f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)   # atomik: yarım yazılmış dosya kalmaz
     except Exception as e:
         print(f"⚠️ save({path}): {e}")
 
+def flush_subscribers():
+    """Kirli kayıtları diske yaz. Kopya kilit altında alınır, yazma kilit dışında yapılır."""
+    with _lock:
+        users = list(_users) if _dirty["users"] else None
+        groups = list(_groups) if _dirty["groups"] else None
+        _dirty["users"] = _dirty["groups"] = False
+    if users is not None:
+        _save(USERS_FILE, users)
+    if groups is not None:
+        _save(GROUPS_FILE, groups)
+
+def _flush_loop():
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        flush_subscribers()
+
+def _start_flusher():
+    global _flush_thread
+    if _flush_thread and _flush_thread.is_alive():
+        return
+    _flush_thread = threading.Thread(target=_flush_loop, name="news-flush", daemon=True)
+    _flush_thread.start()
+    atexit.register(flush_subscribers)
+
 def _migrate():
     """Kökteki eski dosyaları data/ altına taşı."""
     global _users, _groups
@@ -74,69 +110,71 @@ def _init_load():
     print(f"📰 Haber kayıtları: {_users and len(_users) or 0} kullanıcı, {_groups and len(_groups) or 0} grup")
 
 def add_active_user(uid: int):
+    if uid in _users:   # sık yol: kayıtlı sohbet, kilit yok
+        return
     with _lock:
         if uid not in _users:
             _users.add(int(uid))
-            _save(USERS_FILE, _users)
+            _dirty["users"] = True
             print(f"➕ kullanıcı eklendi: {uid} (toplam: {len(_users)})")
 
 def add_active_group(gid: int):
+    if gid in _groups:
+        return
     with _lock:
         if gid not in _groups:
             _groups.add(int(gid))
-            _save(GROUPS_FILE, _groups)
+            _dirty["groups"] = True
             print(f"➕ grup eklendi: {gid} (toplam: {len(_groups)})")
 
 def remove_group(gid: int):
     with _lock:
         if gid in _groups:
             _groups.discard(int(gid))
-            _save(GROUPS_FILE, _groups)
+            _dirty["groups"] = True
             print(f"➖ grup çıkarıldı: {gid} (toplam: {len(_groups)})")
 
+def remove_user(uid: int):
+    with _lock:
+        if uid in _users:
+            _users.discard(int(uid))
+            _dirty["users"] = True
+            print(f"➖ kullanıcı çıkarıldı: {uid} (toplam: {len(_users)})")
+
+def _prune_chat(chat_id: int):
+    """403 (bot engellendi / gruptan atıldı) → aboneliği düşür."""
+    if chat_id < 0:
+        remove_group(chat_id)
+    else:
+        remove_user(chat_id)
+
 def get_news_stats():
     return {
         "active_users": len(_users),
         "active_groups": len(_groups),
         "users": sorted(list(_users)),
         "groups": sorted(list(_groups)),
+        "fanout": _fanout.get_stats() if _fanout else {},
     }
 
 def register_news_forwarding(bot: TeleBot):
     """Kanal postlarını herkese ilet + otomatik kayıt ve grup üyeligi yönetimi."""
     _init_load()
+    _start_flusher()
+
+    global _fanout
+    queue = BroadcastQueue(QUEUE_FILE)
+    queue.cleanup()
+    _fanout = FanoutScheduler(bot, on_forbidden=_prune_chat, queue=queue)
+    _fanout.start()
 
-    # 1) Kanal postu geldiğinde herkes/gruplarına FORWARD et
+    # 1) Kanal postu geldiğinde herkes/gruplarına FORWARD et (kuyruğa yaz, hemen dön)
     @bot.channel_post_handler(func=lambda m: True)
     def _on_channel_post(message: Message):
-        failed_u = failed_g = 0
-
-        # Özel kullanıcılar
-        for uid in list(_users):
-            try:
-                bot.forward_message(
-                    chat_id=uid,
-                    from_chat_id=message.chat.id,
-                    message_id=message.message_id
-                )
-            except Exception as e:
-                failed_u += 1
-                print(f"⚠️ forward user({uid}): {e}")
-
-        # Gruplar
-        for gid in list(_groups):
-            try:
-                bot.forward_message(
-                    chat_id=gid,
-                    from_chat_id=message.chat.id,
-                    message_id=message.message_id
-                )
-            except Exception as e:
-                failed_g += 1
-                print(f"⚠️ forward group({gid}): {e}")
-
-        print(f"📢 Haber gönderildi: {len(_users)-failed_u} kullanıcı, {len(_groups)-failed_g} grup "
-              f"(başarısız: u={failed_u}, g={failed_g})")
+        with _lock:
+            targets = list(_users) + list(_groups)
+        _fanout.submit(message.chat.id, message.message_id, targets)
+        print(f"📢 Haber kuyruğa alındı: {len(targets)} sohbet")
 
     # 2) Bot gruba eklendi/çıkarıldı
     @bot.my_chat_member_handler(func=lambda upd: True)
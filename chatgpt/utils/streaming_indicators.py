@@ -0,0 +1,401 @@
+"""
+utils/streaming_indicators.py
+- Artımlı (streaming) indikatörler: her yeni mumda O(1) güncelleme, geçmiş yeniden hesaplanmaz
+- Tanımlar utils/technical_analysis ile aynı (pandas rolling / ewm(adjust=True) karşılıkları):
+  RSI, EMA/MACD, SMA, rolling std/Bollinger, ATR, Stochastic
+- IndicatorState: bir (sembol, interval) serisinin indikatörleri; geçmişle tohumlanır ve
+  kline store'a yeni kapanmış mum geldikçe kendiliğinden ilerler (binance_api.subscribe_klines)
+- Böylece binlerce sembolün indikatör tetikleyicileri / watchlist'leri yeniden hesaplamasız güncel kalır
+"""
+
+from __future__ import annotations
+import math
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from utils.binance_api import get_klines_array, subscribe_klines, _CLOSED_MARGIN_MS
+
+NAN = float("nan")
+RESUM_EVERY = 1000    # toplam kaymasına karşı SMA toplamı bu kadar güncellemede bir baştan toplanır
+
+
+class EMA:
+    """pandas ewm(span=n, adjust=True).mean() karşılığı"""
+    __slots__ = ("_decay", "_num", "_den", "value")
+
+    def __init__(self, span: int):
+        self._decay = 1 - 2 / (span + 1)
+        self._num = 0.0
+        self._den = 0.0
+        self.value = NAN
+
+    def update(self, x: float) -> float:
+        self._num = x + self._decay * self._num
+        self._den = 1 + self._decay * self._den
+        self.value = self._num / self._den
+        return self.value
+
+
+class SMA:
+    """rolling(window).mean() karşılığı (pencerede NaN varsa NaN)"""
+    __slots__ = ("window", "_buf", "_sum", "_nan", "_since_resum", "value")
+
+    def __init__(self, window: int):
+        self.window = window
+        self._buf = deque()
+        self._sum = 0.0
+        self._nan = 0
+        self._since_resum = 0
+        self.value = NAN
+
+    def update(self, x: float) -> float:
+        buf = self._buf
+        buf.append(x)
+        if x != x:
+            self._nan += 1
+        else:
+            self._sum += x
+        if len(buf) > self.window:
+            old = buf.popleft()
+            if old != old:
+                self._nan -= 1
+            else:
+                self._sum -= old
+        self._since_resum += 1
+        if self._since_resum >= RESUM_EVERY:
+            self._sum = math.fsum(v for v in buf if v == v)
+            self._since_resum = 0
+        self.value = self._sum / self.window if len(buf) == self.window and not self._nan else NAN
+        return self.value
+
+
+class RollingStd:
+    """rolling(window).std() (ddof=1) - Welford ekle/çıkar"""
+    __slots__ = ("window", "_buf", "_mean", "_m2", "value")
+
+    def __init__(self, window: int):
+        self.window = window
+        self._buf = deque()
+        self._mean = 0.0
+        self._m2 = 0.0
+        self.value = NAN
+
+    def update(self, x: float) -> float:
+        buf = self._buf
+        if len(buf) == self.window:
+            old = buf.popleft()
+            n = len(buf)
+            if n:
+                d = old - self._mean
+                self._mean -= d / n
+                self._m2 -= d * (old - self._mean)
+            else:
+                self._mean = self._m2 = 0.0
+        buf.append(x)
+        n = len(buf)
+        d = x - self._mean
+        self._mean += d / n
+        self._m2 += d * (x - self._mean)
+        self.value = math.sqrt(max(self._m2, 0.0) / (n - 1)) if n == self.window and n > 1 else NAN
+        return self.value
+
+
+def _ratio(num: float, den: float) -> float:
+    """NumPy/pandas bölme kuralları: x/0 → ±inf, 0/0 → NaN"""
+    if den:
+        return num / den
+    if num != num or not num:
+        return NAN
+    return math.copysign(math.inf, num)
+
+
+class RSI:
+    """calculate_rsi karşılığı: kazanç/kayıpların basit hareketli ortalaması"""
+    __slots__ = ("_prev", "_gain", "_loss", "value")
+
+    def __init__(self, window: int = 14):
+        self._prev = None
+        self._gain = SMA(window)
+        self._loss = SMA(window)
+        self.value = NAN
+
+    def update(self, close: float) -> float:
+        # ilk mumda delta NaN → pandas where() ile kazanç/kayıp 0 sayılır
+        d = 0.0 if self._prev is None else close - self._prev
+        self._prev = close
+        g = self._gain.update(d if d > 0 else 0.0)
+        l = self._loss.update(-d if d < 0 else 0.0)
+        rs = _ratio(g, l)
+        self.value = 100 - 100 / (1 + rs) if rs == rs else NAN
+        return self.value
+
+
+class MACD:
+    """calculate_macd karşılığı"""
+    __slots__ = ("_fast", "_slow", "_signal", "macd", "signal", "histogram")
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self._fast = EMA(fast)
+        self._slow = EMA(slow)
+        self._signal = EMA(signal)
+        self.macd = self.signal = self.histogram = NAN
+
+    def update(self, close: float) -> Tuple[float, float, float]:
+        self.macd = self._fast.update(close) - self._slow.update(close)
+        self.signal = self._signal.update(self.macd)
+        self.histogram = self.macd - self.signal
+        return self.macd, self.signal, self.histogram
+
+
+class Bollinger:
+    """calculate_bollinger_bands karşılığı"""
+    __slots__ = ("num_std", "_sma", "_std", "upper", "middle", "lower")
+
+    def __init__(self, window: int = 20, num_std: float = 2):
+        self.num_std = num_std
+        self._sma = SMA(window)
+        self._std = RollingStd(window)
+        self.upper = self.middle = self.lower = NAN
+
+    def update(self, close: float) -> Tuple[float, float, float]:
+        self.middle = self._sma.update(close)
+        std = self._std.update(close)
+        self.upper = self.middle + std * self.num_std
+        self.lower = self.middle - std * self.num_std
+        return self.upper, self.middle, self.lower
+
+
+class ATR:
+    """calculate_risk_metrics'teki ATR: true range'in 14 mumluk basit ortalaması"""
+    __slots__ = ("_prev_close", "_sma", "value")
+
+    def __init__(self, window: int = 14):
+        self._prev_close = None
+        self._sma = SMA(window)
+        self.value = NAN
+
+    def update(self, high: float, low: float, close: float) -> float:
+        tr = high - low
+        pc = self._prev_close
+        if pc is not None:
+            tr = max(tr, abs(high - pc), abs(low - pc))
+        self._prev_close = close
+        self.value = self._sma.update(tr)
+        return self.value
+
+
+class Stochastic:
+    """calculate_stochastic karşılığı; rolling max/min monoton deque ile"""
+    __slots__ = ("k_period", "_i", "_highs", "_lows", "_d", "k", "d")
+
+    def __init__(self, k_period: int = 14, d_period: int = 3):
+        self.k_period = k_period
+        self._i = 0
+        self._highs = deque()   # (i, high) azalan
+        self._lows = deque()    # (i, low) artan
+        self._d = SMA(d_period)
+        self.k = self.d = NAN
+
+    def update(self, high: float, low: float, close: float) -> Tuple[float, float]:
+        i = self._i
+        self._i += 1
+        hs, ls = self._highs, self._lows
+        while hs and hs[-1][1] <= high:
+            hs.pop()
+        hs.append((i, high))
+        while ls and ls[-1][1] >= low:
+            ls.pop()
+        ls.append((i, low))
+        start = i - self.k_period + 1
+        while hs[0][0] < start:
+            hs.popleft()
+        while ls[0][0] < start:
+            ls.popleft()
+        if start >= 0:
+            low_min = ls[0][1]
+            self.k = _ratio(close - low_min, hs[0][1] - low_min) * 100
+        self.d = self._d.update(self.k)
+        return self.k, self.d
+
+
+class IndicatorState:
+    """
+    Tek serinin (sembol, interval) canlı indikatörleri.
+    Sadece kapanmış mumlarla ilerler; açık mum hiçbir zaman beslenmez.
+    """
+    __slots__ = ("symbol", "interval", "last_open", "close", "candles",
+                 "rsi", "sma20", "sma50", "macd", "bb", "atr", "stoch")
+
+    def __init__(self, symbol: str, interval: str):
+        self.symbol = symbol
+        self.interval = interval
+        self.last_open = None
+        self.close = NAN
+        self.candles = 0
+        self.rsi = RSI(14)
+        self.sma20 = SMA(20)
+        self.sma50 = SMA(50)
+        self.macd = MACD(12, 26, 9)
+        self.bb = Bollinger(20, 2)
+        self.atr = ATR(14)
+        self.stoch = Stochastic(14, 3)
+
+    def update(self, open_time: float, high: float, low: float, close: float) -> None:
+        self.last_open = open_time
+        self.close = close
+        self.candles += 1
+        self.rsi.update(close)
+        self.sma20.update(close)
+        self.sma50.update(close)
+        self.macd.update(close)
+        self.bb.update(close)
+        self.atr.update(high, low, close)
+        self.stoch.update(high, low, close)
+
+    def values(self) -> Dict[str, float]:
+        return {
+            "open_time": self.last_open, "close": self.close, "rsi": self.rsi.value,
+            "sma20": self.sma20.value, "sma50": self.sma50.value,
+            "macd": self.macd.macd, "signal": self.macd.signal, "histogram": self.macd.histogram,
+            "bb_upper": self.bb.upper, "bb_middle": self.bb.middle, "bb_lower": self.bb.lower,
+            "atr": self.atr.value, "stoch_k": self.stoch.k, "stoch_d": self.stoch.d,
+        }
+
+
+def _feed(state: IndicatorState, rows: np.ndarray) -> Tuple[IndicatorState, int]:
+    """Yeni kapanmış mumları işle. Arada boşluk varsa seri baştan tohumlanır. Dönüş: (state, işlenen mum)."""
+    if state.last_open is not None:
+        opens = rows[:, 0]
+        if not len(opens) or opens[-1] <= state.last_open:
+            return state, 0
+        if opens[0] > state.last_open and state.last_open not in opens:
+            state = IndicatorState(state.symbol, state.interval)     # boşluk: yeniden tohumla
+        else:
+            rows = rows[opens > state.last_open]
+    for o, h, l, c in rows[:, [0, 2, 3, 4]].tolist():
+        state.update(o, h, l, c)
+    return state, len(rows)
+
+
+# -------------------- kayıt / kline store bağlantısı --------------------
+_states: Dict[Tuple[str, str], IndicatorState] = {}
+_states_lock = threading.Lock()
+_stats = {"seeded": 0, "advanced": 0}
+
+
+def _on_klines(symbol: str, interval: str, closed: np.ndarray) -> None:
+    """binance_api kline store'u yeni kapanmış mumlar aldığında çağrılır."""
+    key = (symbol, interval)
+    with _states_lock:
+        state = _states.get(key)
+        if state is None:
+            return
+        seeding = state.last_open is None
+        new_state, n = _feed(state, closed)
+        _states[key] = new_state
+        if n:
+            _stats["seeded" if seeding or new_state is not state else "advanced"] += 1
+
+
+subscribe_klines(_on_klines)
+
+
+def track(symbol: str, interval: str = "1h", history: int = 300) -> Optional[IndicatorState]:
+    """Seriyi izlemeye al: son `history` kapanmış mumla tohumla (sonrası kline store ile ilerler)."""
+    key = (symbol.upper(), interval)
+    with _states_lock:
+        if key not in _states:
+            _states[key] = IndicatorState(*key)
+    rows = get_klines_array(key[0], interval, history)
+    if rows is None:
+        return None
+    # Store seriyi zaten tutuyorsa kuyruk yenilemesi sadece açık mumu getirir ve bildirim gelmez;
+    # tohumlanmamış state'i dönen kapanmış mumlarla doğrudan tohumla
+    with _states_lock:
+        state = _states.get(key)
+        if state is not None and state.last_open is None:
+            closed = rows[rows[:, 6] + _CLOSED_MARGIN_MS < time.time() * 1000]
+            _states[key], n = _feed(state, closed)
+            if n:
+                _stats["seeded"] += 1
+    return get_state(key[0], interval)
+
+
+def untrack(symbol: str, interval: str = "1h") -> None:
+    with _states_lock:
+        _states.pop((symbol.upper(), interval), None)
+
+
+def get_state(symbol: str, interval: str = "1h", refresh: bool = False) -> Optional[IndicatorState]:
+    """İzlenen serinin state'i; refresh=True ise önce kline store kuyruğu yenilenir (küçük istek)."""
+    key = (symbol.upper(), interval)
+    if refresh and key in _states:
+        get_klines_array(key[0], interval, 10)
+    with _states_lock:
+        state = _states.get(key)
+    return state if state is not None and state.last_open is not None else None
+
+
+def get_streaming_stats() -> Dict[str, int]:
+    with _states_lock:
+        return {"tracked": len(_states), **_stats}
+
+
+# -------------------- doğrulama --------------------
+def test_streaming_parity(n: int = 500) -> None:
+    """Streaming değerleri ile pandas tabanlı tam hesaplamanın her mumda eşitliği + süre."""
+    import time
+    import pandas as pd
+    from utils.technical_analysis import (
+        calculate_rsi, calculate_macd, calculate_bollinger_bands, calculate_sma, calculate_ema,
+    )
+    from utils.advanced_technical_analysis import calculate_stochastic
+
+    rng = np.random.default_rng(3)
+    close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    high = close * (1 + rng.uniform(0, 0.01, n))
+    low = close * (1 - rng.uniform(0, 0.01, n))
+    df = pd.DataFrame({"high": high, "low": low, "close": close})
+
+    tr = pd.concat([df["high"] - df["low"], (df["high"] - df["close"].shift()).abs(),
+                    (df["low"] - df["close"].shift()).abs()], axis=1).max(axis=1)
+    macd = calculate_macd(df["close"])
+    bb = calculate_bollinger_bands(df["close"])
+    stoch = calculate_stochastic(df)
+    expected = {
+        "rsi": calculate_rsi(df["close"]), "sma20": calculate_sma(df["close"], 20),
+        "sma50": calculate_sma(df["close"], 50), "macd": macd["macd"], "signal": macd["signal"],
+        "histogram": macd["histogram"], "bb_upper": bb["upper"], "bb_middle": bb["middle"],
+        "bb_lower": bb["lower"], "atr": tr.rolling(14).mean(),
+        "stoch_k": stoch["k_percent"], "stoch_d": stoch["d_percent"],
+    }
+    ema = EMA(20)
+    ema_ref = calculate_ema(df["close"], 20).to_numpy()
+
+    state = IndicatorState("TEST", "1h")
+    got = {k: np.empty(n) for k in expected}
+    t = time.perf_counter()
+    for i in range(n):
+        state.update(i, high[i], low[i], close[i])
+        vals = state.values()
+        for k in got:
+            got[k][i] = vals[k]
+        assert np.isclose(ema.update(close[i]), ema_ref[i], rtol=1e-9)
+    per_candle = (time.perf_counter() - t) / n * 1e6
+
+    for k, ref in expected.items():
+        assert np.allclose(got[k], ref.to_numpy(), rtol=1e-7, atol=1e-7, equal_nan=True), k
+
+    t = time.perf_counter()
+    calculate_rsi(df["close"]); calculate_macd(df["close"]); calculate_bollinger_bands(df["close"])
+    full = (time.perf_counter() - t) * 1e6
+    print(f"✅ streaming = pandas ({n} mum, {len(expected)} seri). "
+          f"Mum başı güncelleme: {per_candle:.1f} µs, tam yeniden hesap (RSI+MACD+BB): {full:.0f} µs")
+
+
+if __name__ == "__main__":
+    test_streaming_parity()
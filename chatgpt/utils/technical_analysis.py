@@ -3,6 +3,8 @@ Technical Analysis Utils
 RSI, MACD, Bollinger Bands ve diğer teknik indikatörler
 """
 
+import threading
+from collections import OrderedDict
 import pandas as pd
 import numpy as np
 from config import *
@@ -79,27 +81,61 @@ def calculate_ema(prices, window):
         print(f"EMA hesaplama hatası: {e}")
         return pd.Series(index=prices.index, dtype=float)
 
+def _find_pivots_loop(values, window, kind):
+    """Eski mum başına döngü (referans / benchmark için)"""
+    s = pd.Series(values)
+    out = []
+    for i in range(window, len(s) - window):
+        if kind == 'high':
+            if all(s.iloc[i] >= s.iloc[i-j] for j in range(1, window+1)) and \
+               all(s.iloc[i] >= s.iloc[i+j] for j in range(1, window+1)):
+                out.append(i)
+        elif all(s.iloc[i] <= s.iloc[i-j] for j in range(1, window+1)) and \
+             all(s.iloc[i] <= s.iloc[i+j] for j in range(1, window+1)):
+            out.append(i)
+    return np.asarray(out, dtype=np.int64)
+
+def find_pivots(values, window=5, kind='high'):
+    """
+    Pivot noktaları: her iki yanındaki `window` mumun hepsinden yüksek/eşit (high)
+    ya da düşük/eşit (low) olan mumlar. Kayan pencere max/min ile tek geçiş.
+    Dönüş: (indeksler, değerler) - artan indeks sırasıyla
+    """
+    arr = np.asarray(values, dtype=float)
+    if window < 1 or len(arr) < 2 * window + 1:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=float)
+    windows = np.lib.stride_tricks.sliding_window_view(arr, 2 * window + 1)
+    extreme = windows.max(axis=1) if kind == 'high' else windows.min(axis=1)
+    center = arr[window:len(arr) - window]
+    idx = np.flatnonzero(center == extreme) + window     # NaN içeren pencereler eşleşmez
+    return idx, arr[idx]
+
+def find_support_levels(df, current_price, window=5):
+    """Mevcut fiyatın altındaki en yakın 3 pivot dip (destek)"""
+    try:
+        _, lows = find_pivots(df['low'].to_numpy(), window, 'low')
+        return sorted(lows[lows < current_price].tolist(), reverse=True)[:3]
+    except Exception:
+        return []
+
+def find_resistance_levels(df, current_price, window=5):
+    """Mevcut fiyatın üstündeki en yakın 3 pivot tepe (direnç)"""
+    try:
+        _, highs = find_pivots(df['high'].to_numpy(), window, 'high')
+        return sorted(highs[highs > current_price].tolist())[:3]
+    except Exception:
+        return []
+
 def find_support_resistance(df, window=5):
     """Destek ve direnç seviyelerini bul"""
     try:
-        highs = []
-        lows = []
-        
         # Pivot noktalarını bul
-        for i in range(window, len(df) - window):
-            # Yerel maksimum
-            if all(df['high'].iloc[i] >= df['high'].iloc[i-j] for j in range(1, window+1)) and \
-               all(df['high'].iloc[i] >= df['high'].iloc[i+j] for j in range(1, window+1)):
-                highs.append(df['high'].iloc[i])
-            
-            # Yerel minimum
-            if all(df['low'].iloc[i] <= df['low'].iloc[i-j] for j in range(1, window+1)) and \
-               all(df['low'].iloc[i] <= df['low'].iloc[i+j] for j in range(1, window+1)):
-                lows.append(df['low'].iloc[i])
+        _, highs = find_pivots(df['high'].to_numpy(), window, 'high')
+        _, lows = find_pivots(df['low'].to_numpy(), window, 'low')
         
         return {
-            'resistance_levels': sorted(highs, reverse=True)[:3],  # En yüksek 3 direnç
-            'support_levels': sorted(lows)[:3]  # En düşük 3 destek
+            'resistance_levels': sorted(highs.tolist(), reverse=True)[:3],  # En yüksek 3 direnç
+            'support_levels': sorted(lows.tolist())[:3]  # En düşük 3 destek
         }
     except Exception as e:
         print(f"Destek/direnç hesaplama hatası: {e}")
@@ -108,6 +144,24 @@ def find_support_resistance(df, window=5):
             'support_levels': []
         }
 
+def benchmark_pivots(n=1000, window=5, repeats=20):
+    """1000 mumda eski döngü ile vektörel pivot bulucunun eşitliği ve süreleri"""
+    import time
+    rng = np.random.default_rng(7)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    high = np.round(close * (1 + rng.uniform(0, 0.01, n)), 2)   # yuvarlama: eşit komşular da olsun
+    low = np.round(close * (1 - rng.uniform(0, 0.01, n)), 2)
+    for kind, values in (('high', high), ('low', low)):
+        t = time.perf_counter()
+        ref = _find_pivots_loop(values, window, kind)
+        loop_ms = (time.perf_counter() - t) * 1000
+        t = time.perf_counter()
+        for _ in range(repeats):
+            idx, _ = find_pivots(values, window, kind)
+        vec_ms = (time.perf_counter() - t) / repeats * 1000
+        assert np.array_equal(ref, idx), kind
+        print(f"pivot {kind:4s}: döngü {loop_ms:8.2f} ms | vektörel {vec_ms:.3f} ms | {len(idx)} pivot ({n} mum)")
+
 def calculate_volume_analysis(df, window=20):
     """Volume analizi yap"""
     try:
@@ -152,13 +206,14 @@ def get_volume_interpretation(volume_ratio):
     else:
         return "Çok Düşük Hacim"
 
-def calculate_trend_strength(df):
-    """Trend gücünü hesapla"""
+def calculate_trend_strength(df, frame=None):
+    """Trend gücünü hesapla (frame: hazır IndicatorFrame, yoksa oluşturulur)"""
     try:
         # SMA'ları hesapla
-        sma_20 = calculate_sma(df['close'], 20)
-        sma_50 = calculate_sma(df['close'], 50)
-        sma_200 = calculate_sma(df['close'], 200)
+        frame = frame or IndicatorFrame(df)
+        sma_20 = frame.sma(20)
+        sma_50 = frame.sma(50)
+        sma_200 = frame.sma(200)
         
         current_price = df['close'].iloc[-1]
         
@@ -218,13 +273,14 @@ def calculate_trend_strength(df):
             'sma_200': 0
         }
 
-def generate_trading_signals(df):
-    """Trading sinyalleri üret"""
+def generate_trading_signals(df, frame=None):
+    """Trading sinyalleri üret (frame: hazır IndicatorFrame, yoksa oluşturulur)"""
     try:
         signals = []
+        frame = frame or IndicatorFrame(df)
         
         # RSI sinyalleri
-        rsi = calculate_rsi(df['close'])
+        rsi = frame.rsi()
         current_rsi = rsi.iloc[-1]
         
         if current_rsi < 30:
@@ -233,7 +289,7 @@ def generate_trading_signals(df):
             signals.append({"type": "SELL", "reason": "RSI aşırı alım", "strength": "Orta"})
         
         # MACD sinyalleri
-        macd_data = calculate_macd(df['close'])
+        macd_data = frame.macd()
         if macd_data['macd'].iloc[-1] > macd_data['signal'].iloc[-1] and \
            macd_data['macd'].iloc[-2] <= macd_data['signal'].iloc[-2]:
             signals.append({"type": "BUY", "reason": "MACD pozitif kesişim", "strength": "Güçlü"})
@@ -242,7 +298,7 @@ def generate_trading_signals(df):
             signals.append({"type": "SELL", "reason": "MACD negatif kesişim", "strength": "Güçlü"})
         
         # Bollinger Bands sinyalleri
-        bb = calculate_bollinger_bands(df['close'])
+        bb = frame.bollinger()
         current_price = df['close'].iloc[-1]
         
         if current_price < bb['lower'].iloc[-1]:
@@ -255,6 +311,90 @@ def generate_trading_signals(df):
         print(f"Sinyal üretme hatası: {e}")
         return []
 
+# ---------- Tek geçişli indikatör hesaplama ----------
+class IndicatorFrame:
+    """
+    Bir mum serisinin indikatörleri. Her indikatör ilk istendiğinde bir kez hesaplanır;
+    skor, sinyal ve grafik aynı nesneyi kullanır (aynı rolling/ewm tekrar çalışmaz).
+    Render sürecine pickle ile hesaplanmış halleriyle gider.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self.close = df['close']
+        self._cache = {}
+
+    def _get(self, key, fn):
+        val = self._cache.get(key)
+        if val is None:
+            val = self._cache[key] = fn()
+        return val
+
+    def rsi(self, window=14):
+        return self._get(('rsi', window), lambda: calculate_rsi(self.close, window))
+
+    def sma(self, window):
+        return self._get(('sma', window), lambda: calculate_sma(self.close, window))
+
+    def ema(self, window):
+        return self._get(('ema', window), lambda: calculate_ema(self.close, window))
+
+    def macd(self, fast=12, slow=26, signal=9):
+        def build():
+            # EMA'lar ayrı ayrı da istenebilir; hızlı/yavaş EMA cache'ten gelir
+            macd_line = self.ema(fast) - self.ema(slow)
+            signal_line = macd_line.ewm(span=signal).mean()
+            return {'macd': macd_line, 'signal': signal_line, 'histogram': macd_line - signal_line}
+        return self._get(('macd', fast, slow, signal), build)
+
+    def bollinger(self, window=20, num_std=2):
+        def build():
+            # orta band = SMA(window), aynı rolling ortalama yeniden hesaplanmaz
+            sma = self.sma(window)
+            std = self.close.rolling(window=window).std()
+            return {'upper': sma + std * num_std, 'middle': sma, 'lower': sma - std * num_std}
+        return self._get(('bb', window, num_std), build)
+
+    def volume(self, window=20):
+        return self._get(('volume', window), lambda: calculate_volume_analysis(self.df, window))
+
+    def signals(self):
+        return self._get(('signals',), lambda: generate_trading_signals(self.df, self))
+
+    def trend_strength(self):
+        return self._get(('trend',), lambda: calculate_trend_strength(self.df, self))
+
+
+INDICATOR_FRAME_CACHE = 64
+_frames = OrderedDict()
+_frames_lock = threading.Lock()
+
+
+def get_indicator_frame(symbol, interval, df):
+    """
+    (symbol, interval, ilk açılış, son kapanış) başına tek IndicatorFrame.
+    Aynı mum serisini kullanan analiz, sinyal ve grafik aynı hesaplamaları paylaşır.
+    Son (açık) mumun kapanış/hacmi değiştiyse frame yeniden kurulur: aynı mum içindeki
+    ikinci istek eski indikatörleri değil güncel fiyatla hesaplananları alır.
+    """
+    try:
+        key = (symbol.upper(), interval, int(df['open_time'].iloc[0]), int(df['close_time'].iloc[-1]), len(df))
+        live = (float(df['close'].iloc[-1]), float(df['volume'].iloc[-1]) if 'volume' in df else None)
+    except Exception:
+        return IndicatorFrame(df)     # zaman kolonları yoksa cache'lenmez
+    with _frames_lock:
+        hit = _frames.get(key)
+        if hit is not None and hit[0] == live:
+            _frames.move_to_end(key)
+            return hit[1]
+        frame = IndicatorFrame(df)
+        _frames[key] = (live, frame)   # aynı mumun eski frame'inin yerine
+        _frames.move_to_end(key)
+        while len(_frames) > INDICATOR_FRAME_CACHE:
+            _frames.popitem(last=False)
+    return frame
+
+
 if DEBUG_MODE:
     print("📈 Technical analysis utils yüklendi!")
 